@@ -0,0 +1,152 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import functools
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, Dict, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Opt-in telemetry for the hot paths of module_1 and module_2. Instrumented
+# calls emit one JSON event each (name, wall time, rows, bytes, process peak
+# RSS, outcome) when ZRIVE_TELEMETRY is set: "1"/"log" sends events to this
+# module's logger, any other value is a file that receives JSON lines. When it
+# is unset the wrappers only test one module-level flag before calling through.
+logger = logging.getLogger(__name__)
+
+ENV_VAR = "ZRIVE_TELEMETRY"
+_LOG_SINKS = ("1", "log", "true")
+
+_sink: Optional[str] = None
+_lock = threading.Lock()
+
+
+def enable(sink: str = "log") -> None:
+    global _sink
+    _sink = sink
+
+
+def disable() -> None:
+    global _sink
+    _sink = None
+
+
+def enabled() -> bool:
+    return _sink is not None
+
+
+# High-water mark of the whole process since it started, not the memory used by
+# the span: it only grows, so a span that does not raise it allocated no more
+# than some earlier point of the process did
+def process_peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # kB on Linux
+
+
+def _measure(value: Any) -> Dict[str, Optional[int]]:
+    # Best-effort rows/bytes of a frame, array, daily payload or HTTP response
+    if isinstance(value, pd.DataFrame):
+        return {"rows": len(value), "bytes": int(value.memory_usage().sum())}
+    if isinstance(value, (pd.Series, np.ndarray)):
+        return {"rows": len(value), "bytes": int(value.nbytes)}
+    if isinstance(value, dict) and isinstance(value.get("time"), list):
+        return {"rows": len(value["time"]), "bytes": None}
+    if isinstance(getattr(value, "content", None), bytes):
+        return {"rows": None, "bytes": len(value.content)}
+    if isinstance(value, tuple):
+        parts = [_measure(v) for v in value]
+        totals: Dict[str, Optional[int]] = {}
+        for key in ("rows", "bytes"):
+            known = [p[key] for p in parts if p[key] is not None]
+            totals[key] = sum(known) if known else None
+        return totals
+    return {"rows": None, "bytes": None}
+
+
+def emit(event: Dict[str, Any]) -> None:
+    line = json.dumps(event, default=str)
+    if _sink in _LOG_SINKS:
+        logger.info(line)
+    elif _sink is not None:
+        with _lock, open(_sink, "a") as f:
+            f.write(line + "\n")
+
+
+class Span:
+    def __init__(self, name: str, **fields: Any) -> None:
+        self.event: Dict[str, Any] = {"event": name, **fields}
+
+    def set(self, **fields: Any) -> None:
+        self.event.update(fields)
+
+    def measure(self, value: Any) -> None:
+        # rows/bytes from a value, without overriding explicit fields
+        for key, measured in _measure(value).items():
+            if measured is not None and self.event.get(key) is None:
+                self.event[key] = measured
+
+
+@contextmanager
+def span(name: str, **fields: Any) -> Iterator[Span]:
+    current = Span(name, **fields)
+    if not enabled():
+        yield current
+        return
+    start = time.perf_counter()
+    try:
+        yield current
+        current.set(ok=True)
+    except BaseException as e:
+        current.set(ok=False, error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        current.set(
+            wall_s=time.perf_counter() - start,
+            process_peak_rss_bytes=process_peak_rss_bytes(),
+            ts=time.time(),
+            pid=os.getpid(),
+        )
+        emit(current.event)
+
+
+# Decorator form of span(). rows/bytes are measured on the result, falling
+# back to the first argument (the input frame of the analysis functions);
+# `measure` can return explicit fields from (result, *args, **kwargs).
+def instrument(
+    name: Optional[str] = None,
+    measure: Optional[Callable[..., Dict[str, Any]]] = None,
+) -> Callable[[Callable], Callable]:
+    def decorator(fn: Callable) -> Callable:
+        event_name = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _sink is None:
+                return fn(*args, **kwargs)
+            with span(event_name) as current:
+                result = fn(*args, **kwargs)
+                if measure is not None:
+                    current.set(**measure(result, *args, **kwargs))
+                current.measure(result)
+                if args:
+                    current.measure(args[0])
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+_env_sink = os.environ.get(ENV_VAR)
+if _env_sink and _env_sink != "0":
+    enable(_env_sink.lower() if _env_sink.lower() in _LOG_SINKS else _env_sink)
@@ -0,0 +1,132 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import pandas as pd
+import requests
+
+from src.module_1.module_1_meteo_api import (
+    MAX_WORKERS,
+    VARIABLES,
+    MeteoAPIError,
+    fetch_chunk_frame,
+    make_session,
+    split_date_range,
+)
+
+# Agregación en streaming: cada trozo de la API se reduce a sumas, conteos y
+# máximos por periodo y se descarta, así la memoria depende del número de
+# periodos y no del número de días.
+FREQUENCIES = {"weekly": "W", "monthly": "M", "yearly": "Y"}
+TIDY_COLUMNS = ["city", "frequency", "period_end", "variable"]
+_STATS = ("sum", "count", "max")
+
+
+def _partial(df: pd.DataFrame, period_alias: str) -> pd.DataFrame:
+    grouped = df.groupby(df.index.to_period(period_alias))
+    return pd.concat(
+        {"sum": grouped.sum(), "count": grouped.count(), "max": grouped.max()},
+        axis=1,
+    )
+
+
+def _combine(state: pd.DataFrame, part: pd.DataFrame) -> pd.DataFrame:
+    how = {col: "max" if col[0] == "max" else "sum" for col in part.columns}
+    return pd.concat([state, part]).groupby(level=0).agg(how)
+
+
+class StreamingAggregator:
+    def __init__(self, frequencies: Sequence[str] = tuple(FREQUENCIES)) -> None:
+        unknown = set(frequencies) - set(FREQUENCIES)
+        if unknown:
+            raise ValueError(f"Unknown frequencies: {sorted(unknown)}")
+        self.frequencies = list(frequencies)
+        self._state: Dict[Tuple[str, str], pd.DataFrame] = {}
+
+    # Incorpora un trozo diario (índice datetime, una columna por variable)
+    def update(self, city: str, chunk: pd.DataFrame) -> None:
+        if chunk.empty:
+            return
+        for frequency in self.frequencies:
+            part = _partial(chunk, FREQUENCIES[frequency])
+            key = (city, frequency)
+            state = self._state.get(key)
+            self._state[key] = part if state is None else _combine(state, part)
+
+    # Resultado compacto en formato tidy: una fila por ciudad/periodo/variable
+    def result(self) -> pd.DataFrame:
+        frames: List[pd.DataFrame] = []
+        for (city, frequency), state in self._state.items():
+            tidy = state.stack(level=1).rename_axis(["period", "variable"])
+            tidy = tidy.reset_index()
+            tidy["mean"] = tidy["sum"] / tidy["count"].where(tidy["count"] > 0)
+            tidy.insert(0, "city", city)
+            tidy.insert(1, "frequency", frequency)
+            tidy.insert(2, "period_end", tidy.pop("period").dt.end_time.dt.normalize())
+            frames.append(tidy)
+        if not frames:
+            return pd.DataFrame(columns=TIDY_COLUMNS + ["mean", *_STATS])
+        result = pd.concat(frames, ignore_index=True)
+        result["count"] = result["count"].astype("int64")
+        return result[TIDY_COLUMNS + ["mean", *_STATS]]
+
+
+# Descarga (ciudad, año) con como mucho max_workers trozos pendientes a la vez
+# y los va agregando a medida que llegan. Devuelve (resultado tidy, errores).
+def stream_city_aggregates(
+    cities: Dict[str, Dict[str, float]],
+    start_date: str,
+    end_date: str,
+    variables: Sequence[str] = VARIABLES,
+    frequencies: Sequence[str] = tuple(FREQUENCIES),
+    max_workers: int = MAX_WORKERS,
+    session: Optional[requests.Session] = None,
+) -> Tuple[pd.DataFrame, Dict[str, str]]:
+    aggregator = StreamingAggregator(frequencies)
+    errors: Dict[str, str] = {}
+    tasks: Iterable[Tuple[str, Tuple[str, str]]] = (
+        (name, chunk)
+        for name in cities
+        for chunk in split_date_range(start_date, end_date)
+    )
+
+    own_session = session is None
+    http = make_session(max_workers) if own_session else session
+    pending: Dict[Future, str] = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+
+            def submit_next() -> bool:
+                for name, (chunk_start, chunk_end) in tasks:
+                    if name in errors:
+                        continue
+                    future = pool.submit(
+                        fetch_chunk_frame,
+                        cities[name],
+                        chunk_start,
+                        chunk_end,
+                        http,
+                        variables,
+                        "allow",
+                    )
+                    pending[future] = name
+                    return True
+                return False
+
+            while len(pending) < max_workers and submit_next():
+                pass
+            while pending:
+                done: Set[Future] = wait(pending, return_when=FIRST_COMPLETED)[0]
+                for future in done:
+                    name = pending.pop(future)
+                    try:
+                        if name not in errors:
+                            aggregator.update(name, future.result())
+                    except MeteoAPIError as e:
+                        errors[name] = str(e)
+                    submit_next()
+    finally:
+        if own_session:
+            http.close()
+
+    result = aggregator.result()
+    return result[~result["city"].isin(list(errors))].reset_index(drop=True), errors
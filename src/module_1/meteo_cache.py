@@ -0,0 +1,208 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Caché local de la API de archivo: los datos históricos no cambian, así que
+# cada valor se guarda una vez con clave (lat, lon, zona horaria, variable, día).
+# La zona horaria forma parte de la clave porque decide dónde empieza cada día.
+DEFAULT_CACHE_PATH = os.getenv("METEO_CACHE_PATH", "meteo_cache.sqlite")
+DEFAULT_MAX_ROWS = 5_000_000
+COORD_DECIMALS = 6
+# El archivo publica los días recientes con retraso: un día que falta dentro de
+# este margen puede llegar más tarde, así que no se marca como vacío
+ARCHIVE_LAG = timedelta(days=7)
+TIMEZONE = "Europe/Madrid"
+SCHEMA_VERSION = 1
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS daily (
+    lat REAL NOT NULL,
+    lon REAL NOT NULL,
+    tz TEXT NOT NULL,
+    variable TEXT NOT NULL,
+    day TEXT NOT NULL,
+    value REAL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (lat, lon, tz, variable, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS daily_accessed ON daily (accessed);
+CREATE TABLE IF NOT EXISTS empty_days (
+    lat REAL NOT NULL,
+    lon REAL NOT NULL,
+    tz TEXT NOT NULL,
+    day TEXT NOT NULL,
+    PRIMARY KEY (lat, lon, tz, day)
+) WITHOUT ROWID;
+PRAGMA user_version = {SCHEMA_VERSION};
+"""
+
+
+def _days(start_date: str, end_date: str) -> List[str]:
+    start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    return [(start + timedelta(n)).isoformat() for n in range((end - start).days + 1)]
+
+
+# Agrupa días consecutivos en rangos (inicio, fin) para pedir solo los huecos
+def _to_ranges(days: Sequence[str]) -> List[Tuple[str, str]]:
+    ranges: List[Tuple[str, str]] = []
+    for day in days:
+        if ranges and date.fromisoformat(day) - date.fromisoformat(
+            ranges[-1][1]
+        ) == timedelta(1):
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+
+class MeteoCache:
+    def __init__(
+        self, path: str = DEFAULT_CACHE_PATH, max_rows: int = DEFAULT_MAX_ROWS
+    ) -> None:
+        if max_rows < 1:
+            raise ValueError("max_rows must be at least 1")
+        self.path = path
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        (version,) = self._conn.execute("PRAGMA user_version").fetchone()
+        if version != SCHEMA_VERSION:
+            # La caché se puede volver a descargar: un esquema antiguo se descarta
+            self._conn.executescript(
+                "DROP TABLE IF EXISTS daily; DROP TABLE IF EXISTS empty_days;"
+            )
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "MeteoCache":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    @staticmethod
+    def _key(city: Dict[str, float], timezone: str) -> Tuple[float, float, str]:
+        return (
+            round(city["latitude"], COORD_DECIMALS),
+            round(city["longitude"], COORD_DECIMALS),
+            timezone,
+        )
+
+    # Rangos de fechas a los que les falta al menos una variable
+    def missing_ranges(
+        self,
+        city: Dict[str, float],
+        variables: Sequence[str],
+        start_date: str,
+        end_date: str,
+        timezone: str = TIMEZONE,
+    ) -> List[Tuple[str, str]]:
+        key = self._key(city, timezone)
+        placeholders = ",".join("?" * len(variables))
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT day FROM daily
+                WHERE lat = ? AND lon = ? AND tz = ? AND day BETWEEN ? AND ?
+                  AND variable IN ({placeholders})
+                GROUP BY day HAVING COUNT(*) = ?
+                """,
+                (*key, start_date, end_date, *variables, len(variables)),
+            ).fetchall()
+            empty = self._conn.execute(
+                "SELECT day FROM empty_days"
+                " WHERE lat = ? AND lon = ? AND tz = ? AND day BETWEEN ? AND ?",
+                (*key, start_date, end_date),
+            ).fetchall()
+        cached = {row[0] for row in rows} | {row[0] for row in empty}
+        return _to_ranges([d for d in _days(start_date, end_date) if d not in cached])
+
+    # Con el rango pedido, los días que la API no devolvió y que son anteriores
+    # a ARCHIVE_LAG quedan marcados como vacíos para no volver a pedirlos
+    def store(
+        self,
+        city: Dict[str, float],
+        daily: Dict[str, Any],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        timezone: str = TIMEZONE,
+    ) -> None:
+        key = self._key(city, timezone)
+        now = time.time()
+        rows = [
+            (*key, variable, day, value, now)
+            for variable, values in daily.items()
+            if variable != "time"
+            for day, value in zip(daily["time"], values)
+        ]
+        empty = []
+        if start_date is not None and end_date is not None:
+            returned = set(daily["time"])
+            settled = (date.today() - ARCHIVE_LAG).isoformat()
+            empty = [
+                (*key, day)
+                for day in _days(start_date, min(end_date, settled))
+                if day not in returned
+            ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO daily VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO empty_days VALUES (?, ?, ?, ?)", empty
+            )
+
+    # Devuelve los días cacheados con el mismo formato que la sección "daily"
+    def load(
+        self,
+        city: Dict[str, float],
+        variables: Sequence[str],
+        start_date: str,
+        end_date: str,
+        timezone: str = TIMEZONE,
+    ) -> Optional[Dict[str, Any]]:
+        params = (*self._key(city, timezone), start_date, end_date)
+        where = "lat = ? AND lon = ? AND tz = ? AND day BETWEEN ? AND ?"
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                f"SELECT variable, day, value FROM daily WHERE {where}", params
+            ).fetchall()
+            self._conn.execute(
+                f"UPDATE daily SET accessed = ? WHERE {where}", (time.time(), *params)
+            )
+
+        by_variable: Dict[str, Dict[str, float]] = {v: {} for v in variables}
+        for variable, day, value in rows:
+            if variable in by_variable:
+                by_variable[variable][day] = value
+        # Solo días completos, para que todas las listas tengan la misma longitud
+        days = sorted(set.intersection(*(set(v) for v in by_variable.values())))
+        if not days:
+            return None
+        daily: Dict[str, Any] = {"time": days}
+        for variable in variables:
+            daily[variable] = [by_variable[variable][day] for day in days]
+        return daily
+
+    # Política LRU: borra las filas menos usadas hasta volver a max_rows
+    def evict(self) -> int:
+        with self._lock, self._conn:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM daily").fetchone()
+            excess = count - self.max_rows
+            if excess <= 0:
+                return 0
+            self._conn.execute(
+                """
+                DELETE FROM daily WHERE (lat, lon, tz, variable, day) IN (
+                    SELECT lat, lon, tz, variable, day FROM daily
+                    ORDER BY accessed LIMIT ?
+                )
+                """,
+                (excess,),
+            )
+        return excess
@@ -0,0 +1,110 @@
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+from matplotlib.figure import Figure
+
+from src.module_1.module_1_meteo_api import COLUMN_LABELS, data_process, plot_monthly
+
+# Renderizado sin pantalla: se usa matplotlib.figure.Figure directamente (canvas
+# Agg), sin pasar por pyplot, así funciona en procesos hijos y en jobs nocturnos.
+logger = logging.getLogger(__name__)
+
+FORMATS = ("png", "svg")
+FIGSIZE = (12, 5)
+# El punto no sale nunca de _safe_name, así que ninguna ciudad pisa el informe
+REPORT_NAME = "report.combined"
+
+
+# Medias mensuales por ciudad, calculadas una sola vez y reutilizadas
+def monthly_means(daily_by_city: Dict[str, Dict[str, Any]]) -> Dict[str, pd.DataFrame]:
+    return {
+        city: data_process(daily).resample("ME").mean()
+        for city, daily in daily_by_city.items()
+    }
+
+
+# Lo mismo a partir del resultado tidy de meteo_aggregate.StreamingAggregator
+def monthly_from_aggregates(result: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    monthly = result[result["frequency"] == "monthly"]
+    frames = {}
+    for city, group in monthly.groupby("city", sort=False):
+        wide = group.pivot(index="period_end", columns="variable", values="mean")
+        wide = wide.rename(columns=COLUMN_LABELS).rename_axis("Date")
+        wide.columns.name = None
+        frames[city] = wide
+    return frames
+
+
+def _safe_name(city: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in city)
+
+
+def _render_city(
+    city: str, df_monthly: pd.DataFrame, path: str
+) -> Tuple[str, str, float]:
+    started = time.perf_counter()
+    fig = Figure(figsize=FIGSIZE)
+    plot_monthly(df_monthly, city, fig.subplots())
+    fig.tight_layout()
+    fig.savefig(path)
+    return city, path, time.perf_counter() - started
+
+
+def _render_combined(
+    monthly: Dict[str, pd.DataFrame], path: str
+) -> Tuple[None, str, float]:
+    started = time.perf_counter()
+    fig = Figure(figsize=(FIGSIZE[0], FIGSIZE[1] * len(monthly)))
+    axs = fig.subplots(len(monthly), 1, sharex=True, squeeze=False)[:, 0]
+    for ax, (city, df_monthly) in zip(axs, monthly.items()):
+        plot_monthly(df_monthly, city, ax)
+    fig.tight_layout()
+    fig.savefig(path)
+    return None, path, time.perf_counter() - started
+
+
+# Una figura por ciudad en un pool de procesos; opcionalmente un informe conjunto.
+# Devuelve ({ciudad: ruta}, ruta del informe conjunto o None), por separado para
+# que una ciudad no pueda chocar con el informe.
+def render_cities(
+    monthly: Dict[str, pd.DataFrame],
+    output_dir: str,
+    fmt: str = "png",
+    max_workers: Optional[int] = None,
+    combined: bool = False,
+) -> Tuple[Dict[str, str], Optional[str]]:
+    if fmt not in FORMATS:
+        raise ValueError(f"fmt must be one of {FORMATS}")
+    os.makedirs(output_dir, exist_ok=True)
+    ext = f".{fmt}"
+
+    jobs: List[Tuple[Any, ...]] = [
+        (_render_city, city, df, os.path.join(output_dir, _safe_name(city) + ext))
+        for city, df in monthly.items()
+    ]
+    if combined and monthly:
+        jobs.append(
+            (_render_combined, monthly, os.path.join(output_dir, REPORT_NAME + ext))
+        )
+
+    paths: Dict[str, str] = {}
+    report: Optional[str] = None
+    if not jobs:
+        return paths, report
+    # "spawn" evita hacer fork de un proceso con hilos (pool HTTP, etc.)
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+        futures = [pool.submit(*job) for job in jobs]
+        for future in futures:
+            name, path, seconds = future.result()
+            logger.info("Rendered %s to %s in %.3fs", name or "report", path, seconds)
+            if name is None:
+                report = path
+            else:
+                paths[name] = path
+    return paths, report
@@ -1,114 +1,442 @@
+import json
+import random
+import threading
+import time
 import requests
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-import jsonschema
-from jsonschema import validate
-from typing import Dict, Any, Optional
-
-# Esquema para validar que lo devuelve la API está bien
-validation_schema = {
-    "type": "object",
-    "properties": {
-        "daily": {
-            "type": "object",
-            "properties": {
-                "time": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "minItems": 1, 
-                },  
-                "temperature_2m_mean": {
-                    "type": "array",
-                    "items": {"type": "number"},
-                    "minItems": 1,  
-                },
-                "precipitation_sum": {
-                    "type": "array",
-                    "items": {"type": "number"},
-                    "minItems": 1,  
-                },
-                "wind_speed_10m_max": {
-                    "type": "array",
-                    "items": {"type": "number"},
-                    "minItems": 1,
-                },
-            },
-            "required": [
-                "time",  
-                "temperature_2m_mean",
-                "precipitation_sum",
-                "wind_speed_10m_max",
-            ],
-        }
-    },
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
+from src.instrumentation import instrument
+from src.module_1.meteo_cache import TIMEZONE, MeteoCache
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional; json de la stdlib como respaldo
+    orjson = None
+
+API_URL = "https://archive-api.open-meteo.com/v1/archive?"
+VARIABLES = ["temperature_2m_mean", "precipitation_sum", "wind_speed_10m_max"]
+COLUMN_LABELS = {
+    "temperature_2m_mean": "Temperature (°C)",
+    "precipitation_sum": "Precipitation (mm)",
+    "wind_speed_10m_max": "Wind Speed (m/s)",
 }
+NAN_POLICIES = ("allow", "drop", "raise")
+
+
+MAX_WORKERS = 8
+TIMEOUT = 30
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class MeteoAPIError(Exception):
+    pass
+
+
+# Sesión HTTP con un pool de conexiones, para reutilizar TCP/TLS entre llamadas.
+# El semáforo limita las peticiones en vuelo aunque se use desde varios pools.
+class PooledSession(requests.Session):
+    def __init__(self, max_in_flight: int = MAX_WORKERS) -> None:
+        super().__init__()
+        adapter = HTTPAdapter(
+            pool_connections=max_in_flight, pool_maxsize=max_in_flight
+        )
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+
+    def request(self, *args: Any, **kwargs: Any) -> requests.Response:
+        with self._slots:
+            return super().request(*args, **kwargs)
+
 
+def make_session(pool_size: int = MAX_WORKERS) -> requests.Session:
+    return PooledSession(pool_size)
+
+
+# Segundos de espera según la cabecera Retry-After (número o fecha HTTP)
+def _retry_after(response: requests.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:  # fechas con zona "-0000" llegan sin tzinfo
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def _backoff(attempt: int) -> float:
+    # Backoff exponencial con "full jitter"
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+
+
+# GET con timeout que reintenta 429 y 5xx; el resto de errores se lanzan ya
+@instrument()
+def request_with_retry(
+    url: str,
+    params: Dict[str, Any],
+    session: Optional[requests.Session] = None,
+    retries: int = MAX_RETRIES,
+    timeout: float = TIMEOUT,
+) -> requests.Response:
+    http = session if session is not None else requests
+    for attempt in range(retries + 1):
+        try:
+            response = http.get(url, params=params, timeout=timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == retries:
+                raise
+            time.sleep(_backoff(attempt))
+            continue
+
+        if response.status_code not in RETRY_STATUS or attempt == retries:
+            response.raise_for_status()
+            return response
+        wait = _retry_after(response)
+        time.sleep(min(BACKOFF_MAX, wait) if wait is not None else _backoff(attempt))
+    raise AssertionError("unreachable")
 
 
 # Función genérica para llamadas a APIs
-def api_request(url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+@instrument()
+def api_request(
+    url: str, params: Dict[str, Any], session: Optional[requests.Session] = None
+) -> Optional[Dict[str, Any]]:
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()  # Lanza un error para respuestas no exitosas
+        response = request_with_retry(url, params, session)
         return response.json()
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
         print(f"Error in the API request: {e}")
         return None
 
 
-# Función para obtener datos meteorológicos de la API Meteo
-def get_data_meteo_api(
-    city: Dict[str, float], start_date: str, end_date: str
-) -> Optional[Dict[str, Any]]:
-    API_URL = "https://archive-api.open-meteo.com/v1/archive?"
-    VARIABLES = ["temperature_2m_mean", "precipitation_sum", "wind_speed_10m_max"]
+# Divide [start_date, end_date] en trozos de un año natural como mucho
+def split_date_range(start_date: str, end_date: str) -> List[Tuple[str, str]]:
+    start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    if start > end:
+        raise ValueError(f"start_date {start_date} is after end_date {end_date}")
+    chunks = []
+    while start <= end:
+        chunk_end = min(date(start.year, 12, 31), end)
+        chunks.append((start.isoformat(), chunk_end.isoformat()))
+        start = date(start.year + 1, 1, 1)
+    return chunks
+
+
+# Junta las secciones "daily" de cada trozo respetando el orden. Cada trozo
+# aporta solo los días de su propio rango, así no se duplican días en los bordes.
+def merge_daily(
+    parts: List[Dict[str, Any]], chunks: List[Tuple[str, str]]
+) -> Dict[str, Any]:
+    merged: Dict[str, Any] = {key: [] for key in parts[0]}
+    for part, (start_date, end_date) in zip(parts, chunks):
+        keep = [
+            i for i, day in enumerate(part["time"]) if start_date <= day <= end_date
+        ]
+        for key in merged:
+            merged[key].extend(part[key][i] for i in keep)
+    return merged
 
-    params = {
+
+def _meteo_params(
+    city: Dict[str, float],
+    start_date: str,
+    end_date: str,
+    variables: Sequence[str] = VARIABLES,
+    timezone: str = TIMEZONE,
+) -> Dict:
+    return {
         "latitude": city["latitude"],
         "longitude": city["longitude"],
         "start_date": start_date,
         "end_date": end_date,
-        "daily": ",".join(VARIABLES),
-        "timezone": "Europe/Madrid",
+        "daily": ",".join(variables),
+        "timezone": timezone,
     }
 
-    data = api_request(API_URL, params)
 
-    if data and "daily" in data:
-        # Validar la respuesta contra el esquema de arriba
-        try:
-            validate(instance=data, schema=validation_schema)
-            return data["daily"]
-        except jsonschema.exceptions.ValidationError as e:
-            print(f"Error in the schema validation: {e.message}")
-            return None
-    else:
-        print(
-            "No daily data found in the response or no response obtained from the API."
+def _fetch_chunk(
+    city: Dict[str, float],
+    start_date: str,
+    end_date: str,
+    session: Optional[requests.Session] = None,
+    variables: Sequence[str] = VARIABLES,
+    timezone: str = TIMEZONE,
+) -> Dict[str, Any]:
+    params = _meteo_params(city, start_date, end_date, variables, timezone)
+    try:
+        data = _loads(request_with_retry(API_URL, params, session).content)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        raise MeteoAPIError(f"Error in the API request: {e}") from e
+
+    if not isinstance(data, dict) or "daily" not in data:
+        raise MeteoAPIError("No daily data found in the response.")
+
+    # Validación columnar con decode_daily: columnas numéricas, misma longitud
+    # que el eje de fechas, fechas válidas y sin nulos
+    try:
+        decode_daily(data, variables, nan_policy="raise")
+    except (TypeError, ValueError) as e:
+        raise MeteoAPIError(f"Invalid daily data: {e}") from e
+    return data["daily"]
+
+
+# Igual que get_data_meteo_api pero lanza MeteoAPIError en vez de imprimir.
+# Los rangos largos se piden por años en paralelo y se vuelven a unir en orden.
+def fetch_daily(
+    city: Dict[str, float],
+    start_date: str,
+    end_date: str,
+    session: Optional[requests.Session] = None,
+    max_workers: int = MAX_WORKERS,
+    variables: Sequence[str] = VARIABLES,
+    timezone: str = TIMEZONE,
+) -> Dict[str, Any]:
+    chunks = split_date_range(start_date, end_date)
+    if len(chunks) == 1:
+        return _fetch_chunk(city, start_date, end_date, session, variables, timezone)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+        parts = list(
+            pool.map(
+                lambda chunk: _fetch_chunk(city, *chunk, session, variables, timezone),
+                chunks,
+            )
+        )
+    merged = merge_daily(parts, chunks)
+    if not merged["time"]:
+        raise MeteoAPIError("No daily data found in the response.")
+    return merged
+
+
+# Con caché solo se piden a la API los días que faltan y se fusionan con el resto
+def fetch_daily_cached(
+    city: Dict[str, float],
+    start_date: str,
+    end_date: str,
+    session: Optional[requests.Session] = None,
+    cache: Optional[MeteoCache] = None,
+    variables: Sequence[str] = VARIABLES,
+    timezone: str = TIMEZONE,
+) -> Dict[str, Any]:
+    if cache is None:
+        return fetch_daily(
+            city, start_date, end_date, session, variables=variables, timezone=timezone
         )
+
+    for gap_start, gap_end in cache.missing_ranges(
+        city, variables, start_date, end_date, timezone
+    ):
+        cache.store(
+            city,
+            fetch_daily(
+                city,
+                gap_start,
+                gap_end,
+                session,
+                variables=variables,
+                timezone=timezone,
+            ),
+            gap_start,
+            gap_end,
+            timezone,
+        )
+
+    daily = cache.load(city, variables, start_date, end_date, timezone)
+    cache.evict()
+    if daily is None:
+        raise MeteoAPIError("No daily data found in the response.")
+    return daily
+
+
+# Función para obtener datos meteorológicos de la API Meteo
+@instrument()
+def get_data_meteo_api(
+    city: Dict[str, float],
+    start_date: str,
+    end_date: str,
+    cache: Optional[MeteoCache] = None,
+    variables: Sequence[str] = VARIABLES,
+    timezone: str = TIMEZONE,
+) -> Optional[Dict[str, Any]]:
+    try:
+        return fetch_daily_cached(
+            city,
+            start_date,
+            end_date,
+            cache=cache,
+            variables=variables,
+            timezone=timezone,
+        )
+    except MeteoAPIError as e:
+        print(e)
         return None
 
 
-# Función para procesar los datos
-def data_process(daily_data: Dict[str, Any]) -> pd.DataFrame:
+# Descarga varias ciudades en paralelo compartiendo una sola sesión.
+# Devuelve (datos por ciudad, error por ciudad); nunca imprime.
+def get_data_meteo_api_many(
+    cities: Dict[str, Dict[str, float]],
+    start_date: str,
+    end_date: str,
+    max_workers: int = MAX_WORKERS,
+    session: Optional[requests.Session] = None,
+    cache: Optional[MeteoCache] = None,
+    variables: Sequence[str] = VARIABLES,
+    timezone: str = TIMEZONE,
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+
+    results: Dict[str, Dict[str, Any]] = {}
+    errors: Dict[str, str] = {}
+    if not cities:
+        return results, errors
+
+    own_session = session is None
+    http = make_session(max_workers) if own_session else session
+    try:
+        # El número de hilos limita las peticiones en vuelo
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(cities))) as pool:
+            futures = {
+                name: pool.submit(
+                    fetch_daily_cached,
+                    coords,
+                    start_date,
+                    end_date,
+                    http,
+                    cache,
+                    variables,
+                    timezone,
+                )
+                for name, coords in cities.items()
+            }
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except MeteoAPIError as e:
+                    errors[name] = str(e)
+    finally:
+        if own_session:
+            http.close()
+    return results, errors
+
+
+def _loads(payload: Union[bytes, str]) -> Any:
+    return orjson.loads(payload) if orjson is not None else json.loads(payload)
+
+
+# Convierte una lista JSON a float64 (null -> NaN) sin aceptar cadenas ni bools
+def _numeric_column(values: Any, variable: str) -> np.ndarray:
+    raw = np.asarray(values)
+    if raw.dtype == object:
+        nulls = np.equal(raw, None)
+        raw = raw.copy()
+        raw[nulls] = np.nan
+        raw = np.asarray(raw.tolist())
+    if raw.ndim != 1 or raw.dtype.kind not in "iuf":
+        raise MeteoAPIError(f"Column {variable} is not a numeric array.")
+    return raw.astype(np.float64, copy=False)
+
+
+# Decodificación columnar: JSON (bytes, str o dict ya parseado) -> arrays NumPy
+# con comprobaciones vectorizadas en lugar de jsonschema elemento a elemento.
+def decode_daily(
+    payload: Union[bytes, str, Dict[str, Any]],
+    variables: Sequence[str] = VARIABLES,
+    nan_policy: str = "allow",
+    dtype: Any = np.float32,
+) -> pd.DataFrame:
+    if nan_policy not in NAN_POLICIES:
+        raise ValueError(f"nan_policy must be one of {NAN_POLICIES}")
+    data = payload if isinstance(payload, dict) else _loads(payload)
+    daily = data.get("daily", data) if isinstance(data, dict) else None
+    if not isinstance(daily, dict):
+        raise MeteoAPIError("No daily data found in the response.")
+
+    missing = [key for key in ("time", *variables) if key not in daily]
+    if missing:
+        raise MeteoAPIError(f"Missing daily variables: {missing}")
+    n_days = len(daily["time"])
+    if n_days == 0:
+        raise MeteoAPIError("Empty daily time axis.")
+
+    values = np.empty((n_days, len(variables)), dtype=dtype)
+    for i, variable in enumerate(variables):
+        column = _numeric_column(daily[variable], variable)
+        if len(column) != n_days:
+            raise MeteoAPIError(
+                f"Column {variable} has {len(column)} values for {n_days} days."
+            )
+        values[:, i] = column
+
+    index = pd.DatetimeIndex(pd.to_datetime(daily["time"], format="ISO8601"))
+    index.name = "Date"
     df = pd.DataFrame(
-        {
-            "Date": pd.to_datetime(daily_data["time"]),
-            "Temperature (°C)": daily_data["temperature_2m_mean"],
-            "Precipitation (mm)": daily_data["precipitation_sum"],
-            "Wind Speed (m/s)": daily_data["wind_speed_10m_max"],
-        }
+        values,
+        index=index,
+        columns=[COLUMN_LABELS.get(variable, variable) for variable in variables],
     )
 
-    df.set_index("Date", inplace=True)
-
+    if nan_policy != "allow":
+        nan_rows = np.isnan(values).any(axis=1)
+        if nan_rows.any():
+            if nan_policy == "raise":
+                raise MeteoAPIError(f"{int(nan_rows.sum())} days contain NaN values.")
+            df = df[~nan_rows]
     return df
 
 
+def fetch_chunk_frame(
+    city: Dict[str, float],
+    start_date: str,
+    end_date: str,
+    session: Optional[requests.Session],
+    variables: Sequence[str],
+    nan_policy: str,
+    timezone: str = TIMEZONE,
+) -> pd.DataFrame:
+    params = _meteo_params(city, start_date, end_date, variables, timezone)
+    try:
+        content = request_with_retry(API_URL, params, session).content
+        df = decode_daily(content, variables, nan_policy)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        raise MeteoAPIError(f"Error in the API request: {e}") from e
+    return df.loc[start_date:end_date]
+
+
+# Función para procesar los datos
+@instrument()
+def data_process(
+    daily_data: Dict[str, Any], variables: Sequence[str] = VARIABLES
+) -> pd.DataFrame:
+    return decode_daily(daily_data, variables, dtype=np.float64)
+
+
 # Función para graficar los datos
 def data_plot(daily_data: Dict[str, Any], city_name: str, ax: plt.Axes) -> None:
     df = data_process(daily_data)  # Procesar datos para cada ciudad
     df_monthly = df.resample("ME").mean()  # Agrupar por mes 
+    plot_monthly(df_monthly, city_name, ax)
+
+
+# Dibuja medias mensuales ya calculadas (sirve igual para pyplot o headless)
+def plot_monthly(df_monthly: pd.DataFrame, city_name: str, ax: plt.Axes) -> None:
     # Asegúrate de que df_monthly no esté vacío
     if df_monthly.empty:
         print(f"No hay datos mensuales para graficar {city_name}.")
@@ -147,22 +475,39 @@ COORDINATES: Dict[str, Dict[str, float]] = {
 }
 
 
-def main() -> None:
+def main(
+    headless: bool = False, output_dir: str = "figures", fmt: str = "png"
+) -> None:
     start_date = "2010-01-01"
     end_date = "2020-12-31"
 
+    print(f"Obteniendo datos de {len(COORDINATES)} ciudades...")
+    with MeteoCache() as cache:
+        results, errors = get_data_meteo_api_many(
+            COORDINATES, start_date, end_date, cache=cache
+        )
+
+    if headless:
+        # Import local: meteo_render depende de este módulo
+        from src.module_1.meteo_render import monthly_means, render_cities
+
+        for city_name, error in errors.items():
+            print(f"Error al obtener los datos de {city_name}: {error}")
+        paths, report = render_cities(
+            monthly_means(results), output_dir, fmt=fmt, combined=True
+        )
+        print(f"Figuras guardadas en {output_dir}: {len(paths)}, informe: {report}")
+        return
+
     # Crear la figura y los ejes para los subgráficos
     figures, axs = plt.subplots(
         len(COORDINATES), 1, figsize=(12, 5 * len(COORDINATES)), sharex=True
     )
-    for ax, (city_name, city_coords) in zip(axs, COORDINATES.items()):
-        print(f"Obteniendo datos de {city_name}...")
-        daily_data = get_data_meteo_api(city_coords, start_date, end_date)
-
-        if daily_data:
-            data_plot(daily_data, city_name, ax)
+    for ax, city_name in zip(axs, COORDINATES):
+        if city_name in results:
+            data_plot(results[city_name], city_name, ax)
         else:
-            print(f"Error al obtener los datos de {city_name}")
+            print(f"Error al obtener los datos de {city_name}: {errors[city_name]}")
 
     plt.subplots_adjust(hspace=0.4)  # Ajustar el espacio entre subgráficas
     plt.tight_layout()
@@ -170,4 +515,11 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Monthly weather plots")
+    parser.add_argument("--headless", action="store_true", help="write files")
+    parser.add_argument("--output-dir", default="figures")
+    parser.add_argument("--format", choices=["png", "svg"], default="png")
+    args = parser.parse_args()
+    main(headless=args.headless, output_dir=args.output_dir, fmt=args.format)
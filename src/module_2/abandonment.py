@@ -0,0 +1,130 @@
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Sequence
+
+from src.instrumentation import instrument
+
+# Abandonment rates per user segment over trailing windows. Carts are joined
+# to users through integer codes (no merge) and counted once at the finest
+# grain (day x every segment column). Each segment column is then pivoted to a
+# day x segment matrix over the full date range, and every window is one
+# rolling sum over that matrix: a row covers the window days ending on
+# period_end (fewer at the start of the data, see period_start).
+logger = logging.getLogger(__name__)
+
+SEGMENTS = ("user_segment", "user_nuts1", "regular")
+WINDOWS = {"daily": 1, "weekly": 7, "monthly": 30}  # trailing days
+UNKNOWN = "unknown"
+RESULT_COLUMNS = [
+    "window",
+    "period_start",
+    "period_end",
+    "segment_column",
+    "segment",
+    "carts",
+    "users",
+    "rate",
+]
+
+
+def user_segments(
+    users: pd.DataFrame,
+    regulars: pd.DataFrame,
+    segments: Sequence[str] = SEGMENTS,
+) -> pd.DataFrame:
+    # One row per user with categorical segment columns
+    out = pd.DataFrame(index=pd.Index(users["user_id"].astype(str), name="user_id"))
+    for segment in segments:
+        if segment == "regular":
+            is_regular = users["user_id"].isin(regulars["user_id"].unique())
+            values = np.where(is_regular, "Regular", "Non-Regular")
+        else:
+            values = users[segment].astype("string").fillna(UNKNOWN).to_numpy()
+        out[segment] = pd.Categorical(values)
+    return out
+
+
+def _cart_cube(
+    abandoned_cart: pd.DataFrame, segments_by_user: pd.DataFrame
+) -> pd.DataFrame:
+    # carts per (day, segment...) in a single grouped pass
+    user_codes = segments_by_user.index.get_indexer(
+        abandoned_cart["user_id"].astype(str)
+    )
+    known = user_codes >= 0
+    if not known.all():
+        logger.warning(f"{(~known).sum()} carts belong to users missing from users")
+
+    columns: Dict[str, pd.Series] = {
+        "day": pd.to_datetime(abandoned_cart["created_at"]).dt.floor("D")
+    }
+    for segment in segments_by_user.columns:
+        categorical = segments_by_user[segment].array
+        categories = categorical.categories.append(pd.Index([UNKNOWN])).unique()
+        codes = np.where(known, categorical.codes[user_codes], -1)
+        codes = np.where(codes >= 0, codes, categories.get_loc(UNKNOWN))
+        columns[segment] = pd.Categorical.from_codes(codes, categories=categories)
+    frame = pd.DataFrame(columns)
+    counts = frame.groupby(list(columns), observed=True).size()
+    return counts.rename("carts").reset_index()
+
+
+def _trailing_sums(daily: pd.DataFrame, days: int) -> pd.DataFrame:
+    # day x segment carts -> carts in the trailing window ending on each day
+    return daily.rolling(days, min_periods=1).sum().astype("int64")
+
+
+@instrument()
+def abandonment_rates(
+    abandoned_cart: pd.DataFrame,
+    users: pd.DataFrame,
+    regulars: pd.DataFrame,
+    segments: Sequence[str] = SEGMENTS,
+    windows: Sequence[str] = tuple(WINDOWS),
+) -> pd.DataFrame:
+    unknown_windows = set(windows) - set(WINDOWS)
+    if unknown_windows:
+        raise ValueError(f"Unknown windows: {sorted(unknown_windows)}")
+
+    segments_by_user = user_segments(users, regulars, segments)
+    cube = _cart_cube(abandoned_cart, segments_by_user)
+    user_counts = {
+        segment: segments_by_user[segment].value_counts() for segment in segments
+    }
+
+    if cube.empty:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    all_days = pd.date_range(cube["day"].min(), cube["day"].max(), freq="D")
+    # day x segment value matrices, with a zero row for days without carts
+    matrices = {"all": cube.groupby("day")["carts"].sum().to_frame("all")}
+    for segment in segments:
+        matrices[segment] = cube.pivot_table(
+            index="day", columns=segment, values="carts", aggfunc="sum", observed=True
+        )
+    matrices = {
+        column: matrix.reindex(all_days, fill_value=0).fillna(0)
+        for column, matrix in matrices.items()
+    }
+
+    frames: List[pd.DataFrame] = []
+    for window in windows:
+        days = WINDOWS[window]
+        for column, matrix in matrices.items():
+            sums = _trailing_sums(matrix, days)
+            long = sums.rename_axis(index="period_end", columns="segment").stack()
+            counts = long.rename("carts").reset_index()
+            counts["segment"] = counts["segment"].astype(str)
+            if column == "all":
+                counts["users"] = len(segments_by_user)
+            else:
+                counts["users"] = (
+                    counts["segment"].map(user_counts[column]).fillna(0)
+                ).astype("int64")
+            start = counts["period_end"] - pd.Timedelta(days=days - 1)
+            counts["period_start"] = start.clip(lower=all_days[0])
+            frames.append(counts.assign(window=window, segment_column=column))
+
+    result = pd.concat(frames, ignore_index=True)
+    result["rate"] = result["carts"] / result["users"].where(result["users"] > 0)
+    return result[RESULT_COLUMNS]
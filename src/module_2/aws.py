@@ -0,0 +1,47 @@
+import os
+import logging
+from functools import lru_cache
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+BUCKET_NAME = "zrive-ds-data"
+
+
+def load_credentials(env_file: str = "keys.env") -> None:
+    env_file_path = os.path.join(os.getcwd(), env_file)
+    env_exists = os.path.isfile(env_file_path)
+    logger.info(f"Does the {env_file} file exist? {env_exists}")
+
+    if env_exists:
+        from dotenv import load_dotenv
+
+        load_dotenv(env_file_path)
+    else:
+        logger.warning(f"The {env_file} file was not found.")
+
+    if (
+        os.getenv("AWS_ACCESS_KEY_ID") is None
+        or os.getenv("AWS_SECRET_ACCESS_KEY") is None
+    ):
+        raise ValueError(
+            "AWS environment variables did not load correctly. Check the keys.env file."
+        )
+
+
+# The client is only created on first use, so importing the EDA modules
+# never reads keys.env or touches the network.
+@lru_cache(maxsize=None)
+def get_s3_client() -> Any:
+    import boto3
+
+    load_credentials()
+    try:
+        session = boto3.Session(
+            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+        )
+        return session.client("s3")
+    except Exception as e:
+        logger.critical(f"Failed to create AWS session: {e}")
+        raise
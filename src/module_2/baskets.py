@@ -0,0 +1,192 @@
+import os
+import json
+import logging
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import Dict, Optional, Sequence, Tuple
+
+# Flat, CSR-style representation of the basket list columns (orders.item_ids /
+# ordered_items, abandoned_cart.variant_id). Basket i owns
+# items[offsets[i]:offsets[i + 1]]; the inverted index maps each distinct item
+# to the rows that contain it, so basket questions become array operations.
+logger = logging.getLogger(__name__)
+
+LIST_COLUMNS = ("item_ids", "ordered_items", "variant_id")
+_ARRAYS = ("order_ids", "offsets", "items", "item_ids", "item_offsets", "item_rows")
+MISSING = -1
+
+
+def find_list_column(df: pd.DataFrame) -> Optional[str]:
+    for column in LIST_COLUMNS:
+        if column in df.columns and df[column].dtype == object:
+            return column
+    return None
+
+
+def list_offsets(series: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    # (offsets, flat int64 values) of a list column, without a Python loop
+    array = pa.array(series, from_pandas=True, type=pa.list_(pa.int64()))
+    offsets = np.asarray(array.offsets, dtype=np.int64)
+    values = array.values.slice(offsets[0], offsets[-1] - offsets[0])
+    items = values.to_numpy(zero_copy_only=False).astype(np.int64, copy=False)
+    return offsets - offsets[0], items
+
+
+def list_lengths(series: pd.Series) -> np.ndarray:
+    return np.diff(list_offsets(series)[0])
+
+
+def lookup_codes(sorted_keys: np.ndarray, values: np.ndarray) -> np.ndarray:
+    # Position of each value in sorted_keys, MISSING when it is not there
+    values = np.asarray(values, dtype=np.int64)
+    if len(sorted_keys) == 0:
+        return np.full(len(values), MISSING, dtype=np.int64)
+    pos = np.searchsorted(sorted_keys, values).clip(0, len(sorted_keys) - 1)
+    return np.where(sorted_keys[pos] == values, pos, MISSING)
+
+
+def _gather_ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    # Concatenation of arange(start, start + length) for every pair
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    shift = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return np.arange(total, dtype=np.int64) + shift
+
+
+class BasketIndex:
+    def __init__(self, arrays: Dict[str, np.ndarray]) -> None:
+        self.order_ids = arrays["order_ids"]
+        self.offsets = arrays["offsets"]
+        self.items = arrays["items"]
+        self.item_ids = arrays["item_ids"]
+        self.item_offsets = arrays["item_offsets"]
+        self.item_rows = arrays["item_rows"]
+
+    @classmethod
+    def from_frame(
+        cls,
+        df: pd.DataFrame,
+        list_column: Optional[str] = None,
+        id_column: str = "id",
+    ) -> "BasketIndex":
+        list_column = list_column or find_list_column(df)
+        if list_column is None:
+            raise KeyError(f"None of {LIST_COLUMNS} is a list column")
+        offsets, items = list_offsets(df[list_column])
+        sizes = np.diff(offsets)
+        rows = np.repeat(np.arange(len(df), dtype=np.int64), sizes)
+
+        order = np.argsort(items, kind="stable")
+        item_ids, starts = np.unique(items[order], return_index=True)
+        return cls(
+            {
+                "order_ids": df[id_column].to_numpy(dtype=np.int64),
+                "offsets": offsets,
+                "items": items,
+                "item_ids": item_ids,
+                "item_offsets": np.append(starts, len(items)).astype(np.int64),
+                "item_rows": rows[order],
+            }
+        )
+
+    def __len__(self) -> int:
+        return len(self.order_ids)
+
+    def basket_sizes(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def item_rows_per_position(self) -> np.ndarray:
+        return np.repeat(np.arange(len(self), dtype=np.int64), self.basket_sizes())
+
+    def item_frequency(self) -> pd.Series:
+        return pd.Series(
+            np.diff(self.item_offsets), index=pd.Index(self.item_ids, name="item_id")
+        ).sort_values(ascending=False)
+
+    def rows_with(self, item_id: int) -> np.ndarray:
+        i = np.searchsorted(self.item_ids, item_id)
+        if i == len(self.item_ids) or self.item_ids[i] != item_id:
+            return np.empty(0, dtype=np.int64)
+        return self.item_rows[self.item_offsets[i] : self.item_offsets[i + 1]]
+
+    def orders_with(self, item_id: int) -> np.ndarray:
+        return self.order_ids[np.unique(self.rows_with(item_id))]
+
+    def co_occurrence(self, item_id: int, top: Optional[int] = None) -> pd.Series:
+        # How many baskets containing item_id also contain each other item
+        rows = np.unique(self.rows_with(item_id))
+        positions = _gather_ranges(self.offsets[rows], self.basket_sizes()[rows])
+        other = self.items[positions]
+        # one count per basket even if an item is repeated inside it
+        pairs = np.unique(
+            np.stack([np.repeat(rows, self.basket_sizes()[rows]), other]), axis=1
+        )
+        ids, counts = np.unique(pairs[1][pairs[1] != item_id], return_counts=True)
+        result = pd.Series(counts, index=pd.Index(ids, name="item_id"), name="count")
+        result = result.sort_values(ascending=False, kind="stable")
+        return result if top is None else result.head(top)
+
+    def join(self, dimension: pd.DataFrame, key: str = "variant_id") -> pd.DataFrame:
+        # Item-level frame (one row per basket position) with dimension columns
+        # gathered through searchsorted instead of a merge on exploded lists.
+        dimension = dimension.drop_duplicates(key).sort_values(key)
+        if dimension.empty:
+            raise ValueError("The dimension table is empty")
+        codes = lookup_codes(dimension[key].to_numpy(dtype=np.int64), self.items)
+        found = codes != MISSING
+        rows = self.item_rows_per_position()
+        out = pd.DataFrame({"order_id": self.order_ids[rows], "item_id": self.items})
+        for column in dimension.columns.drop(key):
+            values = dimension[column].to_numpy()[np.where(found, codes, 0)]
+            out[column] = pd.Series(values).where(found)
+        out["in_dimension"] = found
+        return out
+
+    def save(self, path: str) -> None:
+        os.makedirs(path, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"orders": len(self), "items": int(len(self.items))}, f)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "BasketIndex":
+        mode = "r" if mmap else None
+        return cls(
+            {
+                name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)
+                for name in _ARRAYS
+            }
+        )
+
+
+def basket_index_path(parquet_path: str) -> str:
+    return os.path.splitext(parquet_path)[0] + ".baskets"
+
+
+# Loads the persisted index next to the parquet file, building it when it is
+# missing or older than the parquet file
+def get_basket_index(
+    parquet_path: str,
+    list_column: Optional[str] = None,
+    id_column: str = "id",
+) -> BasketIndex:
+    path = basket_index_path(parquet_path)
+    meta = os.path.join(path, "meta.json")
+    if os.path.isfile(meta) and os.path.getmtime(meta) >= os.path.getmtime(
+        parquet_path
+    ):
+        return BasketIndex.load(path)
+
+    columns: Sequence[str] = [id_column] + ([list_column] if list_column else [])
+    if list_column is None:
+        names = pq.read_schema(parquet_path).names
+        columns = [id_column] + [c for c in LIST_COLUMNS if c in names][:1]
+    df = pd.read_parquet(parquet_path, columns=list(columns))
+    index = BasketIndex.from_frame(df, list_column, id_column)
+    index.save(path)
+    logger.info(f"Built basket index for {parquet_path} at {path}")
+    return index
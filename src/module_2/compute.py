@@ -0,0 +1,387 @@
+import os
+import copy
+import logging
+import numpy as np
+import pandas as pd
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+# Compute backends for the eda2 group-by-outcome aggregations. The analyses
+# only ask for small results (counts, box statistics, histogram bins), so the
+# feature frame can be scanned out of core: the arrow backend streams record
+# batches from the Parquet cache or the CSV and merges per-batch partials,
+# DuckDB (optional) runs the same aggregations as SQL over the files, and the
+# pandas backend serves a frame that is already in memory.
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500_000
+SEED = 0
+QUANTILE_BINS = 4096  # box statistics are exact up to (max - min) / QUANTILE_BINS
+WHIS = 1.5
+BOX_COLUMNS = ["count", "min", "whislo", "q1", "med", "q3", "whishi", "max"]
+
+
+def _quantiles_from_histogram(
+    counts: np.ndarray, edges: np.ndarray, qs: Sequence[float]
+) -> np.ndarray:
+    # Linear interpolation inside the bin that holds each quantile
+    cumulative = np.concatenate([[0], np.cumsum(counts)]).astype(np.float64)
+    targets = np.asarray(qs, dtype=np.float64) * cumulative[-1]
+    bins = np.clip(np.searchsorted(cumulative, targets, side="left") - 1, 0, None)
+    bins = np.minimum(bins, len(counts) - 1)
+    inside = np.divide(
+        targets - cumulative[bins],
+        counts[bins],
+        out=np.zeros(len(bins)),
+        where=counts[bins] > 0,
+    )
+    return edges[bins] + inside * (edges[bins + 1] - edges[bins])
+
+
+def _box_from_histogram(
+    counts: np.ndarray, edges: np.ndarray, low: float, high: float
+) -> Dict[str, float]:
+    q1, med, q3 = _quantiles_from_histogram(counts, edges, [0.25, 0.5, 0.75])
+    top, bottom = q3 + WHIS * (q3 - q1), q1 - WHIS * (q3 - q1)
+    nonempty = np.flatnonzero(counts)
+    # whiskers end in the last data bin inside the fences, within one bin width
+    upper = nonempty[edges[nonempty] <= top]
+    lower = nonempty[edges[nonempty + 1] >= bottom]
+    whishi = min(top, edges[upper[-1] + 1]) if len(upper) else q3
+    whislo = max(bottom, edges[lower[0]]) if len(lower) else q1
+    return {
+        "count": int(counts.sum()),
+        "min": low,
+        "whislo": float(max(whislo, low)),
+        "q1": float(q1),
+        "med": float(med),
+        "q3": float(q3),
+        "whishi": float(min(whishi, high)),
+        "max": high,
+    }
+
+
+class ComputeBackend(ABC):
+    name = "base"
+
+    def __init__(self, fill_values: Optional[Dict[str, float]] = None) -> None:
+        self.fill_values = fill_values or {}
+        self.sample_fraction: Optional[float] = None
+        self.seed = SEED
+
+    @abstractmethod
+    def columns(self) -> List[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def num_rows(self) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _batches(self, columns: Sequence[str]) -> Iterator[pd.DataFrame]:
+        raise NotImplementedError
+
+    # Same backend over a Bernoulli sample of the rows. The generator is
+    # re-seeded on every scan, so multi-pass aggregations see the same sample.
+    def sampled(self, fraction: float, seed: int = SEED) -> "ComputeBackend":
+        if not 0 < fraction <= 1:
+            raise ValueError("fraction must be in (0, 1]")
+        backend = copy.copy(self)
+        backend.sample_fraction = fraction if fraction < 1 else None
+        backend.seed = seed
+        return backend
+
+    def _frames(self, columns: Sequence[str]) -> Iterator[pd.DataFrame]:
+        fill = {c: v for c, v in self.fill_values.items() if c in columns}
+        rng = np.random.default_rng(self.seed)
+        for batch in self._batches(columns):
+            if self.sample_fraction is not None:
+                batch = batch[rng.random(len(batch)) < self.sample_fraction]
+            yield batch.fillna(fill) if fill else batch
+
+    def counts(self, by: Sequence[str]) -> pd.DataFrame:
+        by = list(by)
+        total: Optional[pd.Series] = None
+        for frame in self._frames(by):
+            part = frame.groupby(by, observed=True).size()
+            total = part if total is None else total.add(part, fill_value=0)
+        if total is None:
+            return pd.DataFrame(columns=by + ["count"])
+        return total.astype("int64").rename("count").sort_index().reset_index()
+
+    def _group_min_max(self, column: str, by: List[str]) -> pd.DataFrame:
+        parts = []
+        for frame in self._frames([column, *by]):
+            keys = by or np.zeros(len(frame), dtype=np.int8)  # one group
+            parts.append(frame.groupby(keys, observed=True)[column].agg(["min", "max"]))
+        if not parts:
+            return pd.DataFrame(columns=["min", "max"])
+        stacked = pd.concat(parts)
+        grouped = stacked.groupby(level=list(np.arange(stacked.index.nlevels)))
+        return pd.DataFrame({"min": grouped["min"].min(), "max": grouped["max"].max()})
+
+    def _group_histograms(
+        self, column: str, by: List[str], edges: np.ndarray
+    ) -> Dict[Tuple, np.ndarray]:
+        histograms: Dict[Tuple, np.ndarray] = {}
+        for frame in self._frames([column, *by]):
+            frame = frame.dropna(subset=[column])
+            groups = frame.groupby(by, observed=True) if by else [((), frame)]
+            for key, group in groups:
+                key = key if isinstance(key, tuple) else (key,)
+                counts, _ = np.histogram(group[column].to_numpy(np.float64), edges)
+                histograms[key] = histograms.get(key, 0) + counts
+        return histograms
+
+    def histogram(
+        self,
+        column: str,
+        bins: int = 50,
+        range: Optional[Tuple[float, float]] = None,
+        by: Sequence[str] = (),
+    ) -> pd.DataFrame:
+        by = list(by)
+        if range is None:
+            bounds = self._group_min_max(column, [])
+            range = (float(bounds["min"].iloc[0]), float(bounds["max"].iloc[0]))
+        edges = np.linspace(range[0], range[1], bins + 1)
+        histograms = self._group_histograms(column, by, edges)
+        rows = [
+            {**dict(zip(by, key)), "left": left, "right": right, "count": int(n)}
+            for key, counts in sorted(histograms.items())
+            for left, right, n in zip(edges[:-1], edges[1:], counts)
+        ]
+        return pd.DataFrame(rows, columns=by + ["left", "right", "count"])
+
+    # Boxplot statistics per group from a fine fixed-bin histogram: two passes
+    # (bounds, then counts), constant memory per group
+    def box_stats(self, column: str, by: Sequence[str] = ("outcome",)) -> pd.DataFrame:
+        by = list(by)
+        bounds = self._group_min_max(column, by)
+        if bounds.empty:
+            return pd.DataFrame(columns=by + BOX_COLUMNS)
+        edges = np.linspace(bounds["min"].min(), bounds["max"].max(), QUANTILE_BINS + 1)
+        if edges[-1] == edges[0]:
+            edges = edges[0] + np.arange(QUANTILE_BINS + 1, dtype=np.float64)
+        histograms = self._group_histograms(column, by, edges)
+        rows = []
+        for key, counts in sorted(histograms.items()):
+            label = key if len(key) > 1 else key[0] if key else 0
+            group = bounds.loc[label]
+            box = _box_from_histogram(
+                counts, edges, float(group["min"]), float(group["max"])
+            )
+            rows.append({**dict(zip(by, key)), **box})
+        return pd.DataFrame(rows, columns=by + BOX_COLUMNS)
+
+
+class PandasBackend(ComputeBackend):
+    name = "pandas"
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        fill_values: Optional[Dict[str, float]] = None,
+        batch_size: int = BATCH_SIZE,
+    ) -> None:
+        super().__init__(fill_values)
+        self.df = df
+        self.batch_size = batch_size
+
+    def columns(self) -> List[str]:
+        return list(self.df.columns)
+
+    def num_rows(self) -> int:
+        return len(self.df)
+
+    def _batches(self, columns: Sequence[str]) -> Iterator[pd.DataFrame]:
+        for start in np.arange(0, len(self.df), self.batch_size):
+            yield self.df.iloc[start : start + self.batch_size][list(columns)]
+
+
+def _source_format(source: str) -> str:
+    return "csv" if source.endswith(".csv") else "parquet"
+
+
+# SQL string literal, so paths with quotes cannot break out of the query
+def _sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+class ArrowBackend(ComputeBackend):
+    name = "arrow"
+
+    def __init__(
+        self,
+        source: str,
+        fill_values: Optional[Dict[str, float]] = None,
+        batch_size: int = BATCH_SIZE,
+    ) -> None:
+        import pyarrow.dataset as ds
+
+        super().__init__(fill_values)
+        # files starting with "_" or "." (such as _meta.json) are ignored
+        self.dataset = ds.dataset(source, format=_source_format(source))
+        self.batch_size = batch_size
+
+    def columns(self) -> List[str]:
+        return list(self.dataset.schema.names)
+
+    def num_rows(self) -> int:
+        return self.dataset.count_rows()
+
+    def _batches(self, columns: Sequence[str]) -> Iterator[pd.DataFrame]:
+        for batch in self.dataset.to_batches(
+            columns=list(columns), batch_size=self.batch_size
+        ):
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+
+class DuckDBBackend(ComputeBackend):
+    name = "duckdb"
+
+    def __init__(
+        self, source: str, fill_values: Optional[Dict[str, float]] = None
+    ) -> None:
+        import duckdb
+
+        super().__init__(fill_values)
+        self.connection = duckdb.connect()
+        if _source_format(source) == "csv":
+            self.source = f"read_csv_auto({_sql_string(source)})"
+        elif os.path.isdir(source):
+            pattern = os.path.join(source, "*.parquet")
+            self.source = f"read_parquet({_sql_string(pattern)})"
+        else:
+            self.source = f"read_parquet({_sql_string(source)})"
+        # the SQL aggregations read self.table, which sampled() replaces
+        self.table = self.source
+
+    def columns(self) -> List[str]:
+        return list(self._query(f"SELECT * FROM {self.table} LIMIT 0").columns)
+
+    def num_rows(self) -> int:
+        return int(self._query(f"SELECT count(*) FROM {self.table}").iloc[0, 0])
+
+    # Unsampled batches: ComputeBackend._frames applies the row sample itself
+    def _batches(self, columns: Sequence[str]) -> Iterator[pd.DataFrame]:
+        names = ", ".join(f'"{c}"' for c in columns)
+        result = self.connection.execute(f"SELECT {names} FROM {self.source}")
+        # chunks are counted in DuckDB vectors of 2048 rows
+        batch = result.fetch_df_chunk(BATCH_SIZE // 2048)
+        while not batch.empty:
+            yield batch
+            batch = result.fetch_df_chunk(BATCH_SIZE // 2048)
+
+    def sampled(self, fraction: float, seed: int = SEED) -> "ComputeBackend":
+        backend = super().sampled(fraction, seed)
+        backend.table = self.source
+        if backend.sample_fraction is not None:
+            backend.table = (
+                f"(SELECT * FROM {self.source} "
+                f"USING SAMPLE {100 * fraction!r}% (bernoulli, {seed}))"
+            )
+        return backend
+
+    def _value(self, column: str) -> str:
+        if column in self.fill_values:
+            return f'coalesce("{column}", {float(self.fill_values[column])!r})'
+        return f'"{column}"'
+
+    def _query(self, sql: str) -> pd.DataFrame:
+        return self.connection.execute(sql).fetchdf()
+
+    def counts(self, by: Sequence[str]) -> pd.DataFrame:
+        keys = "".join(self._value(c) + f' AS "{c}", ' for c in by)
+        valid = " AND ".join([self._value(c) + " IS NOT NULL" for c in by] or ["TRUE"])
+        return self._query(
+            f"SELECT {keys}count(*) AS count FROM {self.table} "
+            f"WHERE {valid} GROUP BY ALL ORDER BY ALL"
+        )
+
+    def histogram(
+        self,
+        column: str,
+        bins: int = 50,
+        range: Optional[Tuple[float, float]] = None,
+        by: Sequence[str] = (),
+    ) -> pd.DataFrame:
+        value = self._value(column)
+        if range is None:
+            bounds = self._query(f"SELECT min({value}), max({value}) FROM {self.table}")
+            range = (float(bounds.iloc[0, 0]), float(bounds.iloc[0, 1]))
+        width = (range[1] - range[0]) / bins or 1.0
+        keys = "".join(f'"{c}", ' for c in by)
+        counts = self._query(
+            f"SELECT {keys}least(floor(({value} - {range[0]!r}) / {width!r}), "
+            f"{bins - 1})::INTEGER AS bin, count(*) AS count FROM {self.table} "
+            f"WHERE {value} BETWEEN {range[0]!r} AND {range[1]!r} "
+            f"GROUP BY ALL ORDER BY ALL"
+        )
+        edges = np.linspace(range[0], range[1], bins + 1)
+        groups = counts.groupby(list(by)) if by else [((), counts)]
+        rows = []
+        for key, group in groups:
+            key = key if isinstance(key, tuple) else (key,)
+            full = np.zeros(bins, dtype=np.int64)
+            full[group["bin"].to_numpy()] = group["count"].to_numpy()
+            rows.extend(
+                {**dict(zip(by, key)), "left": left, "right": right, "count": int(n)}
+                for left, right, n in zip(edges[:-1], edges[1:], full)
+            )
+        return pd.DataFrame(rows, columns=list(by) + ["left", "right", "count"])
+
+    def box_stats(self, column: str, by: Sequence[str] = ("outcome",)) -> pd.DataFrame:
+        value = self._value(column)
+        keys = "".join(f'"{c}", ' for c in by)
+        # without groups q has a single row and every data row joins it
+        join = "USING ({})".format(", ".join(f'"{c}"' for c in by)) if by else "ON TRUE"
+        return self._query(
+            f"""
+            WITH data AS (
+                SELECT {keys}{value} AS v FROM {self.table} WHERE {value} IS NOT NULL
+            ), q AS (
+                SELECT {keys}count(*) AS count, min(v) AS min, max(v) AS max,
+                    quantile_cont(v, 0.25) AS q1, quantile_cont(v, 0.5) AS med,
+                    quantile_cont(v, 0.75) AS q3
+                FROM data GROUP BY ALL
+            )
+            SELECT {"".join(f'q."{c}", ' for c in by)}q.count, q.min,
+                min(d.v) FILTER (WHERE d.v >= q.q1 - {WHIS} * (q.q3 - q.q1)) AS whislo,
+                q.q1, q.med, q.q3,
+                max(d.v) FILTER (WHERE d.v <= q.q3 + {WHIS} * (q.q3 - q.q1)) AS whishi,
+                q.max
+            FROM q JOIN data d {join}
+            GROUP BY ALL ORDER BY ALL
+            """
+        )
+
+
+BACKENDS = {
+    "duckdb": DuckDBBackend,
+    "arrow": ArrowBackend,
+}
+
+
+# "auto" prefers DuckDB when it is installed and falls back to pyarrow
+def get_backend(
+    source: str,
+    engine: str = "auto",
+    fill_values: Optional[Dict[str, float]] = None,
+) -> ComputeBackend:
+    if engine == "auto":
+        try:
+            import duckdb  # noqa: F401
+
+            engine = "duckdb"
+        except ImportError:
+            engine = "arrow"
+    if engine not in BACKENDS:
+        raise ValueError(f"engine must be one of {['auto', *BACKENDS]}")
+    logger.info(f"Using the {engine} compute backend over {source}")
+    return BACKENDS[engine](source, fill_values=fill_values)
+
+
+def as_backend(data: Union[pd.DataFrame, ComputeBackend]) -> ComputeBackend:
+    return data if isinstance(data, ComputeBackend) else PandasBackend(data)
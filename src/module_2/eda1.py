@@ -1,57 +1,24 @@
 import os
+import sys
 import logging
-import boto3
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from typing import Tuple
-from dotenv import load_dotenv
-
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
-logger = logging.getLogger()
-
-current_directory = os.getcwd()
-env_file_path = os.path.join(current_directory, "keys.env")
-env_exists = os.path.isfile(env_file_path)
-
-logger.info(f"Does the keys.env file exist? {env_exists}")
-
-if env_exists:
-    load_dotenv(env_file_path)
-else:
-    logger.warning("The keys.env file was not found.")
-
-aws_access_key = os.getenv("AWS_ACCESS_KEY_ID")
-aws_secret_key = os.getenv("AWS_SECRET_ACCESS_KEY")
-
-if aws_access_key is None or aws_secret_key is None:
-    raise ValueError(
-        "AWS environment variables did not load correctly. Check the keys.env file."
-    )
-
-try:
-    session = boto3.Session(
-        aws_access_key_id=aws_access_key,
-        aws_secret_access_key=aws_secret_key,
-    )
-    s3 = session.client("s3")
-except Exception as e:
-    logger.critical(f"Failed to create AWS session: {e}")
-    exit(1)
-
-
-def download_s3_file(bucket_name: str, s3_key: str, local_path: str) -> None:
-    try:
-        s3.download_file(bucket_name, s3_key, local_path)
-        logger.info(f"Downloaded {s3_key} to {local_path}")
-    except Exception as e:
-        logger.error(f"Error downloading {s3_key}: {e}")
-        raise
-
-
-bucket_name = "zrive-ds-data"
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from src.instrumentation import instrument
+from src.module_2.abandonment import abandonment_rates
+from src.module_2.aws import BUCKET_NAME
+from src.module_2.baskets import BasketIndex, find_list_column, list_lengths
+from src.module_2.incremental import refresh
+from src.module_2.items import ItemDimension
+from src.module_2.loader import DatasetLoader, Filters, date_filter
+from src.module_2.profiling import profile_datasets, report_frame
+from src.module_2.s3_sync import FAILED, sync_objects
+
+# Importing this module is side-effect free: the S3 client, the datasets and
+# the plotting libraries are only loaded when a function needs them.
+logger = logging.getLogger(__name__)
+
+bucket_name = BUCKET_NAME
 datasets = {
     "orders": "groceries/sampled-datasets/orders.parquet",
     "regulars": "groceries/sampled-datasets/regulars.parquet",
@@ -59,39 +26,97 @@ datasets = {
     "inventory": "groceries/sampled-datasets/inventory.parquet",
     "users": "groceries/sampled-datasets/users.parquet",
 }
+DATASET_NAMES = {
+    "orders": "Orders",
+    "regulars": "Regulars",
+    "abandoned_cart": "Abandoned Cart",
+    "inventory": "Inventory",
+    "users": "Users",
+}
 
-for dataset, s3_key in datasets.items():
-    local_file = f"{dataset}.parquet"
-    if not os.path.isfile(local_file):
-        try:
-            download_s3_file(bucket_name, s3_key, local_file)
-        except Exception as e:
-            logger.critical(f"Failed to download {dataset}: {e}")
-            continue
-    else:
-        logger.info(f"The file {local_file} already exists, proceeding to load it.")
+# Only the columns the abandonment analysis reads
+ABANDONMENT_COLUMNS = {
+    "abandoned_cart": ["user_id", "created_at"],
+    "regulars": ["user_id"],
+    "users": ["user_id", "user_segment", "user_nuts1"],
+}
 
+_loaders: Dict[Tuple[str, Optional[str], bool], DatasetLoader] = {}
 
-def load_data() -> (
-    Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]
-):
+
+def download_datasets(data_dir: str = ".", client: Any = None) -> Dict[str, str]:
+    statuses = sync_objects(
+        {f"{dataset}.parquet": s3_key for dataset, s3_key in datasets.items()},
+        data_dir,
+        bucket_name,
+        client=client,
+    )
+    for file_name, status in statuses.items():
+        if status == FAILED:
+            logger.critical(f"Failed to download {file_name}")
+    return statuses
+
+
+def get_loader(
+    data_dir: str = ".",
+    dtype_backend: Optional[str] = None,
+    categorical_ids: bool = False,
+) -> DatasetLoader:
+    key = (os.path.abspath(data_dir), dtype_backend, categorical_ids)
+    if key not in _loaders:
+        _loaders[key] = DatasetLoader(data_dir, dtype_backend, categorical_ids)
+    return _loaders[key]
+
+
+def get_dataset(
+    name: str,
+    data_dir: str = ".",
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[Filters] = None,
+) -> pd.DataFrame:
+    return get_loader(data_dir).load(name, columns, filters)
+
+
+def __getattr__(name: str) -> pd.DataFrame:
+    # `eda1.orders` & co. are loaded on first access
+    if name in datasets:
+        return get_dataset(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@instrument()
+def load_data(
+    data_dir: str = ".",
+    columns: Optional[Dict[str, Sequence[str]]] = None,
+    filters: Optional[Dict[str, Filters]] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    columns = columns or {}
+    filters = filters or {}
     try:
-        orders = pd.read_parquet("orders.parquet")
-        regulars = pd.read_parquet("regulars.parquet")
-        abandoned_cart = pd.read_parquet("abandoned_cart.parquet")
-        inventory = pd.read_parquet("inventory.parquet")
-        users = pd.read_parquet("users.parquet")
+        orders, regulars, abandoned_cart, inventory, users = (
+            get_dataset(name, data_dir, columns.get(name), filters.get(name))
+            for name in datasets
+        )
         return orders, regulars, abandoned_cart, inventory, users
     except Exception as e:
         logger.error(f"Error loading datasets: {e}")
         raise
 
 
-try:
-    orders, regulars, abandoned_cart, inventory, users = load_data()
-except Exception as e:
-    logger.critical(f"Failed to load data: {e}")
-    exit(1)
+# Projected, categorical-ID inputs for the abandonment analysis, optionally
+# restricted to carts created in [start, end)
+def load_abandonment_inputs(
+    data_dir: str = ".", start: Any = None, end: Any = None
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    loader = get_loader(data_dir, categorical_ids=True)
+    abandoned_cart = loader.load(
+        "abandoned_cart",
+        ABANDONMENT_COLUMNS["abandoned_cart"],
+        date_filter("created_at", start, end),
+    )
+    regulars = loader.load("regulars", ABANDONMENT_COLUMNS["regulars"])
+    users = loader.load("users", ABANDONMENT_COLUMNS["users"])
+    return abandoned_cart, regulars, users
 
 
 def quick_check(df: pd.DataFrame, name: str) -> None:
@@ -100,13 +125,7 @@ def quick_check(df: pd.DataFrame, name: str) -> None:
     logger.info(f"First rows:\n{df.head()}\n")
 
 
-for df, name in zip(
-    [orders, regulars, abandoned_cart, inventory, users],
-    ["Orders", "Regulars", "Abandoned Cart", "Inventory", "Users"],
-):
-    quick_check(df, name)
-
-
+@instrument()
 def check_missing_and_duplicates(df: pd.DataFrame, name: str) -> None:
     logger.info(f"Checking {name}...")
     logger.info(f"Column types:\n{df.dtypes}")
@@ -118,13 +137,7 @@ def check_missing_and_duplicates(df: pd.DataFrame, name: str) -> None:
     logger.info("\n")
 
 
-for df, name in zip(
-    [orders, regulars, abandoned_cart, inventory, users],
-    ["Orders", "Regulars", "Abandoned Cart", "Inventory", "Users"],
-):
-    check_missing_and_duplicates(df, name)
-
-
+@instrument()
 def descriptive_analysis(df: pd.DataFrame, name: str) -> None:
     logger.info(f"\nDescriptive Analysis for {name}")
     try:
@@ -133,45 +146,54 @@ def descriptive_analysis(df: pd.DataFrame, name: str) -> None:
         logger.error(f"Error performing descriptive analysis on {name}: {e}")
 
 
-for df, name in zip(
-    [orders, regulars, abandoned_cart, inventory, users],
-    ["Orders", "Regulars", "Abandoned Cart", "Inventory", "Users"],
-):
-    descriptive_analysis(df, name)
+def plot_basket_sizes(sizes: Any, name: str) -> None:
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
-sns.set(style="whitegrid")
+    try:
+        plt.figure(figsize=(10, 6))
+        sns.histplot(sizes, bins=30, kde=True)
+        plt.title(f"Distribution of Number of Items in {name}")
+        plt.xlabel("Number of Items")
+        plt.ylabel("Frequency")
+        plt.show()
+    except Exception as e:
+        logger.error(f"Error plotting item distribution for {name}: {e}")
 
 
+@instrument()
 def plot_item_distribution(df: pd.DataFrame, name: str) -> None:
-    if "item_ids" in df.columns:
-        try:
-            plt.figure(figsize=(10, 6))
-            sns.histplot(df["item_ids"].apply(len), bins=30, kde=True)
-            plt.title(f"Distribution of Number of Items in {name}")
-            plt.xlabel("Number of Items")
-            plt.ylabel("Frequency")
-            plt.show()
-        except Exception as e:
-            logger.error(f"Error plotting item distribution for {name}: {e}")
+    list_column = find_list_column(df)
+    if list_column is not None:
+        plot_basket_sizes(list_lengths(df[list_column]), name)
     else:
         logger.warning(f"The column 'item_ids' is not found in {name}.")
 
 
-plot_item_distribution(orders, "Orders")
-plot_item_distribution(abandoned_cart, "Abandoned Carts")
-
-try:
-    regular_users = set(regulars["user_id"])
-    abandoned_cart["regular_user"] = abandoned_cart["user_id"].isin(regular_users)
+@instrument()
+def abandonment_rates_by_user_type(
+    abandoned_cart: pd.DataFrame, regulars: pd.DataFrame, users: pd.DataFrame
+) -> pd.DataFrame:
+    regular_users = regulars["user_id"].unique()
+    regular_user = abandoned_cart["user_id"].isin(regular_users)
 
-    abandonment_rates = abandoned_cart.groupby("regular_user").size() / users.shape[0]
+    abandonment_rates = (
+        abandoned_cart.groupby(regular_user.rename("regular_user")).size()
+        / users.shape[0]
+    )
     logger.info("Abandonment Rate of Carts by User Type")
     logger.info(abandonment_rates)
 
     abandonment_rates = abandonment_rates.reset_index(name="abandonment_rate")
-    abandonment_rates["regular_user"] = abandonment_rates["regular_user"].replace(
+    abandonment_rates["regular_user"] = abandonment_rates["regular_user"].map(
         {True: "Regular", False: "Non-Regular"}
     )
+    return abandonment_rates
+
+
+def plot_abandonment_rates(abandonment_rates: pd.DataFrame) -> None:
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
     plt.figure(figsize=(8, 5))
     sns.barplot(x="regular_user", y="abandonment_rate", data=abandonment_rates)
@@ -180,27 +202,112 @@ try:
     plt.ylabel("Abandonment Rate")
     plt.ylim(0, 1)
     plt.show()
-except Exception as e:
-    logger.error(f"Error calculating abandonment rates: {e}")
 
-try:
-    if "total_amount" in orders.columns:
-        avg_total_amount = orders["total_amount"].mean()
-        logger.info(f"The average total amount of orders is: {avg_total_amount}")
 
-        abandoned_cart["created_at"] = pd.to_datetime(abandoned_cart["created_at"])
-        abandoned_cart["abandon_date"] = abandoned_cart["created_at"].dt.date
+@instrument()
+def abandonment_by_date(abandoned_cart: pd.DataFrame) -> pd.Series:
+    abandon_date = pd.to_datetime(abandoned_cart["created_at"]).dt.date
+    return abandoned_cart.groupby(abandon_date.rename("abandon_date")).size()
 
-        abandonment_by_date = abandoned_cart.groupby("abandon_date").size()
 
-        plt.figure(figsize=(12, 6))
-        sns.lineplot(x=abandonment_by_date.index, y=abandonment_by_date.values)
-        plt.title("Number of Abandoned Carts by Date")
-        plt.xlabel("Date")
-        plt.ylabel("Number of Abandoned Carts")
-        plt.xticks(rotation=45)
-        plt.show()
-    else:
-        logger.warning("Cannot perform alternative analysis: missing required columns.")
-except Exception as e:
-    logger.error(f"Error during additional analysis: {e}")
+def plot_abandonment_by_date(abandonment_by_date: pd.Series) -> None:
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.figure(figsize=(12, 6))
+    sns.lineplot(x=abandonment_by_date.index, y=abandonment_by_date.values)
+    plt.title("Number of Abandoned Carts by Date")
+    plt.xlabel("Date")
+    plt.ylabel("Number of Abandoned Carts")
+    plt.xticks(rotation=45)
+    plt.show()
+
+
+# Dashboard refresh from the stored aggregates: only rows newer than the
+# last run are read
+@instrument()
+def refresh_dashboards(data_dir: str = ".") -> None:
+    states = refresh(data_dir)
+    for name, state in states.items():
+        logger.info(f"\nDescriptive Analysis for {DATASET_NAMES[name]}")
+        logger.info(state.describe())
+    logger.info(f"Basket sizes:\n{states['orders'].item_histogram()}")
+    plot_abandonment_by_date(states["abandoned_cart"].by_date())
+
+
+def main(incremental: bool = False) -> None:
+    import seaborn as sns
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    download_datasets()
+    if incremental:
+        refresh_dashboards()
+        return
+
+    try:
+        orders, regulars, abandoned_cart, inventory, users = load_data()
+    except Exception as e:
+        logger.critical(f"Failed to load data: {e}")
+        sys.exit(1)
+
+    frames = [orders, regulars, abandoned_cart, inventory, users]
+    names = list(DATASET_NAMES.values())
+    for df, name in zip(frames, names):
+        quick_check(df, name)
+    report = profile_datasets(dict(zip(names, frames)))
+    for name, profile in report.items():
+        logger.info(
+            f"{name}: {profile['rows']} rows, "
+            f"{profile['duplicate_rows']} duplicate rows"
+        )
+    logger.info(f"Profile:\n{report_frame(report).to_string()}")
+
+    try:
+        items = ItemDimension(inventory)
+        index = BasketIndex.from_frame(orders)
+        items.missing_items(index)
+        logger.info(
+            f"Basket value per order:\n{items.basket_value(index)['value'].describe()}"
+        )
+    except Exception as e:
+        logger.error(f"Error joining orders to inventory: {e}")
+
+    sns.set(style="whitegrid")
+    plot_item_distribution(orders, "Orders")
+    plot_item_distribution(abandoned_cart, "Abandoned Carts")
+
+    try:
+        abandoned, regular, segment_users = load_abandonment_inputs()
+        plot_abandonment_rates(
+            abandonment_rates_by_user_type(abandoned, regular, segment_users)
+        )
+        rates = abandonment_rates(
+            abandoned, segment_users, regular, windows=["monthly"]
+        )
+        logger.info(f"Monthly abandonment rates by segment:\n{rates.to_string()}")
+    except Exception as e:
+        logger.error(f"Error calculating abandonment rates: {e}")
+
+    try:
+        if "total_amount" in orders.columns:
+            avg_total_amount = orders["total_amount"].mean()
+            logger.info(f"The average total amount of orders is: {avg_total_amount}")
+            plot_abandonment_by_date(abandonment_by_date(abandoned_cart))
+        else:
+            logger.warning(
+                "Cannot perform alternative analysis: missing required columns."
+            )
+    except Exception as e:
+        logger.error(f"Error during additional analysis: {e}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Groceries EDA")
+    parser.add_argument(
+        "--incremental", action="store_true", help="refresh from stored aggregates"
+    )
+    main(incremental=parser.parse_args().incremental)
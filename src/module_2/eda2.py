@@ -1,64 +1,52 @@
 import os
+import sys
 import logging
-import boto3
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from dotenv import load_dotenv
-from typing import Optional
-
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+from typing import Any, Dict, Optional, Sequence, Union
+
+from src.instrumentation import instrument
+from src.module_2.aws import BUCKET_NAME
+from src.module_2.compute import ComputeBackend, get_backend
+from src.module_2.feature_frame import ensure_cache, fill_means, load_feature_frame
+from src.module_2.plot_summaries import (
+    PlotSummaries,
+    as_summaries,
+    plot_box,
+    plot_counts,
+    plot_histogram,
 )
-logger = logging.getLogger()
-
-current_directory = os.getcwd()
-env_file_path = os.path.join(current_directory, "keys.env")
-env_exists = os.path.isfile(env_file_path)
-
-logger.info(f"Does the keys.env file exist? {env_exists}")
-
-if env_exists:
-    load_dotenv(env_file_path)
-else:
-    logger.warning("The keys.env file was not found.")
+from src.module_2.s3_sync import FAILED, sync_objects
 
-aws_access_key = os.getenv("AWS_ACCESS_KEY_ID")
-aws_secret_key = os.getenv("AWS_SECRET_ACCESS_KEY")
+# Importing this module is side-effect free: the feature frame is only
+# downloaded and parsed when load_dataset() or main() asks for it.
+logger = logging.getLogger(__name__)
 
-if aws_access_key is None or aws_secret_key is None:
-    raise ValueError(
-        "AWS environment variables did not load correctly. Check the keys.env file."
-    )
-
-try:
-    session = boto3.Session(
-        aws_access_key_id=aws_access_key,
-        aws_secret_access_key=aws_secret_key,
-    )
-    s3 = session.client("s3")
-except Exception as e:
-    logger.critical(f"Failed to create AWS session: {e}")
-    exit(1)
-
-bucket_name = "zrive-ds-data"
+bucket_name = BUCKET_NAME
 s3_key = "groceries/box_builder_dataset/feature_frame.csv"
 local_file = "feature_frame.csv"
-
-try:
-    if not os.path.isfile(local_file):
-        s3.download_file(bucket_name, s3_key, local_file)
-        logger.info(f"Downloaded {s3_key} to {local_file}")
-    else:
-        logger.info(f"The file {local_file} already exists, proceeding to load it.")
-except Exception as e:
-    logger.error(f"Error downloading file from S3: {e}")
-    exit(1)
+cache_dir = "feature_frame_parquet"
 
 
-def load_dataset() -> Optional[pd.DataFrame]:
+def download_feature_frame(path: str = local_file, client: Any = None) -> None:
+    data_dir, file_name = os.path.split(path)
+    statuses = sync_objects(
+        {file_name: s3_key}, data_dir or ".", bucket_name, client=client
+    )
+    if statuses[file_name] == FAILED:
+        raise IOError(f"Could not sync {s3_key} to {path}")
+
+
+# The CSV is only parsed on the first call (or when it changes); afterwards the
+# Parquet cache is memory-mapped.
+@instrument()
+def load_dataset(
+    path: str = local_file,
+    parquet_dir: str = cache_dir,
+    columns: Optional[Sequence[str]] = None,
+) -> Optional[pd.DataFrame]:
     try:
-        df = pd.read_csv(local_file)
+        ensure_cache(path, parquet_dir)
+        df = load_feature_frame(parquet_dir, columns)
         logger.info("Dataset loaded successfully")
         return df
     except Exception as e:
@@ -66,105 +54,151 @@ def load_dataset() -> Optional[pd.DataFrame]:
         return None
 
 
-box_builder = load_dataset()
+def quick_check(df: pd.DataFrame) -> None:
+    logger.info(f"Size of the dataset: {df.shape}")
+    logger.info(f"First rows:\n{df.head()}")
+    logger.info("\nDataset information:")
+    logger.info(df.info())
 
-if box_builder is not None:
 
-    def quick_check(df: pd.DataFrame) -> None:
-        logger.info(f"Size of the dataset: {df.shape}")
-        logger.info(f"First rows:\n{df.head()}")
-        logger.info("\nDataset information:")
-        logger.info(df.info())
+@instrument()
+def check_missing_and_duplicates(df: pd.DataFrame) -> None:
+    logger.info(f"Missing values:\n{df.isnull().sum()}")
+    logger.info(f"Duplicates: {df.duplicated().sum()}")
 
-    quick_check(box_builder)
 
-    def check_missing_and_duplicates(df: pd.DataFrame) -> None:
-        logger.info(f"Missing values:\n{df.isnull().sum()}")
-        logger.info(f"Duplicates: {df.duplicated().sum()}")
+def fill_missing_with_mean(
+    df: pd.DataFrame, means: Optional[Dict[str, float]] = None
+) -> pd.DataFrame:
+    if means is None:
+        means = df.select_dtypes(include="number").mean().to_dict()
+    return fill_means(df, means)
 
-    check_missing_and_duplicates(box_builder)
 
-    for column in box_builder.select_dtypes(include=["float64", "int64"]).columns:
-        try:
-            box_builder[column].fillna(box_builder[column].mean(), inplace=True)
-        except Exception as e:
-            logger.error(f"Error filling missing values in column {column}: {e}")
+Data = Union[pd.DataFrame, ComputeBackend, PlotSummaries]
 
-    def visualize_outcome_distribution(df: pd.DataFrame) -> None:
-        try:
-            plt.figure(figsize=(10, 6))
-            sns.countplot(data=df, x="outcome")
-            plt.title("Distribution of Purchased/Not Purchased Products")
-            plt.xlabel("Outcome (1 = Purchased, 0 = Not Purchased)")
-            plt.ylabel("Frequency")
-            plt.show()
-        except Exception as e:
-            logger.error(f"Error visualizing outcome distribution: {e}")
-
-    visualize_outcome_distribution(box_builder)
-
-    def analyze_additional_features(df: pd.DataFrame) -> None:
-        if "normalised_price" in df.columns:
-            try:
-                plt.figure(figsize=(10, 6))
-                sns.histplot(df["normalised_price"], kde=True)
-                plt.title("Distribution of Normalized Prices")
-                plt.xlabel("Normalized Price")
-                plt.ylabel("Frequency")
-                plt.show()
-            except Exception as e:
-                logger.error(f"Error visualizing normalized price: {e}")
-        else:
-            logger.warning("The column 'normalised_price' is not found in the dataset.")
-
-    analyze_additional_features(box_builder)
-
-    def analyze_price_discount_outcome(df: pd.DataFrame) -> None:
-        try:
-            plt.figure(figsize=(10, 6))
-            sns.boxplot(x="outcome", y="normalised_price", data=df)
-            plt.title("Distribution of Normalized Prices vs Purchase Outcome")
-            plt.xlabel("Outcome (1 = Purchased, 0 = Not Purchased)")
-            plt.ylabel("Normalized Price")
-            plt.show()
-
-            plt.figure(figsize=(10, 6))
-            sns.boxplot(x="outcome", y="discount_pct", data=df)
-            plt.title("Distribution of Discount (%) vs Purchase Outcome")
-            plt.xlabel("Outcome (1 = Purchased, 0 = Not Purchased)")
-            plt.ylabel("Discount (%)")
-            plt.show()
-        except Exception as e:
-            logger.error(f"Error analyzing price and discount outcome: {e}")
 
-    analyze_price_discount_outcome(box_builder)
+def _show(ax: Any, title: str, xlabel: str, ylabel: Optional[str] = None) -> None:
+    import matplotlib.pyplot as plt
 
-    def analyze_global_popularity_vs_outcome(df: pd.DataFrame) -> None:
-        try:
-            plt.figure(figsize=(10, 6))
-            sns.boxplot(x="outcome", y="global_popularity", data=df)
-            plt.title("Distribution of Global Popularity vs Purchase Outcome")
-            plt.xlabel("Outcome (1 = Purchased, 0 = Not Purchased)")
-            plt.ylabel("Global Popularity")
-            plt.show()
-        except Exception as e:
-            logger.error(f"Error analyzing global popularity vs outcome: {e}")
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    if ylabel is not None:
+        ax.set_ylabel(ylabel)
+    plt.show()
+
+
+# The analyses accept the feature frame, a compute backend or precomputed
+# PlotSummaries; either way only summaries reach matplotlib
+@instrument()
+def visualize_outcome_distribution(data: Data) -> None:
+    try:
+        ax = plot_counts(as_summaries(data).counts(["outcome"]), "outcome")
+        _show(
+            ax,
+            "Distribution of Purchased/Not Purchased Products",
+            "Outcome (1 = Purchased, 0 = Not Purchased)",
+        )
+    except Exception as e:
+        logger.error(f"Error visualizing outcome distribution: {e}")
 
-    analyze_global_popularity_vs_outcome(box_builder)
 
-    def analyze_ordered_before_vs_outcome(df: pd.DataFrame) -> None:
+@instrument()
+def analyze_additional_features(data: Data) -> None:
+    summaries = as_summaries(data)
+    if "normalised_price" in summaries.columns():
         try:
-            plt.figure(figsize=(10, 6))
-            sns.countplot(x="ordered_before", hue="outcome", data=df)
-            plt.title(
-                "Relationship between Previous Purchase (ordered_before) and Purchase Outcome"
+            ax = plot_histogram(
+                summaries.histogram("normalised_price"),
+                summaries.kde("normalised_price"),
             )
-            plt.xlabel("Previously Purchased Product (1 = Yes, 0 = No)")
-            plt.ylabel("Frequency")
-            plt.show()
+            _show(ax, "Distribution of Normalized Prices", "Normalized Price")
         except Exception as e:
-            logger.error(f"Error analyzing ordered before vs outcome: {e}")
+            logger.error(f"Error visualizing normalized price: {e}")
+    else:
+        logger.warning("The column 'normalised_price' is not found in the dataset.")
+
+
+@instrument()
+def analyze_price_discount_outcome(data: Data) -> None:
+    summaries = as_summaries(data)
+    try:
+        ax = plot_box(summaries.box_stats("normalised_price"), "outcome")
+        _show(
+            ax,
+            "Distribution of Normalized Prices vs Purchase Outcome",
+            "Outcome (1 = Purchased, 0 = Not Purchased)",
+            "Normalized Price",
+        )
+        ax = plot_box(summaries.box_stats("discount_pct"), "outcome")
+        _show(
+            ax,
+            "Distribution of Discount (%) vs Purchase Outcome",
+            "Outcome (1 = Purchased, 0 = Not Purchased)",
+            "Discount (%)",
+        )
+    except Exception as e:
+        logger.error(f"Error analyzing price and discount outcome: {e}")
+
+
+@instrument()
+def analyze_global_popularity_vs_outcome(data: Data) -> None:
+    try:
+        ax = plot_box(as_summaries(data).box_stats("global_popularity"), "outcome")
+        _show(
+            ax,
+            "Distribution of Global Popularity vs Purchase Outcome",
+            "Outcome (1 = Purchased, 0 = Not Purchased)",
+            "Global Popularity",
+        )
+    except Exception as e:
+        logger.error(f"Error analyzing global popularity vs outcome: {e}")
+
+
+@instrument()
+def analyze_ordered_before_vs_outcome(data: Data) -> None:
+    try:
+        counts = as_summaries(data).counts(["ordered_before", "outcome"])
+        ax = plot_counts(counts, "ordered_before", hue="outcome")
+        _show(
+            ax,
+            "Relationship between Previous Purchase (ordered_before) and Purchase Outcome",
+            "Previously Purchased Product (1 = Yes, 0 = No)",
+        )
+    except Exception as e:
+        logger.error(f"Error analyzing ordered before vs outcome: {e}")
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    try:
+        download_feature_frame()
+    except Exception as e:
+        logger.error(f"Error downloading file from S3: {e}")
+        sys.exit(1)
+
+    box_builder = load_dataset()
+    if box_builder is None:
+        logger.error("Failed to load the dataset. Exiting program.")
+        sys.exit(1)
+
+    quick_check(box_builder)
+    check_missing_and_duplicates(box_builder)
+    del box_builder
+
+    # The plots scan the Parquet cache out of core, nulls filled with the means;
+    # the summaries are computed once and shared by every figure
+    summaries = PlotSummaries(
+        get_backend(cache_dir, fill_values=ensure_cache(local_file, cache_dir)["means"])
+    )
+    visualize_outcome_distribution(summaries)
+    analyze_additional_features(summaries)
+    analyze_price_discount_outcome(summaries)
+    analyze_global_popularity_vs_outcome(summaries)
+    analyze_ordered_before_vs_outcome(summaries)
+
 
-    analyze_ordered_before_vs_outcome(box_builder)
-else:
-    logger.error("Failed to load the dataset. Exiting program.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,526 @@
+import os
+import time
+import pickle
+import hashlib
+import inspect
+import logging
+import functools
+import multiprocessing
+import numpy as np
+import pandas as pd
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.instrumentation import span
+from src.module_2 import eda1, eda2
+from src.module_2.abandonment import abandonment_rates
+from src.module_2.baskets import (
+    BasketIndex,
+    find_list_column,
+    list_lengths,
+    lookup_codes,
+)
+from src.module_2.feature_frame import ensure_cache, load_feature_frame
+from src.module_2.items import ItemDimension
+from src.module_2.loader import DATASETS, DatasetLoader
+from src.module_2.plot_summaries import PlotSummaries
+from src.module_2.profiling import profile_dataset, report_frame
+
+# The eda1/eda2 analyses as a DAG of tasks. A task names the datasets (and
+# columns) it reads and the tasks it depends on, and is called with one keyword
+# argument per dataset and per dependency. Tasks whose dependencies are done
+# run in a process pool. Every result is pickled under a key hashing the task's
+# code, the size/mtime of its input files and its dependencies' keys, so a
+# rerun only recomputes the tasks whose code or data changed (and everything
+# downstream of them). Plots are drawn in the parent process from the results.
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = ".eda_cache"
+FEATURE_FRAME = "feature_frame"
+ITEM_COLUMNS = ("variant_id", "price", "compare_at_price", "vendor", "product_type")
+
+
+class Task:
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        inputs: Optional[Dict[str, Optional[Sequence[str]]]] = None,
+        deps: Sequence[str] = (),
+        render: Optional[Callable[[Any], None]] = None,
+        uses: Sequence[Callable] = (),
+        version: Optional[str] = None,
+    ) -> None:
+        self.name = name
+        self.fn = fn
+        self.inputs = {
+            dataset: list(columns) if columns is not None else None
+            for dataset, columns in (inputs or {}).items()
+        }
+        self.deps = tuple(deps)
+        self.render = render
+        self.uses = tuple(uses)
+        self.version = version
+
+    # Source of the modules that define the task function and the helpers it
+    # declares in `uses`, so editing a private helper next to them (such as
+    # profiling.profile_column) also changes the version; helpers in other
+    # modules go in `uses`, and `version` covers changes the source does not
+    # show (e.g. a dependency)
+    def code_version(self) -> str:
+        digest = hashlib.sha256(str(self.version).encode())
+        modules = {}
+        for fn in (self.fn, *self.uses):
+            if isinstance(fn, functools.partial):
+                digest.update(repr((fn.args, sorted(fn.keywords.items()))).encode())
+                fn = fn.func
+            module = inspect.getmodule(fn)
+            name = module.__name__ if module else f"{fn.__module__}.{fn.__qualname__}"
+            modules[name] = module
+        for name, module in sorted(modules.items()):
+            try:
+                source = inspect.getsource(module)
+            except (OSError, TypeError):
+                source = name
+            digest.update(source.encode())
+        return digest.hexdigest()
+
+
+def input_path(data_dir: str, dataset: str) -> str:
+    if dataset == FEATURE_FRAME:
+        return os.path.join(data_dir, eda2.cache_dir)
+    return DatasetLoader(data_dir).path(dataset)
+
+
+def path_signature(path: str) -> List[Tuple[str, int, int]]:
+    # (file, size, mtime) of a dataset file or of every file in a dataset dir
+    if os.path.isfile(path):
+        files = [path]
+    else:
+        files = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(path)
+            for name in names
+        )
+    signature = []
+    for file in files:
+        stat = os.stat(file)
+        name = os.path.relpath(file, path) if file != path else os.path.basename(path)
+        signature.append((name, stat.st_size, stat.st_mtime_ns))
+    return signature
+
+
+def load_input(
+    data_dir: str, dataset: str, columns: Optional[Sequence[str]]
+) -> pd.DataFrame:
+    if dataset == FEATURE_FRAME:
+        return load_feature_frame(
+            input_path(data_dir, dataset), columns, fill_missing=True
+        )
+    return DatasetLoader(data_dir, categorical_ids=False).load(dataset, columns)
+
+
+def task_key(task: Task, data_dir: str, dep_keys: Dict[str, str]) -> str:
+    digest = hashlib.sha256(f"{task.name}:{task.code_version()}".encode())
+    for dataset, columns in sorted(task.inputs.items()):
+        signature = path_signature(input_path(data_dir, dataset))
+        digest.update(repr((dataset, columns, signature)).encode())
+    for dep in task.deps:
+        digest.update(f"{dep}:{dep_keys[dep]}".encode())
+    return digest.hexdigest()
+
+
+def topological_order(tasks: Sequence[Task]) -> List[Task]:
+    by_name: Dict[str, Task] = {}
+    for task in tasks:
+        if task.name in by_name:
+            raise ValueError(f"Duplicate task {task.name!r}")
+        by_name[task.name] = task
+    remaining = {task.name: set(task.deps) for task in tasks}
+    unknown = set().union(*remaining.values()) - by_name.keys()
+    if unknown:
+        raise ValueError(f"Unknown dependencies: {sorted(unknown)}")
+
+    order: List[Task] = []
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Dependency cycle among {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+            order.append(by_name[name])
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return order
+
+
+# The named tasks plus everything they depend on
+def select(tasks: Sequence[Task], names: Sequence[str]) -> List[Task]:
+    by_name = {task.name: task for task in tasks}
+    unknown = set(names) - by_name.keys()
+    if unknown:
+        raise ValueError(f"Unknown tasks: {sorted(unknown)}")
+    wanted, stack = set(), list(names)
+    while stack:
+        name = stack.pop()
+        if name not in wanted:
+            wanted.add(name)
+            stack.extend(by_name[name].deps)
+    return [task for task in tasks if task.name in wanted]
+
+
+class ResultCache:
+    def __init__(self, path: str = CACHE_DIR) -> None:
+        self.path = path
+
+    def _file(self, name: str, key: str) -> str:
+        return os.path.join(self.path, f"{name}-{key[:16]}.pkl")
+
+    def has(self, name: str, key: str) -> bool:
+        return os.path.isfile(self._file(name, key))
+
+    def load(self, name: str, key: str) -> Any:
+        with open(self._file(name, key), "rb") as f:
+            return pickle.load(f)
+
+    def save(self, name: str, key: str, result: Any) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        path = self._file(name, key)
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+        # one entry per task: results of older code or data are dropped
+        for file in os.listdir(self.path):
+            stale = os.path.join(self.path, file)
+            if file.endswith(".pkl") and file.rsplit("-", 1)[0] == name:
+                if stale != path:
+                    os.remove(stale)
+
+
+class _InlineExecutor:
+    # Same interface as the process pool, running each task on submit
+    def submit(self, fn: Callable, *args: Any) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def __enter__(self) -> "_InlineExecutor":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+
+def _execute(
+    name: str,
+    fn: Callable[..., Any],
+    inputs: Dict[str, Optional[List[str]]],
+    data_dir: str,
+    dep_results: Dict[str, Any],
+) -> Any:
+    # Runs in a worker process: only the projected columns are read
+    with span(f"eda_task.{name}") as current:
+        frames = {
+            dataset: load_input(data_dir, dataset, columns)
+            for dataset, columns in inputs.items()
+        }
+        result = fn(**frames, **dep_results)
+        current.measure(result)
+    return result
+
+
+# max_workers=0 runs every task inline, in this process. Failed tasks are
+# logged and not cached; the tasks depending on them are skipped.
+def run_tasks(
+    tasks: Sequence[Task],
+    data_dir: str = ".",
+    cache_dir: str = CACHE_DIR,
+    max_workers: Optional[int] = None,
+    render: bool = True,
+) -> Dict[str, Any]:
+    order = topological_order(tasks)
+    cache = ResultCache(cache_dir)
+    keys: Dict[str, str] = {}
+    for task in order:
+        keys[task.name] = task_key(task, data_dir, keys)
+
+    results: Dict[str, Any] = {}
+    failed = set()
+    todo = []
+    for task in order:
+        if cache.has(task.name, keys[task.name]):
+            results[task.name] = cache.load(task.name, keys[task.name])
+            logger.info(f"Task {task.name}: cached")
+        else:
+            todo.append(task)
+
+    if max_workers == 0:
+        pool = _InlineExecutor()
+    else:
+        # forking a process with live pyarrow threads can deadlock the child
+        methods = multiprocessing.get_all_start_methods()
+        context = "forkserver" if "forkserver" in methods else "spawn"
+        pool = ProcessPoolExecutor(max_workers, multiprocessing.get_context(context))
+    with pool:
+        running: Dict[Future, Tuple[Task, float]] = {}
+        while todo or running:
+            for task in list(todo):
+                if any(dep in failed for dep in task.deps):
+                    todo.remove(task)
+                    failed.add(task.name)
+                    logger.warning(f"Task {task.name}: skipped, a dependency failed")
+                elif all(dep in results for dep in task.deps):
+                    todo.remove(task)
+                    dep_results = {dep: results[dep] for dep in task.deps}
+                    future = pool.submit(
+                        _execute, task.name, task.fn, task.inputs, data_dir, dep_results
+                    )
+                    running[future] = (task, time.perf_counter())
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task, start = running.pop(future)
+                try:
+                    results[task.name] = future.result()
+                except Exception as e:
+                    failed.add(task.name)
+                    logger.error(f"Task {task.name} failed: {e}")
+                    continue
+                cache.save(task.name, keys[task.name], results[task.name])
+                elapsed = time.perf_counter() - start
+                logger.info(f"Task {task.name}: computed in {elapsed:.2f}s")
+
+    if render:
+        for task in order:
+            if task.render is not None and task.name in results:
+                try:
+                    task.render(results[task.name])
+                except Exception as e:
+                    logger.error(f"Error rendering {task.name}: {e}")
+    return results
+
+
+# Task functions. They must be module-level so the process pool can pickle them
+
+
+def profile(**frames: pd.DataFrame) -> Dict[str, Any]:
+    ((dataset, df),) = frames.items()
+    return profile_dataset(df, eda1.DATASET_NAMES[dataset])
+
+
+def profile_report(**profiles: Dict[str, Any]) -> pd.DataFrame:
+    return report_frame({p["dataset"]: p for p in profiles.values()})
+
+
+def basket_sizes(**frames: pd.DataFrame) -> np.ndarray:
+    (df,) = frames.values()
+    return list_lengths(df[find_list_column(df)])
+
+
+def basket_index(orders: pd.DataFrame) -> BasketIndex:
+    return BasketIndex.from_frame(orders)
+
+
+def missing_items(items: ItemDimension, baskets: BasketIndex) -> pd.Series:
+    return items.missing_items(baskets)
+
+
+def basket_value(items: ItemDimension, baskets: BasketIndex) -> pd.DataFrame:
+    return items.basket_value(baskets)
+
+
+def monthly_abandonment_rates(
+    abandoned_cart: pd.DataFrame, users: pd.DataFrame, regulars: pd.DataFrame
+) -> pd.DataFrame:
+    return abandonment_rates(abandoned_cart, users, regulars, windows=["monthly"])
+
+
+# Computes the summaries an eda2 analysis draws from; the PlotSummaries is
+# returned without its data, and the analysis is then rendered from its memo
+def feature_summaries(
+    feature_frame: pd.DataFrame, requests: Sequence[Tuple[str, tuple]]
+) -> PlotSummaries:
+    summaries = PlotSummaries(feature_frame)
+    for method, args in requests:
+        getattr(summaries, method)(*args)
+    return summaries
+
+
+def _log(title: str, result: Any) -> None:
+    logger.info(f"{title}:\n{result.to_string()}")
+
+
+def _log_profile(profile: Dict[str, Any]) -> None:
+    logger.info(
+        f"{profile['dataset']}: {profile['rows']} rows, "
+        f"{profile['duplicate_rows']} duplicate rows"
+    )
+
+
+def _log_basket_value(value: pd.DataFrame) -> None:
+    _log("Basket value per order", value["value"].describe())
+
+
+def eda_tasks() -> List[Task]:
+    abandonment_inputs = eda1.ABANDONMENT_COLUMNS
+    tasks = [
+        Task(
+            f"profile_{dataset}",
+            profile,
+            {dataset: None},
+            render=_log_profile,
+            uses=[profile_dataset],
+        )
+        for dataset in DATASETS
+    ]
+    tasks += [
+        Task(
+            "profile_report",
+            profile_report,
+            deps=[f"profile_{dataset}" for dataset in DATASETS],
+            render=functools.partial(_log, "Profile"),
+        ),
+        Task(
+            "order_sizes",
+            basket_sizes,
+            {"orders": ["ordered_items"]},
+            render=functools.partial(eda1.plot_basket_sizes, name="Orders"),
+        ),
+        Task(
+            "cart_sizes",
+            basket_sizes,
+            {"abandoned_cart": ["variant_id"]},
+            render=functools.partial(eda1.plot_basket_sizes, name="Abandoned Carts"),
+        ),
+        Task(
+            "items",
+            ItemDimension,
+            {"inventory": list(ITEM_COLUMNS)},
+        ),
+        Task("baskets", basket_index, {"orders": ["id", "ordered_items"]}),
+        Task(
+            "missing_items",
+            missing_items,
+            deps=["items", "baskets"],
+            uses=[ItemDimension.missing_items, lookup_codes],
+        ),
+        Task(
+            "basket_value",
+            basket_value,
+            deps=["items", "baskets"],
+            render=_log_basket_value,
+            uses=[ItemDimension.basket_value, lookup_codes],
+        ),
+        Task(
+            "abandonment_by_user_type",
+            eda1.abandonment_rates_by_user_type,
+            abandonment_inputs,
+            render=eda1.plot_abandonment_rates,
+        ),
+        Task(
+            "monthly_abandonment_rates",
+            monthly_abandonment_rates,
+            abandonment_inputs,
+            render=functools.partial(_log, "Monthly abandonment rates by segment"),
+            uses=[abandonment_rates],
+        ),
+        Task(
+            "abandonment_by_date",
+            eda1.abandonment_by_date,
+            {"abandoned_cart": ["created_at"]},
+            render=eda1.plot_abandonment_by_date,
+        ),
+        Task(
+            "outcome_distribution",
+            functools.partial(feature_summaries, requests=[("counts", (["outcome"],))]),
+            {FEATURE_FRAME: ["outcome"]},
+            render=eda2.visualize_outcome_distribution,
+        ),
+        Task(
+            "normalised_price",
+            functools.partial(
+                feature_summaries,
+                requests=[
+                    ("columns", ()),
+                    ("histogram", ("normalised_price",)),
+                    ("kde", ("normalised_price",)),
+                ],
+            ),
+            {FEATURE_FRAME: ["normalised_price"]},
+            render=eda2.analyze_additional_features,
+        ),
+        Task(
+            "price_discount_outcome",
+            functools.partial(
+                feature_summaries,
+                requests=[
+                    ("box_stats", ("normalised_price",)),
+                    ("box_stats", ("discount_pct",)),
+                ],
+            ),
+            {FEATURE_FRAME: ["normalised_price", "discount_pct", "outcome"]},
+            render=eda2.analyze_price_discount_outcome,
+        ),
+        Task(
+            "global_popularity_outcome",
+            functools.partial(
+                feature_summaries, requests=[("box_stats", ("global_popularity",))]
+            ),
+            {FEATURE_FRAME: ["global_popularity", "outcome"]},
+            render=eda2.analyze_global_popularity_vs_outcome,
+        ),
+        Task(
+            "ordered_before_outcome",
+            functools.partial(
+                feature_summaries,
+                requests=[("counts", (["ordered_before", "outcome"],))],
+            ),
+            {FEATURE_FRAME: ["ordered_before", "outcome"]},
+            render=eda2.analyze_ordered_before_vs_outcome,
+        ),
+    ]
+    return tasks
+
+
+def main(
+    data_dir: str = ".",
+    cache_dir: str = CACHE_DIR,
+    max_workers: Optional[int] = None,
+    only: Optional[Sequence[str]] = None,
+) -> Dict[str, Any]:
+    import seaborn as sns
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    eda1.download_datasets(data_dir)
+    try:
+        csv_path = os.path.join(data_dir, eda2.local_file)
+        eda2.download_feature_frame(csv_path)
+        ensure_cache(csv_path, input_path(data_dir, FEATURE_FRAME))
+    except Exception as e:
+        logger.error(f"Feature frame unavailable, its analyses will fail: {e}")
+
+    tasks = eda_tasks()
+    if only:
+        tasks = select(tasks, only)
+    sns.set(style="whitegrid")
+    return run_tasks(tasks, data_dir, cache_dir, max_workers)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Groceries EDA as a cached task DAG")
+    parser.add_argument("--data-dir", default=".")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument(
+        "--workers", type=int, default=None, help="process pool size, 0 runs inline"
+    )
+    parser.add_argument("--only", nargs="+", help="tasks to run, with their deps")
+    args = parser.parse_args()
+    main(args.data_dir, args.cache_dir, args.workers, args.only)
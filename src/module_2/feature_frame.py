@@ -0,0 +1,149 @@
+import os
+import json
+import shutil
+import logging
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Optional, Sequence
+
+# One-off ingestion of the box_builder feature_frame.csv into a Parquet cache.
+# The CSV is parsed once, in chunks, with compact dtypes; later loads
+# memory-map the Parquet parts instead of parsing the CSV again.
+logger = logging.getLogger(__name__)
+
+CHUNKSIZE = 500_000
+META_FILE = "_meta.json"
+
+# Numeric ids stay int64: per-chunk categories would give every part its own
+# dictionary and would not match the integer ids of items and baskets
+ID_COLUMNS = ("variant_id", "order_id", "user_id")
+CATEGORICAL_COLUMNS = ("product_type", "vendor")
+# Bumped when the cached dtypes change, so older caches are ingested again
+CACHE_FORMAT = 2
+FLAG_COLUMNS = (
+    "outcome",
+    "ordered_before",
+    "abandoned_before",
+    "active_snoozed",
+    "set_as_regular",
+)
+DATE_COLUMNS = ("created_at", "order_date")
+
+# Columns not listed here are read as float32 when numeric
+FEATURE_FRAME_DTYPES: Dict[str, Any] = {
+    **{column: "int64" for column in ID_COLUMNS},
+    **{column: "category" for column in CATEGORICAL_COLUMNS},
+    **{column: "float32" for column in FLAG_COLUMNS},
+    "user_order_seq": "Int16",
+}
+
+
+def _source_signature(csv_path: str) -> Dict[str, Any]:
+    stat = os.stat(csv_path)
+    return {
+        "source": os.path.abspath(csv_path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+    }
+
+
+def read_meta(cache_dir: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(cache_dir, META_FILE)
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def is_cache_fresh(csv_path: str, cache_dir: str) -> bool:
+    meta = read_meta(cache_dir)
+    if meta is None:
+        return False
+    if not os.path.isfile(csv_path):
+        return True  # cache without its source is still usable
+    if meta.get("format") != CACHE_FORMAT:
+        return False  # written by an older layout
+    return meta["signature"] == _source_signature(csv_path)
+
+
+def _downcast(chunk: pd.DataFrame) -> pd.DataFrame:
+    numeric = [
+        column
+        for column in chunk.select_dtypes(include=["float64", "int64"]).columns
+        if column not in FEATURE_FRAME_DTYPES
+    ]
+    chunk[numeric] = chunk[numeric].astype(np.float32)
+    return chunk
+
+
+# Parses the CSV chunk by chunk and writes one Parquet part per chunk. Sums and
+# non-null counts are accumulated on the way so the column means used to fill
+# nulls need no extra pass over the data.
+def ingest_csv(csv_path: str, cache_dir: str, chunksize: int = CHUNKSIZE) -> Dict:
+    tmp_dir = cache_dir.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    sums: Optional[pd.Series] = None
+    counts: Optional[pd.Series] = None
+    n_rows = 0
+    reader = pd.read_csv(
+        csv_path,
+        dtype=FEATURE_FRAME_DTYPES,
+        parse_dates=list(DATE_COLUMNS),
+        chunksize=chunksize,
+    )
+    for i, chunk in enumerate(reader):
+        chunk = _downcast(chunk)
+        numeric = chunk.select_dtypes(include="number")
+        chunk_sums = numeric.astype(np.float64).sum()
+        chunk_counts = numeric.count()
+        sums = chunk_sums if sums is None else sums.add(chunk_sums, fill_value=0)
+        counts = (
+            chunk_counts if counts is None else counts.add(chunk_counts, fill_value=0)
+        )
+        n_rows += len(chunk)
+        chunk.to_parquet(os.path.join(tmp_dir, f"part-{i:05d}.parquet"), index=False)
+
+    means = {} if sums is None else (sums / counts.where(counts > 0)).dropna().to_dict()
+    meta = {
+        "signature": _source_signature(csv_path),
+        "format": CACHE_FORMAT,
+        "rows": n_rows,
+        "means": means,
+    }
+    with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+        json.dump(meta, f, indent=2)
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
+    logger.info(f"Ingested {n_rows} rows from {csv_path} into {cache_dir}")
+    return meta
+
+
+def ensure_cache(csv_path: str, cache_dir: str, chunksize: int = CHUNKSIZE) -> Dict:
+    meta = read_meta(cache_dir) if is_cache_fresh(csv_path, cache_dir) else None
+    return meta if meta is not None else ingest_csv(csv_path, cache_dir, chunksize)
+
+
+def fill_means(df: pd.DataFrame, means: Dict[str, float]) -> pd.DataFrame:
+    # One vectorized fillna for every numeric column at once
+    means = {c: v for c, v in means.items() if c in df.columns}
+    return df.fillna(means)
+
+
+def load_feature_frame(
+    cache_dir: str,
+    columns: Optional[Sequence[str]] = None,
+    fill_missing: bool = False,
+) -> pd.DataFrame:
+    df = pd.read_parquet(
+        cache_dir,
+        engine="pyarrow",
+        columns=list(columns) if columns is not None else None,
+        memory_map=True,
+    )
+    if fill_missing:
+        meta = read_meta(cache_dir)
+        df = fill_means(df, meta["means"] if meta else {})
+    return df
@@ -0,0 +1,201 @@
+import os
+import json
+import logging
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from src.module_2.feature_frame import load_feature_frame, read_meta
+
+# Model input for the box_builder problem. Orders with too few purchased
+# products are dropped, the remaining orders are split by time (whole days go
+# to one split, so no order and no day straddles train/validation/test), and
+# the explicit feature list is written once into a float32 matrix whose rows
+# are already grouped by split. Splits are contiguous slices of that matrix,
+# and the matrix is a memory-mapped .npy file, so reloading it is free.
+logger = logging.getLogger(__name__)
+
+FEATURES = (
+    "user_order_seq",
+    "normalised_price",
+    "discount_pct",
+    "global_popularity",
+    "ordered_before",
+    "abandoned_before",
+    "active_snoozed",
+    "set_as_regular",
+    "count_adults",
+    "count_children",
+    "count_babies",
+    "count_pets",
+    "people_ex_baby",
+    "days_since_purchase_variant_id",
+    "avg_days_to_buy_variant_id",
+    "std_days_to_buy_variant_id",
+    "days_since_purchase_product_type",
+    "avg_days_to_buy_product_type",
+    "std_days_to_buy_product_type",
+)
+TARGET = "outcome"
+ORDER_COLUMN = "order_id"
+DATE_COLUMN = "order_date"
+SPLITS = ("train", "validation", "test")
+SPLIT_FRACTIONS = (0.7, 0.2, 0.1)
+# matrices written before splits counted orders (not rows) are rebuilt
+SPLIT_WEIGHTS = "orders"
+MIN_PRODUCTS = 5
+
+
+def orders_with_min_products(
+    df: pd.DataFrame, min_products: int = MIN_PRODUCTS
+) -> np.ndarray:
+    # Row mask: orders in which at least min_products items were bought
+    codes, _ = pd.factorize(df[ORDER_COLUMN])
+    bought = np.bincount(codes, weights=df[TARGET].to_numpy(np.float64))
+    return bought[codes] >= min_products
+
+
+# Day-granular cutoffs: each split takes whole days until it holds its share of
+# distinct orders (not rows, which would favour days with large baskets), so
+# every training order is strictly older than any validation order. Returns the
+# split of each row of df, which needs the order id and date columns; rows
+# without a date cannot be placed and raise (build_feature_matrix drops them).
+def split_by_date(
+    df: pd.DataFrame, fractions: Sequence[float] = SPLIT_FRACTIONS
+) -> np.ndarray:
+    if len(fractions) != len(SPLITS) or not np.isclose(sum(fractions), 1):
+        raise ValueError(f"fractions must be {len(SPLITS)} shares summing to 1")
+    days = pd.to_datetime(df[DATE_COLUMN]).dt.floor("D")
+    if days.isna().any():
+        raise ValueError(f"{days.isna().sum()} rows have no {DATE_COLUMN}")
+    orders_per_day = df[ORDER_COLUMN].groupby(days).nunique()
+    share = orders_per_day.cumsum() / orders_per_day.sum()
+    bounds = np.cumsum(fractions)[:-1]
+    day_split = np.searchsorted(bounds, share.to_numpy() - 1e-12, side="left")
+    return day_split[orders_per_day.index.get_indexer(days)]
+
+
+class FeatureMatrix:
+    def __init__(self, X: np.ndarray, y: np.ndarray, meta: Dict[str, Any]) -> None:
+        self.X = X
+        self.y = y
+        self.meta = meta
+
+    @property
+    def features(self) -> Sequence[str]:
+        return self.meta["features"]
+
+    def split(self, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        start, stop = self.meta["splits"][name]
+        return self.X[start:stop], self.y[start:stop]
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "FeatureMatrix":
+        mode = "r" if mmap else None
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        return cls(
+            np.load(os.path.join(path, "X.npy"), mmap_mode=mode),
+            np.load(os.path.join(path, "y.npy"), mmap_mode=mode),
+            meta,
+        )
+
+
+def _allocate(path: Optional[str], name: str, shape: Tuple[int, ...]) -> np.ndarray:
+    if path is None:
+        return np.empty(shape, dtype=np.float32)
+    return np.lib.format.open_memmap(
+        os.path.join(path, f"{name}.npy"), mode="w+", dtype=np.float32, shape=shape
+    )
+
+
+# Writes the filtered rows straight into the (optionally disk-backed) matrix in
+# split order. Nulls are filled with the training means only, so nothing from
+# validation or test leaks into the imputation. Rows without an order date are
+# dropped, as they belong to no split.
+def build_feature_matrix(
+    df: pd.DataFrame,
+    features: Sequence[str] = FEATURES,
+    min_products: int = MIN_PRODUCTS,
+    fractions: Sequence[float] = SPLIT_FRACTIONS,
+    path: Optional[str] = None,
+    source: Optional[Dict[str, Any]] = None,
+) -> FeatureMatrix:
+    missing = [c for c in (*features, TARGET, ORDER_COLUMN, DATE_COLUMN) if c not in df]
+    if missing:
+        raise KeyError(f"Missing columns: {missing}")
+
+    dated = pd.to_datetime(df[DATE_COLUMN]).notna().to_numpy()
+    if not dated.all():
+        logger.warning(f"Dropping {(~dated).sum()} rows without {DATE_COLUMN}")
+    rows = np.flatnonzero(orders_with_min_products(df, min_products) & dated)
+    split = split_by_date(df[[ORDER_COLUMN, DATE_COLUMN]].iloc[rows], fractions)
+    order = np.argsort(split, kind="stable")
+    rows = rows[order]
+    bounds = np.searchsorted(split[order], np.arange(len(SPLITS) + 1))
+    n_train = bounds[1]
+
+    if path is not None:
+        os.makedirs(path, exist_ok=True)
+        # a half-written matrix must not look valid to get_feature_matrix
+        if os.path.isfile(os.path.join(path, "meta.json")):
+            os.remove(os.path.join(path, "meta.json"))
+    X = _allocate(path, "X", (len(rows), len(features)))
+    y = _allocate(path, "y", (len(rows),))
+    means = {}
+    for j, column in enumerate(features):
+        values = df[column].to_numpy(dtype=np.float32, na_value=np.nan)[rows]
+        mean = np.nanmean(values[:n_train]) if n_train else np.nan
+        means[column] = float(mean)
+        X[:, j] = np.where(np.isnan(values), np.float32(mean), values)
+    y[:] = df[TARGET].to_numpy(dtype=np.float32)[rows]
+
+    meta = {
+        "features": list(features),
+        "target": TARGET,
+        "min_products": min_products,
+        "fractions": list(fractions),
+        "split_weights": SPLIT_WEIGHTS,
+        "splits": {
+            name: [int(bounds[i]), int(bounds[i + 1])] for i, name in enumerate(SPLITS)
+        },
+        "train_means": means,
+        "source": source,
+    }
+    if path is not None:
+        X.flush()
+        y.flush()
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+    logger.info(
+        f"Feature matrix {X.shape}: "
+        + ", ".join(f"{n} {b - a}" for n, (a, b) in meta["splits"].items())
+    )
+    return FeatureMatrix(X, y, meta)
+
+
+# Reuses the matrix under path when it was built from the same feature frame
+# cache with the same parameters; otherwise builds it from the projected cache
+def get_feature_matrix(
+    cache_dir: str,
+    path: str,
+    features: Sequence[str] = FEATURES,
+    min_products: int = MIN_PRODUCTS,
+    fractions: Sequence[float] = SPLIT_FRACTIONS,
+) -> FeatureMatrix:
+    source = (read_meta(cache_dir) or {}).get("signature")
+    params = {
+        "features": list(features),
+        "min_products": min_products,
+        "fractions": list(fractions),
+        "split_weights": SPLIT_WEIGHTS,
+        "source": source,
+    }
+    meta_path = os.path.join(path, "meta.json")
+    if os.path.isfile(meta_path):
+        matrix = FeatureMatrix.load(path)
+        if {k: matrix.meta.get(k) for k in params} == params:
+            return matrix
+
+    df = load_feature_frame(cache_dir, [*features, TARGET, ORDER_COLUMN, DATE_COLUMN])
+    return build_feature_matrix(df, features, min_products, fractions, path, source)
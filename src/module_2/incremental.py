@@ -0,0 +1,182 @@
+import os
+import json
+import logging
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Optional
+
+from src.module_2.baskets import find_list_column, list_lengths
+from src.module_2.loader import DatasetLoader
+
+# Append-only refresh of the eda1 aggregates. Each dataset keeps mergeable
+# state on disk (row count, per-column count/mean/M2/min/max, basket size
+# histogram, rows per date) plus a created_at watermark; a refresh only reads
+# the rows newer than the watermark and folds them in. Rows are assumed to
+# arrive in created_at order: a late row at or before the watermark is skipped.
+logger = logging.getLogger(__name__)
+
+INCREMENTAL_DATASETS = ("orders", "abandoned_cart")
+STATE_FILE = "eda1_state.json"
+WATERMARK_COLUMN = "created_at"
+ITEMS_COLUMN = "n_items"
+
+
+def _merge_moments(a: Dict[str, float], b: Dict[str, float]) -> Dict[str, float]:
+    # Chan et al. pairwise update of count, mean and sum of squared deviations
+    if a["count"] == 0:
+        return dict(b)
+    if b["count"] == 0:
+        return dict(a)
+    count = a["count"] + b["count"]
+    delta = b["mean"] - a["mean"]
+    return {
+        "count": count,
+        "mean": a["mean"] + delta * b["count"] / count,
+        "m2": a["m2"] + b["m2"] + delta**2 * a["count"] * b["count"] / count,
+        "min": min(a["min"], b["min"]),
+        "max": max(a["max"], b["max"]),
+    }
+
+
+def _moments(values: np.ndarray) -> Dict[str, float]:
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return {"count": 0, "mean": 0.0, "m2": 0.0, "min": np.inf, "max": -np.inf}
+    mean = float(values.mean())
+    return {
+        "count": int(values.size),
+        "mean": mean,
+        "m2": float(((values - mean) ** 2).sum()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+    }
+
+
+def _merge_counts(a: Dict[str, int], b: Dict[str, int]) -> Dict[str, int]:
+    merged = dict(a)
+    for key, value in b.items():
+        merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+class AggregateState:
+    def __init__(self, state: Optional[Dict[str, Any]] = None) -> None:
+        state = state or {}
+        self.watermark: Optional[str] = state.get("watermark")
+        self.rows: int = state.get("rows", 0)
+        self.numeric: Dict[str, Dict[str, float]] = state.get("numeric", {})
+        self.items: Dict[str, int] = state.get("items", {})
+        self.per_date: Dict[str, int] = state.get("per_date", {})
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "AggregateState":
+        state = cls()
+        if df.empty:
+            return state
+        numeric = {
+            column: _moments(df[column].to_numpy(dtype=np.float64, na_value=np.nan))
+            for column in df.select_dtypes(include="number").columns
+        }
+        list_column = find_list_column(df)
+        if list_column is not None:
+            lengths = list_lengths(df[list_column])
+            numeric[ITEMS_COLUMN] = _moments(lengths.astype(np.float64))
+            sizes, counts = np.unique(lengths, return_counts=True)
+            state.items = {str(s): int(c) for s, c in zip(sizes, counts)}
+        created_at = pd.to_datetime(df[WATERMARK_COLUMN])
+        dates = created_at.dt.strftime("%Y-%m-%d").value_counts()
+        state.per_date = {date: int(n) for date, n in dates.items()}
+        state.numeric = numeric
+        state.rows = len(df)
+        state.watermark = created_at.max().isoformat()
+        return state
+
+    def merge(self, other: "AggregateState") -> "AggregateState":
+        merged = AggregateState(self.to_dict())
+        for column, moments in other.numeric.items():
+            merged.numeric[column] = (
+                _merge_moments(self.numeric[column], moments)
+                if column in self.numeric
+                else dict(moments)
+            )
+        merged.items = _merge_counts(self.items, other.items)
+        merged.per_date = _merge_counts(self.per_date, other.per_date)
+        merged.rows = self.rows + other.rows
+        watermarks = [w for w in (self.watermark, other.watermark) if w is not None]
+        merged.watermark = max(watermarks, key=pd.Timestamp) if watermarks else None
+        return merged
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "watermark": self.watermark,
+            "rows": self.rows,
+            "numeric": {c: dict(m) for c, m in self.numeric.items()},
+            "items": dict(self.items),
+            "per_date": dict(self.per_date),
+        }
+
+    def describe(self) -> pd.DataFrame:
+        rows = {}
+        for column, m in self.numeric.items():
+            std = np.sqrt(m["m2"] / (m["count"] - 1)) if m["count"] > 1 else np.nan
+            rows[column] = {
+                "count": m["count"],
+                "mean": m["mean"] if m["count"] else np.nan,
+                "std": std,
+                "min": m["min"] if m["count"] else np.nan,
+                "max": m["max"] if m["count"] else np.nan,
+            }
+        return pd.DataFrame(rows)
+
+    def by_date(self) -> pd.Series:
+        series = pd.Series(self.per_date, dtype="int64").sort_index()
+        series.index = pd.to_datetime(series.index).date
+        return series.rename_axis("date")
+
+    def item_histogram(self) -> pd.Series:
+        series = pd.Series(self.items, dtype="int64")
+        series.index = series.index.astype(int)
+        return series.sort_index().rename_axis(ITEMS_COLUMN)
+
+
+def state_path(data_dir: str = ".") -> str:
+    return os.path.join(data_dir, STATE_FILE)
+
+
+def load_state(path: str) -> Dict[str, AggregateState]:
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as f:
+        return {name: AggregateState(s) for name, s in json.load(f).items()}
+
+
+def save_state(states: Dict[str, AggregateState], path: str) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({name: s.to_dict() for name, s in states.items()}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# Folds the rows newer than each dataset's watermark into the stored state;
+# returns the refreshed states and logs how many rows were new
+def refresh(
+    data_dir: str = ".", path: Optional[str] = None
+) -> Dict[str, AggregateState]:
+    path = path or state_path(data_dir)
+    states = load_state(path)
+    loader = DatasetLoader(data_dir, categorical_ids=False)
+    for name in INCREMENTAL_DATASETS:
+        state = states.get(name, AggregateState())
+        filters = (
+            [(WATERMARK_COLUMN, ">", pd.Timestamp(state.watermark))]
+            if state.watermark is not None
+            else None
+        )
+        new_rows = loader.load(name, filters=filters)
+        states[name] = state.merge(AggregateState.from_frame(new_rows))
+        logger.info(
+            f"{name}: {len(new_rows)} new rows, "
+            f"{states[name].rows} total, watermark {states[name].watermark}"
+        )
+    save_state(states, path)
+    return states
@@ -0,0 +1,95 @@
+import logging
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from typing import Tuple
+
+from src.module_2.abandonment import UNKNOWN
+from src.module_2.baskets import MISSING, BasketIndex, lookup_codes
+
+# Inventory as an item dimension: variant ids are sorted once and an item's
+# dense code is its position, so price, compare_at_price, vendor and
+# product_type live in arrays aligned with the codes. Basket items are mapped
+# to codes with one searchsorted; every per-order metric is then a gather plus
+# a bincount (or a sparse matrix), with no merge on exploded lists.
+logger = logging.getLogger(__name__)
+
+
+class ItemDimension:
+    def __init__(self, inventory: pd.DataFrame) -> None:
+        inventory = inventory.drop_duplicates("variant_id").sort_values("variant_id")
+        self.variant_ids = inventory["variant_id"].to_numpy(dtype=np.int64)
+        self.price = inventory["price"].to_numpy(dtype=np.float64)
+        self.compare_at_price = inventory["compare_at_price"].to_numpy(dtype=np.float64)
+        # missing labels become their own UNKNOWN group instead of code -1
+        self.vendor_codes, self.vendors = pd.factorize(
+            inventory["vendor"].astype(object).fillna(UNKNOWN), sort=True
+        )
+        self.type_codes, self.product_types = pd.factorize(
+            inventory["product_type"].astype(object).fillna(UNKNOWN), sort=True
+        )
+
+    def __len__(self) -> int:
+        return len(self.variant_ids)
+
+    def codes(self, variant_ids: np.ndarray) -> np.ndarray:
+        # Dense item code per variant id, MISSING when not in the inventory
+        return lookup_codes(self.variant_ids, variant_ids)
+
+    def basket_codes(self, index: BasketIndex) -> Tuple[np.ndarray, np.ndarray]:
+        # (basket row, item code) for every basket position found in inventory
+        codes = self.codes(index.items)
+        found = codes != MISSING
+        return index.item_rows_per_position()[found], codes[found]
+
+    def missing_items(self, index: BasketIndex) -> pd.Series:
+        codes = self.codes(index.items)
+        ids, counts = np.unique(index.items[codes == MISSING], return_counts=True)
+        missing = pd.Series(
+            counts, index=pd.Index(ids, name="variant_id"), name="count"
+        )
+        logger.info(
+            f"{len(missing)} of {len(np.unique(index.items))} distinct items "
+            f"({missing.sum()} of {len(codes)} basket positions) are not in inventory"
+        )
+        return missing.sort_values(ascending=False, kind="stable")
+
+    def basket_value(self, index: BasketIndex) -> pd.DataFrame:
+        rows, codes = self.basket_codes(index)
+        n = len(index)
+        return pd.DataFrame(
+            {
+                "value": np.bincount(rows, weights=self.price[codes], minlength=n),
+                "full_price_value": np.bincount(
+                    rows, weights=self.compare_at_price[codes], minlength=n
+                ),
+                "priced_items": np.bincount(rows, minlength=n),
+                "items": index.basket_sizes(),
+            },
+            index=pd.Index(np.asarray(index.order_ids), name="order_id"),
+        )
+
+    def _share_matrix(
+        self, index: BasketIndex, group_codes: np.ndarray, n_groups: int
+    ) -> sparse.csr_matrix:
+        # orders x groups, each row normalised to the order's priced items
+        rows, codes = self.basket_codes(index)
+        counts = sparse.coo_matrix(
+            (np.ones(len(rows)), (rows, group_codes[codes])),
+            shape=(len(index), n_groups),
+        ).tocsr()
+        totals = np.asarray(counts.sum(axis=1)).ravel()
+        scale = np.divide(1.0, totals, out=np.zeros_like(totals), where=totals > 0)
+        return (sparse.diags(scale) @ counts).tocsr()
+
+    def category_mix(
+        self, index: BasketIndex
+    ) -> Tuple[sparse.csr_matrix, np.ndarray, pd.Index]:
+        matrix = self._share_matrix(index, self.type_codes, len(self.product_types))
+        return matrix, np.asarray(index.order_ids), self.product_types
+
+    def vendor_share(
+        self, index: BasketIndex
+    ) -> Tuple[sparse.csr_matrix, np.ndarray, pd.Index]:
+        matrix = self._share_matrix(index, self.vendor_codes, len(self.vendors))
+        return matrix, np.asarray(index.order_ids), self.vendors
@@ -0,0 +1,110 @@
+import os
+import logging
+import pandas as pd
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+# Parquet loader that pushes column projection and row filters down to pyarrow
+# and caches each (dataset, columns, filters) combination on first access.
+logger = logging.getLogger(__name__)
+
+DATASETS = ("orders", "regulars", "abandoned_cart", "inventory", "users")
+CATEGORICAL_COLUMNS = (
+    "user_id",
+    "user_segment",
+    "user_nuts1",
+    "vendor",
+    "product_type",
+)
+DTYPE_BACKENDS = (None, "numpy_nullable", "pyarrow")
+
+Filters = List[Tuple[str, str, Any]]
+
+
+def date_filter(
+    column: str = "created_at", start: Any = None, end: Any = None
+) -> Filters:
+    # Half-open [start, end) range usable as a parquet filter
+    filters: Filters = []
+    if start is not None:
+        filters.append((column, ">=", pd.Timestamp(start)))
+    if end is not None:
+        filters.append((column, "<", pd.Timestamp(end)))
+    return filters
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class DatasetLoader:
+    def __init__(
+        self,
+        data_dir: str = ".",
+        dtype_backend: Optional[str] = None,
+        categorical_ids: bool = True,
+    ) -> None:
+        if dtype_backend not in DTYPE_BACKENDS:
+            raise ValueError(f"dtype_backend must be one of {DTYPE_BACKENDS}")
+        self.data_dir = data_dir
+        self.dtype_backend = dtype_backend
+        self.categorical_ids = categorical_ids
+        self._cache: Dict[Hashable, pd.DataFrame] = {}
+
+    def path(self, name: str) -> str:
+        if name not in DATASETS:
+            raise KeyError(f"Unknown dataset {name!r}")
+        return os.path.join(self.data_dir, f"{name}.parquet")
+
+    def columns(self, name: str) -> List[str]:
+        import pyarrow.parquet as pq
+
+        return [
+            column
+            for column in pq.ParquetDataset(self.path(name)).schema.names
+            if not column.startswith("__index_level_")
+        ]
+
+    def load(
+        self,
+        name: str,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[Filters] = None,
+    ) -> pd.DataFrame:
+        key = (name, _freeze(columns), _freeze(filters))
+        if key not in self._cache:
+            self._cache[key] = self._read(name, columns, filters)
+        return self._cache[key]
+
+    def _read(
+        self,
+        name: str,
+        columns: Optional[Sequence[str]],
+        filters: Optional[Filters],
+    ) -> pd.DataFrame:
+        wanted = list(columns) if columns is not None else self.columns(name)
+        kwargs: Dict[str, Any] = {}
+        if self.categorical_ids:
+            # Dictionary-encoded on read: arrives in pandas as category
+            kwargs["read_dictionary"] = [c for c in wanted if c in CATEGORICAL_COLUMNS]
+        if self.dtype_backend is not None:
+            kwargs["dtype_backend"] = self.dtype_backend
+        df = pd.read_parquet(
+            self.path(name),
+            engine="pyarrow",
+            columns=list(columns) if columns is not None else None,
+            filters=filters or None,
+            **kwargs,
+        )
+        logger.info(f"Loaded {name}: {df.shape} ({df.memory_usage(deep=True).sum()} B)")
+        return df
+
+    def __getattr__(self, name: str) -> pd.DataFrame:
+        # loader.orders & co.: the full dataset, loaded on first access
+        if name in DATASETS:
+            return self.load(name)
+        raise AttributeError(name)
+
+    def clear(self) -> None:
+        self._cache.clear()
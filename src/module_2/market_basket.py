@@ -0,0 +1,130 @@
+import math
+import logging
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from typing import Optional, Tuple
+
+from src.module_2.baskets import BasketIndex
+
+# Market-basket analysis on sparse matrices. Baskets become a binary
+# baskets x items CSR matrix straight from the BasketIndex arrays, and pair
+# counts come from B.T @ B, so pairs are never enumerated in Python. Items
+# below the support threshold are dropped first: a pair can never be more
+# frequent than its least frequent item, so this bounds the product size.
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = 50_000
+
+
+def basket_matrix(index: BasketIndex) -> Tuple[sparse.csr_matrix, np.ndarray]:
+    codes = np.searchsorted(index.item_ids, index.items)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(codes), dtype=np.int32), codes, np.asarray(index.offsets)),
+        shape=(len(index), len(index.item_ids)),
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1  # an item repeated in a basket counts once
+    return matrix, np.asarray(index.item_ids)
+
+
+def user_item_matrix(
+    index: BasketIndex, user_ids: pd.Series
+) -> Tuple[sparse.csr_matrix, pd.Index, np.ndarray]:
+    # users x items purchase counts; user_ids is aligned with the basket rows,
+    # and baskets without a user (factorized to -1) are left out
+    user_codes, users = pd.factorize(user_ids, sort=True)
+    rows = user_codes[index.item_rows_per_position()]
+    known = rows >= 0
+    rows = rows[known]
+    codes = np.searchsorted(index.item_ids, index.items[known])
+    matrix = sparse.coo_matrix(
+        (np.ones(len(codes), dtype=np.int32), (rows, codes)),
+        shape=(len(users), len(index.item_ids)),
+    ).tocsr()
+    return matrix, pd.Index(users, name="user_id"), np.asarray(index.item_ids)
+
+
+def co_occurrence_matrix(
+    baskets: sparse.csr_matrix, block_size: int = BLOCK_SIZE
+) -> sparse.csr_matrix:
+    # item x item basket counts, accumulated over row blocks of baskets
+    result = sparse.csr_matrix((baskets.shape[1], baskets.shape[1]), dtype=np.int64)
+    for start in range(0, baskets.shape[0], block_size):
+        block = baskets[start : start + block_size].astype(np.int64)
+        result = result + (block.T @ block).tocsr()
+    return result
+
+
+def frequent_pairs(
+    index: BasketIndex,
+    min_support: float = 0.01,
+    block_size: int = BLOCK_SIZE,
+) -> pd.DataFrame:
+    baskets, item_ids = basket_matrix(index)
+    n_baskets = baskets.shape[0]
+    min_count = max(1, math.ceil(min_support * n_baskets))
+
+    item_counts = np.asarray(baskets.sum(axis=0)).ravel()
+    keep = np.flatnonzero(item_counts >= min_count)
+    baskets = baskets[:, keep]
+    counts = co_occurrence_matrix(baskets, block_size)
+
+    pairs = sparse.triu(counts, k=1).tocoo()
+    frequent = pairs.data >= min_count
+    a, b, pair_count = pairs.row[frequent], pairs.col[frequent], pairs.data[frequent]
+    logger.info(
+        f"{len(keep)} frequent items, {frequent.sum()} frequent pairs "
+        f"(min count {min_count} of {n_baskets} baskets)"
+    )
+    return pd.DataFrame(
+        {
+            "item_a": item_ids[keep][a],
+            "item_b": item_ids[keep][b],
+            "count": pair_count,
+            "count_a": item_counts[keep][a],
+            "count_b": item_counts[keep][b],
+            "n_baskets": n_baskets,
+        }
+    )
+
+
+# Both rule directions (a -> b and b -> a) for every frequent pair
+def association_rules(
+    index: BasketIndex,
+    min_support: float = 0.01,
+    min_confidence: float = 0.0,
+    min_lift: Optional[float] = None,
+) -> pd.DataFrame:
+    pairs = frequent_pairs(index, min_support)
+    forward = pairs.rename(
+        columns={
+            "item_a": "antecedent",
+            "item_b": "consequent",
+            "count_a": "count_antecedent",
+            "count_b": "count_consequent",
+        }
+    )
+    backward = pairs.rename(
+        columns={
+            "item_b": "antecedent",
+            "item_a": "consequent",
+            "count_b": "count_antecedent",
+            "count_a": "count_consequent",
+        }
+    )
+    rules = pd.concat([forward, backward[forward.columns]], ignore_index=True)
+
+    n = rules["n_baskets"].astype(np.float64)
+    rules["support"] = rules["count"] / n
+    rules["confidence"] = rules["count"] / rules["count_antecedent"]
+    rules["lift"] = rules["support"] / (
+        (rules["count_antecedent"] / n) * (rules["count_consequent"] / n)
+    )
+    mask = rules["confidence"] >= min_confidence
+    if min_lift is not None:
+        mask &= rules["lift"] >= min_lift
+    rules = rules[mask].drop(columns="n_baskets")
+    return rules.sort_values(["lift", "support"], ascending=False).reset_index(
+        drop=True
+    )
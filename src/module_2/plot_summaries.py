@@ -0,0 +1,187 @@
+import logging
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Hashable, Optional, Sequence, Union
+
+from src.module_2.compute import SEED, ComputeBackend, as_backend
+
+# Aggregate-first plotting for eda2. Every figure is drawn from a small
+# summary (counts, box statistics, histogram bins, KDE curve) computed once per
+# PlotSummaries object and memoized, so re-plotting with other styling does not
+# touch the data again. The KDE is evaluated on a fine histogram through an FFT
+# convolution: O(bins log bins) instead of O(rows) per evaluation point.
+logger = logging.getLogger(__name__)
+
+KDE_GRID = 1000
+HISTOGRAM_BINS = 50
+KDE_CUT = 4.0  # kernel truncated at KDE_CUT bandwidths
+
+
+def scott_bandwidth(counts: np.ndarray, centers: np.ndarray) -> float:
+    n = counts.sum()
+    if n < 2:
+        return 0.0
+    mean = (counts * centers).sum() / n
+    std = np.sqrt((counts * (centers - mean) ** 2).sum() / (n - 1))
+    return float(std * n ** (-1 / 5))
+
+
+# Gaussian KDE on the grid of a fixed-width histogram; returns a density
+def binned_kde(
+    counts: np.ndarray, edges: np.ndarray, bandwidth: Optional[float] = None
+) -> np.ndarray:
+    counts = np.asarray(counts, dtype=np.float64)
+    width = edges[1] - edges[0]
+    n = counts.sum()
+    if n == 0 or width <= 0:
+        return np.zeros_like(counts)
+    centers = (edges[:-1] + edges[1:]) / 2
+    bandwidth = scott_bandwidth(counts, centers) if bandwidth is None else bandwidth
+    sigma = bandwidth / width
+    if sigma <= 0:
+        return counts / (n * width)
+
+    half = int(np.ceil(KDE_CUT * sigma))
+    offsets = np.arange(-half, half + 1)
+    kernel = np.exp(-0.5 * (offsets / sigma) ** 2)
+    kernel /= kernel.sum()
+    # zero padding to a power of two avoids the circular wrap-around
+    size = 1 << int(np.ceil(np.log2(len(counts) + len(kernel) - 1)))
+    smoothed = np.fft.irfft(
+        np.fft.rfft(counts, size) * np.fft.rfft(kernel, size), size
+    )[half : half + len(counts)]
+    return np.clip(smoothed, 0, None) / (n * width)
+
+
+class PlotSummaries:
+    def __init__(
+        self,
+        data: Union[pd.DataFrame, ComputeBackend],
+        sample_size: Optional[int] = None,
+        seed: int = SEED,
+    ) -> None:
+        backend = as_backend(data)
+        if sample_size is not None:
+            rows = backend.num_rows()
+            if rows > sample_size:
+                backend = backend.sampled(sample_size / rows, seed)
+                logger.info(f"Summaries computed on a ~{sample_size}/{rows} sample")
+        self.backend = backend
+        self._cache: Dict[Hashable, Any] = {}
+
+    # Pickled without the backend: a copy shipped to another process keeps the
+    # memoized summaries only, so it can be plotted but not asked for new ones
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"backend": None, "_cache": self._cache}
+
+    def _memo(self, key: Hashable, compute) -> Any:
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def columns(self) -> Sequence[str]:
+        return self._memo(("columns",), self.backend.columns)
+
+    def counts(self, by: Sequence[str]) -> pd.DataFrame:
+        return self._memo(("counts", tuple(by)), lambda: self.backend.counts(by))
+
+    def box_stats(self, column: str, by: Sequence[str] = ("outcome",)) -> pd.DataFrame:
+        return self._memo(
+            ("box", column, tuple(by)), lambda: self.backend.box_stats(column, by)
+        )
+
+    def fine_histogram(self, column: str) -> pd.DataFrame:
+        return self._memo(
+            ("histogram", column, KDE_GRID),
+            lambda: self.backend.histogram(column, KDE_GRID),
+        )
+
+    # Coarser histograms are re-binned from the fine one when the bin count
+    # divides the grid, so the histogram and its KDE share one scan
+    def histogram(self, column: str, bins: int = HISTOGRAM_BINS) -> pd.DataFrame:
+        if KDE_GRID % bins:
+            return self._memo(
+                ("histogram", column, bins),
+                lambda: self.backend.histogram(column, bins),
+            )
+        fine = self.fine_histogram(column)
+        step = KDE_GRID // bins
+        return pd.DataFrame(
+            {
+                "left": fine["left"].to_numpy()[::step],
+                "right": fine["right"].to_numpy()[step - 1 :: step],
+                "count": fine["count"].to_numpy().reshape(bins, step).sum(axis=1),
+            }
+        )
+
+    def kde(self, column: str, bandwidth: Optional[float] = None) -> pd.DataFrame:
+        def compute() -> pd.DataFrame:
+            fine = self.fine_histogram(column)
+            edges = np.append(fine["left"].to_numpy(), fine["right"].iloc[-1])
+            return pd.DataFrame(
+                {
+                    "x": (edges[:-1] + edges[1:]) / 2,
+                    "density": binned_kde(fine["count"].to_numpy(), edges, bandwidth),
+                }
+            )
+
+        return self._memo(("kde", column, bandwidth), compute)
+
+
+def as_summaries(
+    data: Union[pd.DataFrame, ComputeBackend, PlotSummaries],
+) -> PlotSummaries:
+    return data if isinstance(data, PlotSummaries) else PlotSummaries(data)
+
+
+def plot_counts(
+    counts: pd.DataFrame,
+    x: str,
+    hue: Optional[str] = None,
+    ax: Any = None,
+    **style: Any,
+) -> Any:
+    import matplotlib.pyplot as plt
+
+    ax = ax or plt.subplots(figsize=(10, 6))[1]
+    if hue:
+        table = counts.pivot(index=x, columns=hue, values="count")
+        table.plot.bar(ax=ax, rot=0, **style)
+    else:
+        ax.bar(counts[x].astype(str), counts["count"], **style)
+    ax.set_ylabel("Frequency")
+    return ax
+
+
+def plot_box(stats: pd.DataFrame, by: str, ax: Any = None, **style: Any) -> Any:
+    import matplotlib.pyplot as plt
+
+    boxes = [
+        {
+            "label": str(row[by]),
+            **{k: row[k] for k in ("whislo", "q1", "med", "q3", "whishi")},
+        }
+        for _, row in stats.iterrows()
+    ]
+    ax = ax or plt.subplots(figsize=(10, 6))[1]
+    ax.bxp(boxes, showfliers=False, **style)
+    return ax
+
+
+# Histogram bars in counts, with the KDE scaled to the same units
+def plot_histogram(
+    hist: pd.DataFrame,
+    kde: Optional[pd.DataFrame] = None,
+    ax: Any = None,
+    **style: Any,
+) -> Any:
+    import matplotlib.pyplot as plt
+
+    edges = np.append(hist["left"].to_numpy(), hist["right"].iloc[-1])
+    ax = ax or plt.subplots(figsize=(10, 6))[1]
+    ax.stairs(hist["count"].to_numpy(), edges, fill=True, alpha=0.5, **style)
+    if kde is not None:
+        scale = hist["count"].sum() * (edges[1] - edges[0])
+        ax.plot(kde["x"], kde["density"] * scale)
+    ax.set_ylabel("Frequency")
+    return ax
@@ -0,0 +1,164 @@
+import json
+import logging
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+# Profiling engine: every column is visited once to get its dtype, nulls,
+# approximate distinct count, numeric summary and a 64-bit hash per row. The
+# column hashes are combined into row hashes for duplicate detection, so list
+# columns such as item_ids no longer break df.duplicated().
+logger = logging.getLogger(__name__)
+
+HLL_PRECISION = 14
+EXACT_DISTINCT_LIMIT = 100_000
+MAX_WORKERS = 5
+
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_MASK = (1 << 64) - 1
+_NULL_LIST_HASH = np.uint64(0x5BD1E9955BD1E995)
+
+
+def approx_distinct(hashes: np.ndarray, precision: int = HLL_PRECISION) -> int:
+    # HyperLogLog over precomputed 64-bit hashes
+    if hashes.size == 0:
+        return 0
+    m = 1 << precision
+    h = hashes.astype(np.uint64, copy=False)
+    index = (h >> np.uint64(64 - precision)).astype(np.intp)
+    rest = h << np.uint64(precision)
+    rank = np.full(h.shape, 64 - precision + 1, dtype=np.uint8)
+    nonzero = rest != 0
+    # leading zeros + 1 == 64 - floor(log2(rest))
+    rank[nonzero] = 64 - np.floor(np.log2(rest[nonzero].astype(np.float64)))
+    registers = np.zeros(m, dtype=np.uint8)
+    np.maximum.at(registers, index, rank)
+
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+    empty = np.count_nonzero(registers == 0)
+    if estimate <= 2.5 * m and empty:
+        estimate = m * np.log(m / empty)  # small-range correction
+    return int(round(estimate))
+
+
+def _is_list_column(series: pd.Series) -> bool:
+    if series.dtype != object:
+        return False
+    non_null = series.dropna()
+    return not non_null.empty and isinstance(
+        non_null.iloc[0], (list, tuple, np.ndarray)
+    )
+
+
+def _hash_list_column(series: pd.Series) -> np.ndarray:
+    # Order-sensitive hash per list, computed on the flattened arrow values
+    array = pa.array(series, from_pandas=True)
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    offsets = np.asarray(array.offsets, dtype=np.int64)
+    values = array.values.slice(offsets[0], offsets[-1] - offsets[0])
+    offsets = offsets - offsets[0]
+    lengths = np.diff(offsets)
+
+    flat = pd.util.hash_array(values.to_numpy(zero_copy_only=False))
+    position = np.arange(len(flat), dtype=np.uint64) - np.repeat(
+        offsets[:-1], lengths
+    ).astype(np.uint64)
+    mixed = flat ^ ((position + np.uint64(1)) * _MIX)
+    cumulative = np.concatenate([[np.uint64(0)], np.cumsum(mixed, dtype=np.uint64)])
+    row = cumulative[offsets[1:]] - cumulative[offsets[:-1]]
+    row = row ^ pd.util.hash_array(lengths)
+    row[np.asarray(array.is_null())] = _NULL_LIST_HASH
+    return row
+
+
+def hash_column(series: pd.Series) -> np.ndarray:
+    if _is_list_column(series):
+        return _hash_list_column(series)
+    return pd.util.hash_pandas_object(series, index=False).to_numpy()
+
+
+def _numeric_summary(series: pd.Series) -> Dict[str, Any]:
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return {}
+    q25, q50, q75 = np.percentile(values, [25, 50, 75])
+    return {
+        "mean": float(values.mean()),
+        "std": float(values.std(ddof=1)) if values.size > 1 else float("nan"),
+        "min": float(values.min()),
+        "25%": float(q25),
+        "50%": float(q50),
+        "75%": float(q75),
+        "max": float(values.max()),
+    }
+
+
+# Returns the column profile and its per-row hashes (reused for duplicates)
+def profile_column(series: pd.Series) -> Tuple[Dict[str, Any], np.ndarray]:
+    hashes = hash_column(series)
+    nulls = series.isna().to_numpy()
+    null_count = int(nulls.sum())
+    non_null = hashes if null_count == 0 else hashes[~nulls]
+    distinct = (
+        int(np.unique(non_null).size)
+        if non_null.size <= EXACT_DISTINCT_LIMIT
+        else approx_distinct(non_null)
+    )
+    profile: Dict[str, Any] = {
+        "column": series.name,
+        "dtype": str(series.dtype),
+        "null_count": null_count,
+        "null_pct": null_count / len(series) if len(series) else 0.0,
+        "distinct": distinct,
+    }
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        profile.update(_numeric_summary(series))
+    elif pd.api.types.is_datetime64_any_dtype(series):
+        profile.update({"min": str(series.min()), "max": str(series.max())})
+    return profile, hashes
+
+
+def profile_dataset(df: pd.DataFrame, name: str) -> Dict[str, Any]:
+    columns = []
+    row_hashes = np.zeros(len(df), dtype=np.uint64)
+    for i, column in enumerate(df.columns):
+        profile, hashes = profile_column(df[column])
+        columns.append(profile)
+        row_hashes ^= hashes * np.uint64((2 * i + 1) * int(_MIX) & _MASK)
+    duplicate_rows = len(df) - np.unique(row_hashes).size if len(df) else 0
+    return {
+        "dataset": name,
+        "rows": len(df),
+        "columns": columns,
+        "duplicate_rows": int(duplicate_rows),
+        "memory_bytes": int(df.memory_usage(deep=False).sum()),
+    }
+
+
+# Profiles every dataset in parallel; returns {name: dataset profile}
+def profile_datasets(
+    frames: Dict[str, pd.DataFrame], max_workers: Optional[int] = MAX_WORKERS
+) -> Dict[str, Dict[str, Any]]:
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            name: pool.submit(profile_dataset, df, name) for name, df in frames.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+
+def report_frame(report: Dict[str, Dict[str, Any]]) -> pd.DataFrame:
+    rows: List[Dict[str, Any]] = [
+        {"dataset": name, **column}
+        for name, profile in report.items()
+        for column in profile["columns"]
+    ]
+    return pd.DataFrame(rows).set_index(["dataset", "column"])
+
+
+def report_json(report: Dict[str, Dict[str, Any]]) -> str:
+    return json.dumps(report, indent=2, default=str, allow_nan=True)
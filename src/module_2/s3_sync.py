@@ -0,0 +1,134 @@
+import os
+import json
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from src.instrumentation import instrument
+from src.module_2.aws import BUCKET_NAME, get_s3_client
+
+# Incremental S3 -> local sync. A JSON manifest next to the files remembers the
+# ETag/size/LastModified of each downloaded object, so reruns only transfer
+# objects that changed (or whose local copy is missing or truncated).
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = ".s3_manifest.json"
+MAX_WORKERS = 5
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+MULTIPART_CONCURRENCY = 4
+
+DOWNLOADED = "downloaded"
+UP_TO_DATE = "up_to_date"
+FAILED = "failed"
+
+
+def load_manifest(path: str) -> Dict[str, Dict[str, Any]]:
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable manifest {path}: {e}")
+        return {}
+
+
+def _atomic_write_json(path: str, data: Dict[str, Any]) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _remote_state(head: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "etag": head["ETag"].strip('"'),
+        "size": head["ContentLength"],
+        "last_modified": head["LastModified"].isoformat(),
+    }
+
+
+def needs_refresh(
+    local_path: str, remote: Dict[str, Any], known: Optional[Dict[str, Any]]
+) -> bool:
+    if not os.path.isfile(local_path) or known is None:
+        return True
+    if os.path.getsize(local_path) != remote["size"]:
+        return True  # truncated or modified locally
+    return any(
+        known.get(field) != remote[field] for field in ("etag", "size", "last_modified")
+    )
+
+
+@instrument(measure=lambda _, *args: {"bytes": args[-1]})
+def _download(client: Any, bucket: str, key: str, local_path: str, size: int) -> None:
+    from boto3.s3.transfer import TransferConfig
+
+    config = TransferConfig(
+        multipart_threshold=MULTIPART_THRESHOLD,
+        multipart_chunksize=MULTIPART_CHUNKSIZE,
+        max_concurrency=MULTIPART_CONCURRENCY,
+    )
+    directory = os.path.dirname(local_path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+    os.close(fd)
+    try:
+        client.download_file(bucket, key, tmp_path, Config=config)
+        if os.path.getsize(tmp_path) != size:
+            raise IOError(
+                f"Size mismatch for {key}: {os.path.getsize(tmp_path)} != {size}"
+            )
+        os.replace(tmp_path, local_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+# Syncs {local file name: s3 key} into data_dir and returns a status per file
+def sync_objects(
+    objects: Dict[str, str],
+    data_dir: str = ".",
+    bucket_name: str = BUCKET_NAME,
+    client: Any = None,
+    max_workers: int = MAX_WORKERS,
+    manifest_file: str = MANIFEST_FILE,
+) -> Dict[str, str]:
+    client = client if client is not None else get_s3_client()
+    os.makedirs(data_dir, exist_ok=True)
+    manifest_path = os.path.join(data_dir, manifest_file)
+    manifest = load_manifest(manifest_path)
+    lock = threading.Lock()
+
+    def sync_one(file_name: str, s3_key: str) -> str:
+        local_path = os.path.join(data_dir, file_name)
+        remote = _remote_state(client.head_object(Bucket=bucket_name, Key=s3_key))
+        if not needs_refresh(local_path, remote, manifest.get(file_name)):
+            logger.info(f"The file {local_path} is up to date.")
+            return UP_TO_DATE
+        _download(client, bucket_name, s3_key, local_path, remote["size"])
+        logger.info(f"Downloaded {s3_key} to {local_path}")
+        with lock:
+            manifest[file_name] = {"key": s3_key, **remote}
+            _atomic_write_json(manifest_path, manifest)
+        return DOWNLOADED
+
+    statuses: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            name: pool.submit(sync_one, name, key) for name, key in objects.items()
+        }
+        for name, future in futures.items():
+            try:
+                statuses[name] = future.result()
+            except Exception as e:
+                logger.error(f"Error syncing {objects[name]}: {e}")
+                statuses[name] = FAILED
+    return statuses
@@ -0,0 +1,188 @@
+import os
+import json
+import logging
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.module_2.baskets import LIST_COLUMNS, find_list_column, list_lengths
+from src.module_2.loader import DatasetLoader
+
+# Per-user RFM and repurchase features, keyed by user_id. User ids are turned
+# into integer codes once; orders are aggregated in a single groupby over those
+# codes and regulars/abandoned carts are counted with bincount, so no merge is
+# needed. The table is stored as Parquet with the build watermark in its
+# metadata: a refresh recomputes only the users with rows past the watermark.
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = "user_features.parquet"
+METADATA_KEY = b"user_features"
+SOURCES = ("orders", "regulars", "abandoned_cart")
+USER_FEATURES = [
+    "n_orders",
+    "first_order_at",
+    "last_order_at",
+    "recency_days",
+    "cadence_days",
+    "mean_basket_size",
+    "n_regulars",
+    "n_abandoned_carts",
+]
+
+
+def _codes(user_ids: pd.Series, index: pd.Index) -> np.ndarray:
+    codes = index.get_indexer(user_ids.astype(str))
+    if (codes < 0).any():
+        raise KeyError(f"{(codes < 0).sum()} rows reference unknown user_ids")
+    return codes
+
+
+def _orders_list_column(loader: DatasetLoader) -> List[str]:
+    names = loader.columns("orders")
+    return [c for c in LIST_COLUMNS if c in names][:1]
+
+
+def _touched_users(frames: Dict[str, pd.DataFrame]) -> np.ndarray:
+    return pd.unique(
+        np.concatenate([df["user_id"].astype(str).to_numpy() for df in frames.values()])
+    )
+
+
+def compute_user_features(
+    orders: pd.DataFrame,
+    regulars: pd.DataFrame,
+    abandoned_cart: pd.DataFrame,
+    user_ids: Optional[Sequence[str]] = None,
+    as_of: Any = None,
+) -> pd.DataFrame:
+    if user_ids is None:
+        user_ids = _touched_users(
+            {"orders": orders, "regulars": regulars, "abandoned_cart": abandoned_cart}
+        )
+    index = pd.Index(user_ids, name="user_id").astype(str)
+    as_of = pd.Timestamp(as_of) if as_of is not None else orders["created_at"].max()
+
+    list_column = find_list_column(orders)
+    per_order = pd.DataFrame(
+        {
+            "user": _codes(orders["user_id"], index),
+            "created_at": pd.to_datetime(orders["created_at"]),
+            "basket_size": (
+                list_lengths(orders[list_column]) if list_column else np.nan
+            ),
+        }
+    )
+    grouped = per_order.groupby("user").agg(
+        n_orders=("created_at", "size"),
+        first_order_at=("created_at", "min"),
+        last_order_at=("created_at", "max"),
+        mean_basket_size=("basket_size", "mean"),
+    )
+    features = grouped.reindex(np.arange(len(index)))
+    features.index = index
+    features["n_orders"] = features["n_orders"].fillna(0).astype("int64")
+
+    day = pd.Timedelta(days=1)
+    features["recency_days"] = (as_of - features["last_order_at"]) / day
+    span = (features["last_order_at"] - features["first_order_at"]) / day
+    features["cadence_days"] = span / (features["n_orders"] - 1).where(
+        features["n_orders"] > 1
+    )
+    features["n_regulars"] = np.bincount(
+        _codes(regulars["user_id"], index), minlength=len(index)
+    )
+    features["n_abandoned_carts"] = np.bincount(
+        _codes(abandoned_cart["user_id"], index), minlength=len(index)
+    )
+    return features[USER_FEATURES]
+
+
+def _watermark(frames: Dict[str, pd.DataFrame]) -> Optional[pd.Timestamp]:
+    maxima = [df["created_at"].max() for df in frames.values() if len(df)]
+    return max(maxima) if maxima else None
+
+
+class UserFeatureStore:
+    def __init__(self, path: str = DEFAULT_PATH) -> None:
+        self.path = path
+
+    def metadata(self) -> Optional[Dict[str, Any]]:
+        if not os.path.isfile(self.path):
+            return None
+        metadata = pq.read_schema(self.path).metadata or {}
+        return json.loads(metadata[METADATA_KEY]) if METADATA_KEY in metadata else None
+
+    def load(self) -> pd.DataFrame:
+        return pd.read_parquet(self.path)
+
+    def lookup(self, user_ids: Sequence[str]) -> pd.DataFrame:
+        return pd.read_parquet(
+            self.path, filters=[("user_id", "in", list(map(str, user_ids)))]
+        ).reindex(pd.Index(user_ids, name="user_id").astype(str))
+
+    def _write(self, features: pd.DataFrame, as_of: pd.Timestamp) -> None:
+        table = pa.Table.from_pandas(features)
+        metadata = {
+            **(table.schema.metadata or {}),
+            METADATA_KEY: json.dumps({"as_of": as_of.isoformat()}),
+        }
+        tmp_path = self.path + ".tmp"
+        pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+        os.replace(tmp_path, self.path)
+
+    def _read_sources(
+        self, loader: DatasetLoader, filters: Optional[List] = None
+    ) -> Dict[str, pd.DataFrame]:
+        columns = {
+            "orders": ["user_id", "created_at", *_orders_list_column(loader)],
+            "regulars": ["user_id", "created_at"],
+            "abandoned_cart": ["user_id", "created_at"],
+        }
+        return {name: loader.load(name, columns[name], filters) for name in SOURCES}
+
+    def build(self, data_dir: str = ".") -> pd.DataFrame:
+        loader = DatasetLoader(data_dir, categorical_ids=False)
+        frames = self._read_sources(loader)
+        # every known user, including those with no activity yet
+        users = loader.load("users", ["user_id"])
+        user_ids = _touched_users({"users": users, **frames})
+        as_of = _watermark(frames)
+        features = compute_user_features(*frames.values(), user_ids, as_of)
+        self._write(features, as_of)
+        logger.info(f"Built features for {len(features)} users as of {as_of}")
+        return features
+
+    # Only users with new orders, regulars or carts since the last build are
+    # recomputed (from their full history), along with users that signed up
+    # since then; everyone else just ages
+    def refresh(self, data_dir: str = ".") -> pd.DataFrame:
+        metadata = self.metadata()
+        if metadata is None:
+            return self.build(data_dir)
+        old_as_of = pd.Timestamp(metadata["as_of"])
+        loader = DatasetLoader(data_dir, categorical_ids=False)
+        since = [("created_at", ">", old_as_of)]
+        new_rows = {
+            name: loader.load(name, ["user_id", "created_at"], since)
+            for name in SOURCES
+        }
+        features = self.load()
+        users = loader.load("users", ["user_id"])
+        new_users = users[~users["user_id"].astype(str).isin(features.index)]
+        as_of = _watermark(new_rows)
+        if as_of is None and new_users.empty:
+            logger.info("User features are up to date")
+            return features
+        if as_of is None:
+            as_of = old_as_of
+
+        touched = _touched_users({"users": new_users, **new_rows})
+        history = self._read_sources(loader, [("user_id", "in", list(touched))])
+        updated = compute_user_features(*history.values(), touched, as_of)
+        features["recency_days"] += (as_of - old_as_of) / pd.Timedelta(days=1)
+        features = pd.concat([features.drop(updated.index, errors="ignore"), updated])
+        self._write(features, as_of)
+        logger.info(f"Recomputed features for {len(updated)} users as of {as_of}")
+        return features
@@ -0,0 +1,215 @@
+import logging
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Sequence, Tuple
+
+from src.module_1.meteo_cache import MeteoCache
+from src.module_1.module_1_meteo_api import (
+    MAX_WORKERS,
+    VARIABLES,
+    MeteoAPIError,
+    decode_daily,
+    fetch_daily_cached,
+    make_session,
+)
+from src.module_2.abandonment import UNKNOWN
+from src.module_2.loader import DatasetLoader
+
+# Daily weather of each user's region attached to orders and abandoned carts.
+# Rows are first reduced to their unique (region, day) keys, and each region's
+# own first-to-last day span is fetched once through the module_1 client and
+# MeteoCache, so the API only sees days that are not cached yet and never one
+# request per row. Days are UK local days (TIMEZONE), like the order timestamps.
+# The daily series are attached with one merge_asof per frame: a row gets the
+# weather of its region on its day, or of the latest earlier day within
+# MAX_STALENESS when that day is missing from the series.
+logger = logging.getLogger(__name__)
+
+REGION_COLUMN = "user_nuts1"
+DATE_COLUMN = "weather_date"
+MAX_STALENESS = pd.Timedelta(days=3)
+TIMEZONE = "Europe/London"
+# Approximate centroids of the UK NUTS 1 regions found in users.user_nuts1
+NUTS1_CENTROIDS = {
+    "UKC": {"latitude": 55.0, "longitude": -1.9},  # North East
+    "UKD": {"latitude": 54.0, "longitude": -2.6},  # North West
+    "UKE": {"latitude": 53.9, "longitude": -1.3},  # Yorkshire and the Humber
+    "UKF": {"latitude": 52.9, "longitude": -0.9},  # East Midlands
+    "UKG": {"latitude": 52.5, "longitude": -2.1},  # West Midlands
+    "UKH": {"latitude": 52.2, "longitude": 0.5},  # East of England
+    "UKI": {"latitude": 51.5, "longitude": -0.1},  # London
+    "UKJ": {"latitude": 51.3, "longitude": -0.6},  # South East
+    "UKK": {"latitude": 50.9, "longitude": -3.6},  # South West
+    "UKL": {"latitude": 52.3, "longitude": -3.7},  # Wales
+    "UKM": {"latitude": 56.8, "longitude": -4.2},  # Scotland
+    "UKN": {"latitude": 54.6, "longitude": -6.7},  # Northern Ireland
+}
+
+
+def row_regions(df: pd.DataFrame, users: pd.DataFrame) -> np.ndarray:
+    # Region of each row's user; UNKNOWN for unknown users or missing regions
+    users = users.drop_duplicates("user_id")
+    codes = pd.Index(users["user_id"].astype(str)).get_indexer(
+        df["user_id"].astype(str)
+    )
+    regions = users[REGION_COLUMN].astype(object).fillna(UNKNOWN).to_numpy()
+    return np.where(codes >= 0, regions[codes], UNKNOWN)
+
+
+def _row_days(df: pd.DataFrame, time_column: str) -> np.ndarray:
+    days = pd.to_datetime(df[time_column]).dt.floor("D")
+    return days.to_numpy(dtype="datetime64[ns]")
+
+
+def region_days(
+    frames: Sequence[pd.DataFrame],
+    users: pd.DataFrame,
+    time_column: str = "created_at",
+) -> pd.DataFrame:
+    keys = pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    REGION_COLUMN: row_regions(df, users),
+                    DATE_COLUMN: _row_days(df, time_column),
+                }
+            )
+            for df in frames
+        ]
+    )
+    # rows without a region or a timestamp get no weather (see attach_weather)
+    keys = keys[(keys[REGION_COLUMN] != UNKNOWN) & keys[DATE_COLUMN].notna()]
+    keys = keys.drop_duplicates()
+    return keys.sort_values([REGION_COLUMN, DATE_COLUMN], ignore_index=True)
+
+
+def _weather_frame(
+    regions: np.ndarray, days: np.ndarray, values: Dict[str, np.ndarray]
+) -> pd.DataFrame:
+    # The dtypes attach_weather joins on, also when no region got weather
+    return pd.DataFrame(
+        {
+            REGION_COLUMN: pd.Series(regions, dtype=str),
+            DATE_COLUMN: pd.Series(days, dtype="datetime64[ns]"),
+            **{v: pd.Series(x, dtype=np.float32) for v, x in values.items()},
+        }
+    )
+
+
+# One (region, day) row per fetched day, with a float32 column per variable
+def fetch_region_weather(
+    keys: pd.DataFrame,
+    centroids: Dict[str, Dict[str, float]] = NUTS1_CENTROIDS,
+    cache: Optional[MeteoCache] = None,
+    variables: Sequence[str] = VARIABLES,
+    max_workers: int = MAX_WORKERS,
+    timezone: str = TIMEZONE,
+) -> pd.DataFrame:
+    empty = _weather_frame([], [], {v: [] for v in variables})
+    spans = keys.groupby(REGION_COLUMN)[DATE_COLUMN].agg(["min", "max"])
+    unknown = sorted(set(spans.index) - centroids.keys())
+    if unknown:
+        logger.warning(f"No centroid for regions {unknown}")
+    spans = spans[spans.index.isin(list(centroids))]
+    if spans.empty:
+        return empty
+
+    results = {}
+    # one thread per region, as in get_data_meteo_api_many, but each region
+    # asks only for its own span
+    with make_session(max_workers) as http, ThreadPoolExecutor(
+        max_workers=min(max_workers, len(spans))
+    ) as pool:
+        futures = {
+            region: pool.submit(
+                fetch_daily_cached,
+                centroids[region],
+                start.strftime("%Y-%m-%d"),
+                end.strftime("%Y-%m-%d"),
+                http,
+                cache,
+                variables,
+                timezone,
+            )
+            for region, (start, end) in spans.iterrows()
+        }
+        for region, future in futures.items():
+            try:
+                results[region] = future.result()
+            except MeteoAPIError as e:
+                logger.warning(f"No weather for {region}: {e}")
+
+    frames = []
+    for region, daily in results.items():
+        df = decode_daily(daily, variables)
+        frames.append(
+            _weather_frame(
+                np.full(len(df), region, dtype=object),
+                df.index.to_numpy(dtype="datetime64[ns]"),
+                dict(zip(variables, df.to_numpy().T)),
+            )
+        )
+    return pd.concat(frames, ignore_index=True) if frames else empty
+
+
+# Returns df with the row's region and weather columns appended, in df's order.
+# Rows without a timestamp keep their region and get NaN weather.
+def attach_weather(
+    df: pd.DataFrame,
+    users: pd.DataFrame,
+    weather: pd.DataFrame,
+    time_column: str = "created_at",
+    tolerance: pd.Timedelta = MAX_STALENESS,
+) -> pd.DataFrame:
+    variables = [c for c in weather.columns if c not in (REGION_COLUMN, DATE_COLUMN)]
+    regions = row_regions(df, users)
+    left = pd.DataFrame(
+        {
+            REGION_COLUMN: pd.Series(regions, dtype=str),
+            DATE_COLUMN: _row_days(df, time_column),
+            "row": np.arange(len(df)),
+        }
+    )
+    left = left[left[DATE_COLUMN].notna()].sort_values(DATE_COLUMN, kind="stable")
+    right = weather.astype({REGION_COLUMN: str, DATE_COLUMN: "datetime64[ns]"})
+    joined = pd.merge_asof(
+        left,
+        right.sort_values(DATE_COLUMN),
+        on=DATE_COLUMN,
+        by=REGION_COLUMN,
+        tolerance=tolerance,
+        direction="backward",
+    )
+
+    rows = joined["row"].to_numpy()
+    out = df.copy()
+    out[REGION_COLUMN] = regions
+    for variable in variables:
+        placed = np.full(len(df), np.nan, dtype=np.float32)
+        placed[rows] = joined[variable].to_numpy(dtype=np.float32, na_value=np.nan)
+        out[variable] = placed
+    return out
+
+
+def weather_features(
+    data_dir: str = ".",
+    cache: Optional[MeteoCache] = None,
+    variables: Sequence[str] = VARIABLES,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    loader = DatasetLoader(data_dir, categorical_ids=False)
+    columns = ["id", "user_id", "created_at"]
+    orders = loader.load("orders", columns)
+    carts = loader.load("abandoned_cart", columns)
+    users = loader.load("users", ["user_id", REGION_COLUMN])
+
+    keys = region_days([orders, carts], users)
+    logger.info(f"{len(keys)} (region, day) keys for {len(orders) + len(carts)} rows")
+    own_cache = cache is None
+    cache = MeteoCache() if own_cache else cache
+    try:
+        weather = fetch_region_weather(keys, cache=cache, variables=variables)
+    finally:
+        if own_cache:
+            cache.close()
+    return attach_weather(orders, users, weather), attach_weather(carts, users, weather)
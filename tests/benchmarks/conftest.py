@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import platform
+import statistics
+import numpy as np
+import pandas as pd
+import pytest
+from typing import Any, Callable, Dict, Optional
+
+# Minimal timing harness for the benchmark suite (opt-in: BENCHMARKS=1).
+# Every benchmark runs once to warm up and then `rounds` timed rounds; the
+# minimum and median are written to BENCHMARK_RESULTS as JSON. When
+# BENCHMARK_BASELINE points to an earlier results file, a benchmark whose
+# minimum is more than BENCHMARK_TOLERANCE times slower than the baseline
+# (plus a small noise floor) fails.
+RESULTS_FILE = os.environ.get("BENCHMARK_RESULTS", "benchmark_results.json")
+BASELINE_FILE = os.environ.get("BENCHMARK_BASELINE")
+TOLERANCE = float(os.environ.get("BENCHMARK_TOLERANCE", "1.5"))
+NOISE_FLOOR = 0.005  # seconds
+
+
+class Benchmark:
+    def __init__(
+        self, name: str, results: Dict[str, Any], baseline: Dict[str, Any]
+    ) -> None:
+        self.name = name
+        self.results = results
+        self.baseline = baseline
+
+    def __call__(
+        self,
+        fn: Callable,
+        *args: Any,
+        rounds: int = 5,
+        setup: Optional[Callable[[], None]] = None,
+        **kwargs: Any,
+    ) -> Any:
+        if setup is not None:
+            setup()
+        result = fn(*args, **kwargs)
+        times = []
+        for _ in range(rounds):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            result = fn(*args, **kwargs)
+            times.append(time.perf_counter() - start)
+
+        record = {
+            "min": min(times),
+            "median": statistics.median(times),
+            "rounds": rounds,
+        }
+        self.results[self.name] = record
+        base = self.baseline.get(self.name)
+        if base is not None and record["min"] > base["min"] * TOLERANCE + NOISE_FLOOR:
+            pytest.fail(
+                f"{self.name} regressed: {record['min']:.4f}s vs baseline "
+                f"{base['min']:.4f}s (tolerance x{TOLERANCE})"
+            )
+        return result
+
+
+@pytest.fixture(scope="session")
+def benchmark_results():
+    results: Dict[str, Any] = {}
+    yield results
+    if results:
+        with open(RESULTS_FILE, "w") as f:
+            json.dump(
+                {
+                    "machine": {
+                        "python": platform.python_version(),
+                        "platform": platform.platform(),
+                        "numpy": np.__version__,
+                        "pandas": pd.__version__,
+                    },
+                    "benchmarks": results,
+                },
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+
+
+@pytest.fixture(scope="session")
+def benchmark_baseline() -> Dict[str, Any]:
+    if not BASELINE_FILE or not os.path.isfile(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE) as f:
+        return json.load(f)["benchmarks"]
+
+
+@pytest.fixture
+def benchmark(request, benchmark_results, benchmark_baseline) -> Benchmark:
+    return Benchmark(request.node.nodeid, benchmark_results, benchmark_baseline)
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Sequence
+
+from src.module_1.module_1_meteo_api import VARIABLES
+
+# Synthetic inputs for the benchmarks, shaped like the real payloads and
+# datasets and scaled by the benchmark parameters.
+
+
+def meteo_payload(
+    start: str, end: str, variables: Sequence[str] = VARIABLES, seed: int = 0
+) -> Dict[str, Any]:
+    days = pd.date_range(start, end, freq="D")
+    rng = np.random.default_rng(seed)
+    daily: Dict[str, Any] = {"time": days.strftime("%Y-%m-%d").tolist()}
+    for variable in variables:
+        daily[variable] = rng.normal(10, 5, len(days)).round(1).tolist()
+    return {"daily": daily}
+
+
+def meteo_responder(variables: Sequence[str] = VARIABLES):
+    # requests_mock callback answering every chunk with its own date range
+    def respond(request, context):
+        return meteo_payload(
+            request.qs["start_date"][0], request.qs["end_date"][0], variables
+        )
+
+    return respond
+
+
+def cities(n: int) -> Dict[str, Dict[str, float]]:
+    return {
+        f"City {i}": {"latitude": 40.0 + i, "longitude": -3.0 - i} for i in range(n)
+    }
+
+
+def groceries(n_orders: int, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    n_users = max(10, n_orders // 5)
+    n_carts = n_orders // 2
+    n_items = 2_000
+    user_ids = np.array([f"user-{i:07d}" for i in range(n_users)])
+    variant_ids = np.arange(30_000_000_000_000, 30_000_000_000_000 + n_items)
+    start = pd.Timestamp("2020-05-01")
+    span = pd.Timedelta(days=700).value
+
+    def created_at(n: int) -> pd.DatetimeIndex:
+        return pd.to_datetime(start.value + np.sort(rng.integers(0, span, n)))
+
+    def baskets(n: int, mean: int):
+        sizes = rng.poisson(mean, n) + 1
+        flat = rng.choice(variant_ids, sizes.sum())
+        return np.split(flat, np.cumsum(sizes)[:-1])
+
+    orders_at = created_at(n_orders)
+    return {
+        "orders": pd.DataFrame(
+            {
+                "id": np.arange(n_orders),
+                "user_id": rng.choice(user_ids, n_orders),
+                "created_at": orders_at,
+                "order_date": orders_at.floor("D"),
+                "user_order_seq": rng.integers(1, 20, n_orders),
+                "ordered_items": baskets(n_orders, 12),
+            }
+        ),
+        "regulars": pd.DataFrame(
+            {
+                "user_id": rng.choice(user_ids, n_orders // 2),
+                "variant_id": rng.choice(variant_ids, n_orders // 2),
+                "created_at": created_at(n_orders // 2),
+            }
+        ),
+        "abandoned_cart": pd.DataFrame(
+            {
+                "id": np.arange(n_carts),
+                "user_id": rng.choice(user_ids, n_carts),
+                "created_at": created_at(n_carts),
+                "variant_id": baskets(n_carts, 4),
+            }
+        ),
+        "inventory": pd.DataFrame(
+            {
+                "variant_id": variant_ids,
+                "price": rng.gamma(2, 2, n_items).round(2),
+                "compare_at_price": rng.gamma(2, 2.5, n_items).round(2),
+                "vendor": rng.choice([f"vendor-{i}" for i in range(300)], n_items),
+                "product_type": rng.choice([f"type-{i}" for i in range(60)], n_items),
+            }
+        ),
+        "users": pd.DataFrame(
+            {
+                "user_id": user_ids,
+                "user_segment": rng.choice(["Top Up", "Proposition"], n_users),
+                "user_nuts1": rng.choice([f"UK{c}" for c in "CDEFGHIJKLM"], n_users),
+            }
+        ),
+    }
+
+
+def feature_frame(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    created_at = pd.Timestamp("2020-10-05") + pd.to_timedelta(
+        rng.integers(0, 150, n_rows), unit="D"
+    )
+    df = pd.DataFrame(
+        {
+            "variant_id": rng.integers(33_000_000_000_000, 33_000_000_002_000, n_rows),
+            "product_type": rng.choice([f"type-{i}" for i in range(60)], n_rows),
+            "order_id": rng.integers(2_800_000_000_000, 2_800_000_050_000, n_rows),
+            "user_id": rng.integers(3_400_000_000_000, 3_400_000_005_000, n_rows),
+            "created_at": created_at,
+            "order_date": created_at.floor("D"),
+            "user_order_seq": rng.integers(2, 20, n_rows),
+            "outcome": (rng.random(n_rows) < 0.0115).astype(float),
+            "ordered_before": (rng.random(n_rows) < 0.02).astype(float),
+            "abandoned_before": (rng.random(n_rows) < 0.001).astype(float),
+            "active_snoozed": (rng.random(n_rows) < 0.002).astype(float),
+            "set_as_regular": (rng.random(n_rows) < 0.003).astype(float),
+            "normalised_price": rng.random(n_rows),
+            "discount_pct": rng.normal(0.18, 0.2, n_rows),
+            "vendor": rng.choice([f"vendor-{i}" for i in range(260)], n_rows),
+            "global_popularity": rng.exponential(0.01, n_rows),
+        }
+    )
+    df.loc[rng.random(n_rows) < 0.01, "normalised_price"] = np.nan
+    return df
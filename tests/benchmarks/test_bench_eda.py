@@ -0,0 +1,92 @@
+import os
+import shutil
+import pytest
+from src.module_2 import eda1, eda2
+from src.module_2.abandonment import abandonment_rates
+from src.module_2.compute import ArrowBackend
+from src.module_2.feature_frame import ingest_csv
+from src.module_2.weather import attach_weather, region_days
+from tests.benchmarks.synthetic import feature_frame, groceries
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("BENCHMARKS"), reason="set BENCHMARKS=1 to run benchmarks"
+)
+
+ORDER_SCALES = [10_000, 100_000]
+FEATURE_SCALES = [100_000, 1_000_000]
+
+
+@pytest.fixture(scope="module", params=ORDER_SCALES)
+def groceries_dir(request, tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp(f"groceries-{request.param}")
+    frames = groceries(request.param)
+    for name, df in frames.items():
+        df.to_parquet(data_dir / f"{name}.parquet", index=False)
+    return str(data_dir), frames
+
+
+@pytest.fixture(scope="module", params=FEATURE_SCALES)
+def feature_csv(request, tmp_path_factory):
+    path = tmp_path_factory.mktemp(f"feature-frame-{request.param}") / "ff.csv"
+    feature_frame(request.param).to_csv(path, index=False)
+    return path
+
+
+def test_load_data(benchmark, groceries_dir):
+    data_dir, frames = groceries_dir
+    loaded = benchmark(
+        eda1.load_data, data_dir, setup=lambda: eda1.get_loader(data_dir).clear()
+    )
+    assert len(loaded[0]) == len(frames["orders"])
+
+
+@pytest.mark.parametrize("segmented", [False, True])
+def test_abandonment(benchmark, groceries_dir, segmented):
+    _, frames = groceries_dir
+    carts, regulars, users = (
+        frames["abandoned_cart"],
+        frames["regulars"],
+        frames["users"],
+    )
+    if segmented:
+        rates = benchmark(abandonment_rates, carts, users, regulars)
+        assert rates["carts"].sum() > 0
+    else:
+        rates = benchmark(eda1.abandonment_rates_by_user_type, carts, regulars, users)
+        assert len(rates) == 2
+
+
+def test_weather_join(benchmark, groceries_dir):
+    _, frames = groceries_dir
+    orders, users = frames["orders"], frames["users"]
+    weather = region_days([orders], users).assign(temperature_2m_mean=1.0)
+    joined = benchmark(attach_weather, orders, users, weather)
+    assert joined["temperature_2m_mean"].notna().all()
+
+
+def test_feature_frame_ingest(benchmark, feature_csv):
+    cache = str(feature_csv.parent / "cache")
+    meta = benchmark(ingest_csv, str(feature_csv), cache, rounds=2)
+    shutil.rmtree(cache)
+    assert meta["rows"] > 0
+
+
+def test_feature_frame_load(benchmark, feature_csv):
+    cache = str(feature_csv.parent / "cache")
+    ingest_csv(str(feature_csv), cache)
+    df = benchmark(eda2.load_dataset, str(feature_csv), cache)
+    assert len(df) == eda2.ensure_cache(str(feature_csv), cache)["rows"]
+
+
+@pytest.mark.parametrize("aggregation", ["counts", "histogram", "box_stats"])
+def test_outcome_aggregations(benchmark, feature_csv, aggregation):
+    cache = str(feature_csv.parent / "cache")
+    ingest_csv(str(feature_csv), cache)
+    backend = ArrowBackend(cache)
+    calls = {
+        "counts": lambda: backend.counts(["ordered_before", "outcome"]),
+        "histogram": lambda: backend.histogram("normalised_price", 50),
+        "box_stats": lambda: backend.box_stats("global_popularity"),
+    }
+    result = benchmark(calls[aggregation], rounds=3)
+    assert len(result) > 0
@@ -0,0 +1,49 @@
+import os
+import pytest
+from src.module_1 import meteo_render
+from src.module_1 import module_1_meteo_api as meteo_api
+from tests.benchmarks.synthetic import cities, meteo_payload, meteo_responder
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("BENCHMARKS"), reason="set BENCHMARKS=1 to run benchmarks"
+)
+
+
+@pytest.mark.parametrize("years", [1, 10, 50])
+def test_data_process(benchmark, years):
+    payload = meteo_payload("1970-01-01", f"{1969 + years}-12-31")
+    df = benchmark(meteo_api.data_process, payload["daily"])
+    assert len(df) == len(payload["daily"]["time"])
+
+
+@pytest.mark.parametrize("n_cities", [1, 8])
+def test_monthly_resample(benchmark, n_cities):
+    daily = {
+        city: meteo_payload("1990-01-01", "2019-12-31", seed=i)["daily"]
+        for i, city in enumerate(cities(n_cities))
+    }
+    monthly = benchmark(meteo_render.monthly_means, daily)
+    assert len(monthly) == n_cities
+
+
+@pytest.mark.parametrize("years", [1, 10])
+def test_get_data_meteo_api(benchmark, requests_mock, years):
+    requests_mock.get(meteo_api.API_URL, json=meteo_responder())
+    city = cities(1)["City 0"]
+    daily = benchmark(
+        meteo_api.get_data_meteo_api, city, "2000-01-01", f"{1999 + years}-12-31"
+    )
+    assert len(daily["time"]) >= 365 * years
+
+
+@pytest.mark.parametrize("n_cities", [4, 16])
+def test_get_data_meteo_api_many(benchmark, requests_mock, n_cities):
+    requests_mock.get(meteo_api.API_URL, json=meteo_responder())
+    results, errors = benchmark(
+        meteo_api.get_data_meteo_api_many,
+        cities(n_cities),
+        "2010-01-01",
+        "2019-12-31",
+        rounds=3,
+    )
+    assert len(results) == n_cities and not errors
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_series_equal
+from src.module_1.meteo_aggregate import StreamingAggregator, stream_city_aggregates
+
+
+@pytest.fixture
+def daily_frame():
+    index = pd.date_range("2010-01-01", "2011-12-31", freq="D", name="Date")
+    values = np.arange(len(index), dtype=np.float32)
+    values[5] = np.nan
+    return pd.DataFrame({"Temperature (°C)": values}, index=index)
+
+
+def test_streaming_matches_full_resample(daily_frame):
+    aggregator = StreamingAggregator(["monthly"])
+    # Trozos que parten meses por la mitad
+    for start in range(0, len(daily_frame), 45):
+        aggregator.update("Madrid", daily_frame.iloc[start : start + 45])
+    result = aggregator.result()
+
+    expected = daily_frame["Temperature (°C)"].resample("ME").mean()
+    got = result.set_index("period_end")["mean"]
+    assert_series_equal(
+        got,
+        expected,
+        check_names=False,
+        check_freq=False,
+        check_dtype=False,
+        check_index_type=False,
+    )
+    assert result["count"].sum() == daily_frame.count().sum()
+    assert set(result["frequency"]) == {"monthly"}
+
+
+def test_stream_city_aggregates(requests_mock):
+    url = "https://archive-api.open-meteo.com/v1/archive"
+
+    def respond(request, context):
+        if request.qs["latitude"] == ["1.0"]:
+            context.status_code = 400
+            return {}
+        start = request.qs["start_date"][0]
+        return {"daily": {"time": [start], "precipitation_sum": [2.0]}}
+
+    requests_mock.get(url, json=respond)
+    cities = {
+        "A": {"latitude": 0.0, "longitude": 0.0},
+        "B": {"latitude": 1.0, "longitude": 0.0},
+    }
+    result, errors = stream_city_aggregates(
+        cities, "2010-01-01", "2012-12-31", ["precipitation_sum"], ["yearly"], 2
+    )
+    assert list(errors) == ["B"]
+    assert list(result["sum"]) == [2.0, 2.0, 2.0]
+    assert list(result["period_end"].dt.year) == [2010, 2011, 2012]
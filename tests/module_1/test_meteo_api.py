@@ -1,9 +1,12 @@
 import pytest
+from datetime import datetime, timedelta, timezone
 import requests
 import pandas as pd
 from pandas.testing import assert_frame_equal
 from unittest.mock import MagicMock 
-from src.module_1.module_1_meteo_api import main, api_request, get_data_meteo_api, data_process, data_plot
+from src.module_1.module_1_meteo_api import main, api_request, get_data_meteo_api, get_data_meteo_api_many, data_process, data_plot
+from src.module_1.meteo_cache import MeteoCache
+from src.module_1 import module_1_meteo_api as meteo_api
 
 def test_api_request_OK(requests_mock):
     url = "https://url.com" 
@@ -55,6 +58,41 @@ def test_get_data_meteo_api_wrong_schema(requests_mock, city_coords):
     data = get_data_meteo_api(city_coords, "2010-01-01", "2020-12-31")
     assert data is None  #verifica que el esquema no coincide
 
+@pytest.mark.parametrize(
+    "daily",
+    [
+        {"time": ["2010-01-01"], "precipitation_sum": [None]},
+        {"time": ["2010-01-01"], "precipitation_sum": ["0.5"]},
+        {"time": ["not a date"], "precipitation_sum": [0.5]},
+        {"time": None, "precipitation_sum": [0.5]},
+    ],
+)
+def test_fetch_daily_validates_columns(requests_mock, city_coords, daily):
+    url = "https://archive-api.open-meteo.com/v1/archive?"
+    requests_mock.get(url, json={"daily": daily})
+    with pytest.raises(meteo_api.MeteoAPIError):
+        meteo_api.fetch_daily(
+            city_coords, "2010-01-01", "2010-01-01", variables=["precipitation_sum"]
+        )
+
+
+def test_fetch_chunk_frame_uses_timezone(requests_mock, city_coords):
+    url = "https://archive-api.open-meteo.com/v1/archive?"
+    daily = {"time": ["2010-01-01", "2010-01-02"], "precipitation_sum": [0.5, 1.0]}
+    requests_mock.get(url, json={"daily": daily})
+    df = meteo_api.fetch_chunk_frame(
+        city_coords,
+        "2010-01-02",
+        "2010-01-02",
+        None,
+        ["precipitation_sum"],
+        "allow",
+        timezone="Europe/London",
+    )
+    assert list(df["Precipitation (mm)"]) == [1.0]
+    assert requests_mock.last_request.qs["timezone"] == ["europe/london"]
+
+
 def test_data_process():
     daily_data = {
         "time": ["2010-01-01", "2010-01-02"],
@@ -73,4 +111,242 @@ def test_data_process():
     ).set_index("Date")
 
     result_df = data_process(daily_data)
-    assert_frame_equal(result_df, expected_df)
\ No newline at end of file
+    assert_frame_equal(result_df, expected_df)
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):  # Los reintentos no esperan de verdad en los tests
+    sleeps = []
+    monkeypatch.setattr(meteo_api.time, "sleep", sleeps.append)
+    return sleeps
+
+
+def test_get_data_meteo_api_many(requests_mock, no_sleep):
+    url = "https://archive-api.open-meteo.com/v1/archive"
+    daily = {
+        "time": ["2010-01-01"],
+        "temperature_2m_mean": [10.0],
+        "precipitation_sum": [0.5],
+        "wind_speed_10m_max": [3.0],
+    }
+    # Madrid responde bien, London con un 500
+    requests_mock.get(url, json={"daily": daily}, status_code=200)
+    requests_mock.get(url + "?latitude=51.507351", status_code=500, complete_qs=False)
+    cities = {
+        "Madrid": {"latitude": 40.416775, "longitude": -3.703790},
+        "London": {"latitude": 51.507351, "longitude": -0.127758},
+    }
+
+    results, errors = get_data_meteo_api_many(
+        cities, "2010-01-01", "2010-01-01", max_workers=2
+    )
+    assert results == {"Madrid": daily}
+    assert list(errors) == ["London"]
+    assert "500" in errors["London"]
+
+
+def test_get_data_meteo_api_many_empty():
+    assert get_data_meteo_api_many({}, "2010-01-01", "2010-01-02") == ({}, {})
+
+
+def test_get_data_meteo_api_cache_fills_only_missing_days(
+    requests_mock, city_coords, tmp_path
+):
+    url = "https://archive-api.open-meteo.com/v1/archive"
+
+    def daily(days):
+        return {
+            "time": days,
+            "temperature_2m_mean": [10.0] * len(days),
+            "precipitation_sum": [0.5] * len(days),
+            "wind_speed_10m_max": [3.0] * len(days),
+        }
+
+    with MeteoCache(str(tmp_path / "meteo.sqlite")) as cache:
+        requests_mock.get(url, json={"daily": daily(["2010-01-01", "2010-01-02"])})
+        first = get_data_meteo_api(city_coords, "2010-01-01", "2010-01-02", cache)
+        assert first["time"] == ["2010-01-01", "2010-01-02"]
+
+        # Solo se pide el día nuevo
+        requests_mock.get(url, json={"daily": daily(["2010-01-03"])})
+        second = get_data_meteo_api(city_coords, "2010-01-01", "2010-01-03", cache)
+        assert second == daily(["2010-01-01", "2010-01-02", "2010-01-03"])
+        assert requests_mock.last_request.qs["start_date"] == ["2010-01-03"]
+        assert requests_mock.call_count == 2
+
+        # Todo cacheado: ninguna petición
+        get_data_meteo_api(city_coords, "2010-01-02", "2010-01-03", cache)
+        assert requests_mock.call_count == 2
+
+
+def test_meteo_cache_remembers_days_without_data(requests_mock, city_coords, tmp_path):
+    url = "https://archive-api.open-meteo.com/v1/archive?"
+    daily = {
+        "time": ["2010-01-01"],
+        "temperature_2m_mean": [10.0],
+        "precipitation_sum": [0.5],
+        "wind_speed_10m_max": [3.0],
+    }
+    requests_mock.get(url, json={"daily": daily})
+    with MeteoCache(str(tmp_path / "meteo.sqlite")) as cache:
+        # La API no devuelve el 2 de enero: no se vuelve a pedir
+        for _ in range(2):
+            data = get_data_meteo_api(city_coords, "2010-01-01", "2010-01-02", cache)
+            assert data == daily
+        assert requests_mock.call_count == 1
+
+
+def test_meteo_cache_refetches_recent_missing_days(
+    requests_mock, city_coords, tmp_path
+):
+    url = "https://archive-api.open-meteo.com/v1/archive?"
+    today = datetime.now().date()
+    start, end = (str(today - timedelta(days=n)) for n in (2, 1))
+    daily = {
+        "time": [start],
+        "temperature_2m_mean": [10.0],
+        "precipitation_sum": [0.5],
+        "wind_speed_10m_max": [3.0],
+    }
+    requests_mock.get(url, json={"daily": daily})
+    with MeteoCache(str(tmp_path / "meteo.sqlite")) as cache:
+        # Ayer aún no está publicado: se vuelve a pedir solo ese día
+        for _ in range(2):
+            get_data_meteo_api(city_coords, start, end, cache)
+        assert requests_mock.call_count == 2
+        assert requests_mock.last_request.qs["start_date"] == [end]
+
+
+def test_meteo_cache_keys_on_timezone(requests_mock, city_coords, tmp_path):
+    url = "https://archive-api.open-meteo.com/v1/archive?"
+    daily = {
+        "time": ["2010-01-01"],
+        "temperature_2m_mean": [10.0],
+        "precipitation_sum": [0.5],
+        "wind_speed_10m_max": [3.0],
+    }
+    requests_mock.get(url, json={"daily": daily})
+    with MeteoCache(str(tmp_path / "meteo.sqlite")) as cache:
+        # Los días de otra zona horaria son otros datos: se piden aparte
+        for tz in ("Europe/Madrid", "Europe/London", "Europe/London"):
+            get_data_meteo_api(
+                city_coords, "2010-01-01", "2010-01-01", cache, timezone=tz
+            )
+        assert requests_mock.call_count == 2
+        assert requests_mock.last_request.qs["timezone"] == ["europe/london"]
+
+
+def test_meteo_cache_evicts_least_recently_used(city_coords, tmp_path):
+    daily = {"time": ["2010-01-01", "2010-01-02"], "precipitation_sum": [1.0, 2.0]}
+    with MeteoCache(str(tmp_path / "meteo.sqlite"), max_rows=2) as cache:
+        cache.store(city_coords, daily)
+        cache.store({"latitude": 0.0, "longitude": 0.0}, daily)
+        assert cache.evict() == 2
+        loaded = cache.load(
+            city_coords, ["precipitation_sum"], "2010-01-01", "2010-01-02"
+        )
+        assert loaded is None
+
+
+def test_request_with_retry_respects_retry_after(requests_mock, no_sleep):
+    url = "https://url.com"
+    requests_mock.get(
+        url,
+        [
+            {"status_code": 429, "headers": {"Retry-After": "3"}},
+            {"status_code": 503},
+            {"json": {"key": "value"}, "status_code": 200},
+        ],
+    )
+    response = meteo_api.request_with_retry(url, {})
+    assert response.json() == {"key": "value"}
+    assert requests_mock.call_count == 3
+    assert no_sleep[0] == 3.0
+    assert 0 <= no_sleep[1] <= meteo_api.BACKOFF_BASE * 2
+
+
+@pytest.mark.parametrize("zone", ["GMT", "-0000"])
+def test_retry_after_http_date(zone):
+    when = datetime.now(timezone.utc) + timedelta(seconds=60)
+    response = requests.Response()
+    response.headers["Retry-After"] = when.strftime(f"%a, %d %b %Y %H:%M:%S {zone}")
+    assert 55 <= meteo_api._retry_after(response) <= 60
+
+
+def test_request_with_retry_gives_up(requests_mock, no_sleep):
+    url = "https://url.com"
+    requests_mock.get(url, status_code=500)
+    with pytest.raises(requests.exceptions.HTTPError):
+        meteo_api.request_with_retry(url, {}, retries=2)
+    assert requests_mock.call_count == 3
+
+
+def test_split_date_range():
+    assert meteo_api.split_date_range("2010-06-01", "2012-02-29") == [
+        ("2010-06-01", "2010-12-31"),
+        ("2011-01-01", "2011-12-31"),
+        ("2012-01-01", "2012-02-29"),
+    ]
+
+
+def test_fetch_daily_joins_year_chunks_in_order(requests_mock, city_coords):
+    url = "https://archive-api.open-meteo.com/v1/archive"
+
+    def respond(request, context):
+        start = request.qs["start_date"][0]
+        end = request.qs["end_date"][0]
+        days = [start, end]
+        return {
+            "daily": {
+                "time": days,
+                "temperature_2m_mean": [1.0, 2.0],
+                "precipitation_sum": [0.0, 0.0],
+                "wind_speed_10m_max": [3.0, 4.0],
+            }
+        }
+
+    requests_mock.get(url, json=respond)
+    daily = meteo_api.fetch_daily(city_coords, "2010-01-01", "2012-12-31")
+    assert requests_mock.call_count == 3
+    assert daily["time"] == [
+        "2010-01-01",
+        "2010-12-31",
+        "2011-01-01",
+        "2011-12-31",
+        "2012-01-01",
+        "2012-12-31",
+    ]
+
+
+def test_decode_daily_fast_path():
+    payload = (
+        b'{"daily": {"time": ["2010-01-01", "2010-01-02", "2010-01-03"],'
+        b' "precipitation_sum": [0.5, null, 1.0], "snowfall_sum": [0, 1, 2]}}'
+    )
+    variables = ["precipitation_sum", "snowfall_sum"]
+
+    df = meteo_api.decode_daily(payload, variables)
+    assert list(df.columns) == ["Precipitation (mm)", "snowfall_sum"]
+    assert (df.dtypes == "float32").all()
+    assert df.index.name == "Date"
+    assert pd.api.types.is_datetime64_dtype(df.index)
+    assert df["Precipitation (mm)"].isna().sum() == 1
+
+    dropped = meteo_api.decode_daily(payload, variables, nan_policy="drop")
+    assert len(dropped) == 2
+    with pytest.raises(meteo_api.MeteoAPIError):
+        meteo_api.decode_daily(payload, variables, nan_policy="raise")
+
+
+@pytest.mark.parametrize(
+    "daily",
+    [
+        {"time": ["2010-01-01", "2010-01-02"], "precipitation_sum": [0.5]},
+        {"time": ["2010-01-01"], "precipitation_sum": ["0.5"]},
+        {"time": ["2010-01-01"]},
+        {"time": [], "precipitation_sum": []},
+    ],
+)
+def test_decode_daily_rejects_bad_payloads(daily):
+    with pytest.raises(meteo_api.MeteoAPIError):
+        meteo_api.decode_daily({"daily": daily}, ["precipitation_sum"])
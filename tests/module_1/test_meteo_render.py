@@ -0,0 +1,50 @@
+import os
+import numpy as np
+import pandas as pd
+from src.module_1.meteo_aggregate import StreamingAggregator
+from src.module_1.module_1_meteo_api import data_process
+from src.module_1.meteo_render import (
+    monthly_from_aggregates,
+    monthly_means,
+    render_cities,
+)
+
+
+def make_daily(n_days):
+    days = pd.date_range("2010-01-01", periods=n_days, freq="D")
+    return {
+        "time": [d.strftime("%Y-%m-%d") for d in days],
+        "temperature_2m_mean": list(np.linspace(0, 20, n_days)),
+        "precipitation_sum": [1.0] * n_days,
+        "wind_speed_10m_max": [3.0] * n_days,
+    }
+
+
+def test_monthly_from_aggregates_matches_monthly_means():
+    daily = make_daily(90)
+    expected = monthly_means({"Madrid": daily})["Madrid"]
+
+    aggregator = StreamingAggregator(["monthly"])
+    aggregator.update("Madrid", data_process(daily))
+    got = monthly_from_aggregates(aggregator.result())["Madrid"]
+    np.testing.assert_allclose(got[expected.columns].values, expected.values)
+
+
+def test_render_cities_writes_one_file_per_city_and_report(tmp_path):
+    monthly = monthly_means(
+        {
+            "Madrid": make_daily(60),
+            "Rio de Janeiro": make_daily(60),
+            "report": make_daily(60),
+        }
+    )
+    paths, report = render_cities(
+        monthly, str(tmp_path), fmt="svg", max_workers=2, combined=True
+    )
+
+    # una ciudad llamada "report" no pisa el informe conjunto
+    assert set(paths) == {"Madrid", "Rio de Janeiro", "report"}
+    assert paths["Rio de Janeiro"].endswith("Rio_de_Janeiro.svg")
+    assert report not in paths.values()
+    assert all(os.path.getsize(path) > 0 for path in [*paths.values(), report])
+    assert len(os.listdir(tmp_path)) == 4
@@ -0,0 +1,93 @@
+import os
+import pandas as pd
+import pytest
+from src.module_2 import eda1
+from src.module_2.abandonment import abandonment_rates, user_segments
+
+DATA_DIR = os.path.dirname(eda1.__file__)
+
+
+@pytest.fixture
+def inputs():
+    users = pd.DataFrame(
+        {
+            "user_id": ["u1", "u2", "u3", "u4"],
+            "user_segment": ["Top Up", "Top Up", "Proposition", None],
+            "user_nuts1": ["UKI", "UKJ", "UKI", "UKI"],
+        }
+    )
+    regulars = pd.DataFrame({"user_id": ["u1", "u1", "u3"]})
+    carts = pd.DataFrame(
+        {
+            "user_id": ["u1", "u1", "u2", "u3", "u9"],
+            "created_at": pd.to_datetime(
+                [
+                    "2022-01-03 10:00",
+                    "2022-01-03 18:00",
+                    "2022-01-04 09:00",
+                    "2022-02-01 12:00",
+                    "2022-02-02 12:00",
+                ]
+            ),
+        }
+    )
+    return carts, users, regulars
+
+
+def test_user_segments(inputs):
+    _, users, regulars = inputs
+    segments = user_segments(users, regulars)
+    assert list(segments["regular"]) == [
+        "Regular",
+        "Non-Regular",
+        "Regular",
+        "Non-Regular",
+    ]
+    assert segments.loc["u4", "user_segment"] == "unknown"
+
+
+def test_rates_per_segment_and_trailing_window(inputs):
+    rates = (
+        abandonment_rates(*inputs)
+        .set_index(["window", "period_end", "segment_column", "segment"])
+        .sort_index()
+    )
+    day = pd.Timestamp("2022-01-03")
+
+    def at(window, offset, column="all", segment="all"):
+        return rates.loc[(window, day + pd.Timedelta(days=offset), column, segment)]
+
+    assert at("daily", 0)["carts"] == 2
+    assert at("daily", 2)["carts"] == 0  # days without carts are kept
+    assert at("weekly", 6)["carts"] == 3
+    assert at("weekly", 7)["carts"] == 1
+    # the first windows are cut at the first day of the data
+    assert at("weekly", 1)["period_start"] == day
+    assert at("weekly", 7)["period_start"] == day + pd.Timedelta(days=1)
+    assert at("monthly", 29)["carts"] == 4
+    assert at("monthly", 30)["carts"] == 3
+    assert at("monthly", 29, "user_segment", "Top Up")["carts"] == 3
+    assert at("monthly", 29, "user_segment", "Top Up")["rate"] == 1.5
+    assert at("weekly", 0, "regular", "Regular")["rate"] == 1.0
+    # the cart of a user missing from users lands in "unknown"
+    assert at("daily", 30, "user_nuts1", "unknown")["carts"] == 1
+
+
+def test_rates_match_by_user_type():
+    carts, regulars, users = eda1.load_abandonment_inputs(DATA_DIR)
+    rates = abandonment_rates(carts, users, regulars, segments=["regular"])
+    daily = rates[rates["window"] == "daily"]
+    assert daily.loc[daily["segment_column"] == "all", "carts"].sum() == len(carts)
+
+    expected = eda1.abandonment_rates_by_user_type(carts, regulars, users)
+    by_type = daily[daily["segment_column"] == "regular"]
+    carts_per_type = by_type.groupby("segment")["carts"].sum() / len(users)
+    for _, row in expected.iterrows():
+        assert carts_per_type[row["regular_user"]] == pytest.approx(
+            row["abandonment_rate"]
+        )
+
+
+def test_unknown_window(inputs):
+    with pytest.raises(ValueError):
+        abandonment_rates(*inputs, windows=["hourly"])
@@ -0,0 +1,57 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pytest
+from src.module_2 import eda1
+from src.module_2.baskets import BasketIndex, get_basket_index, list_lengths
+
+DATA_DIR = os.path.dirname(eda1.__file__)
+
+
+@pytest.fixture
+def orders():
+    return pd.DataFrame(
+        {
+            "id": [10, 11, 12, 13],
+            "item_ids": [[1, 2, 3], [2, 3], [], [3, 3, 4]],
+        }
+    )
+
+
+def test_basket_index(orders):
+    index = BasketIndex.from_frame(orders)
+
+    assert index.basket_sizes().tolist() == [3, 2, 0, 3]
+    assert index.item_frequency().to_dict() == {3: 4, 2: 2, 1: 1, 4: 1}
+    assert index.orders_with(3).tolist() == [10, 11, 13]
+    assert index.orders_with(99).tolist() == []
+    assert index.co_occurrence(3).to_dict() == {2: 2, 1: 1, 4: 1}
+
+
+def test_join_gathers_dimension_columns(orders):
+    inventory = pd.DataFrame({"variant_id": [1, 2, 3], "price": [1.0, 2.0, 3.0]})
+    items = BasketIndex.from_frame(orders).join(inventory)
+
+    assert items["order_id"].tolist() == [10, 10, 10, 11, 11, 13, 13, 13]
+    assert items.groupby("order_id")["price"].sum().to_dict() == {
+        10: 6.0,
+        11: 5.0,
+        13: 6.0,
+    }
+    assert (~items["in_dimension"]).sum() == 1
+
+
+def test_index_is_persisted_next_to_parquet(tmp_path):
+    path = tmp_path / "orders.parquet"
+    shutil.copy(os.path.join(DATA_DIR, "orders.parquet"), path)
+    built = get_basket_index(str(path))
+    loaded = get_basket_index(str(path))
+
+    assert isinstance(loaded.items, np.memmap)
+    np.testing.assert_array_equal(built.items, loaded.items)
+    orders = pd.read_parquet(path)
+    np.testing.assert_array_equal(
+        loaded.basket_sizes(), orders["ordered_items"].apply(len).to_numpy()
+    )
+    assert list_lengths(orders["ordered_items"]).sum() == len(loaded.items)
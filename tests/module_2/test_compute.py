@@ -0,0 +1,137 @@
+import logging
+import numpy as np
+import pandas as pd
+import pytest
+from src.module_2 import eda2
+from src.module_2.compute import (
+    ArrowBackend,
+    ComputeBackend,
+    PandasBackend,
+    get_backend,
+)
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(1)
+    n = 5_000
+    df = pd.DataFrame(
+        {
+            "outcome": rng.integers(0, 2, n).astype(np.float32),
+            "ordered_before": rng.integers(0, 2, n).astype(np.float32),
+            "normalised_price": rng.random(n).astype(np.float32),
+            "discount_pct": rng.normal(0.1, 0.05, n),
+            "global_popularity": rng.exponential(0.01, n),
+        }
+    )
+    df.loc[::11, "normalised_price"] = np.nan
+    return df
+
+
+@pytest.fixture
+def parquet_dir(frame, tmp_path):
+    path = tmp_path / "cache"
+    path.mkdir()
+    for i, start in enumerate(range(0, len(frame), 2_000)):
+        part = frame.iloc[start : start + 2_000]
+        part.to_parquet(path / f"part-{i:05d}.parquet", index=False)
+    (path / "_meta.json").write_text("{}")
+    return str(path)
+
+
+def test_arrow_counts_match_pandas(frame, parquet_dir):
+    backend = ArrowBackend(parquet_dir, batch_size=700)
+    counts = backend.counts(["ordered_before", "outcome"])
+    expected = frame.groupby(["ordered_before", "outcome"]).size()
+    assert counts.set_index(["ordered_before", "outcome"])["count"].equals(
+        expected.rename("count")
+    )
+
+
+def test_histogram_matches_numpy(frame, parquet_dir):
+    hist = ArrowBackend(parquet_dir, batch_size=700).histogram("normalised_price", 20)
+    values = frame["normalised_price"].dropna().to_numpy(np.float64)
+    counts, edges = np.histogram(values, 20)
+    np.testing.assert_array_equal(hist["count"], counts)
+    np.testing.assert_allclose(hist["left"], edges[:-1])
+
+
+@pytest.mark.parametrize("column", ["normalised_price", "global_popularity"])
+def test_box_stats_close_to_exact(frame, parquet_dir, column):
+    stats = ArrowBackend(parquet_dir, batch_size=700).box_stats(column)
+    tolerance = 2 * (frame[column].max() - frame[column].min()) / 4096
+    for _, row in stats.iterrows():
+        values = frame.loc[frame["outcome"] == row["outcome"], column].dropna()
+        q1, med, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+        assert row["count"] == len(values)
+        assert row["med"] == pytest.approx(med, abs=tolerance)
+        assert row["q1"] == pytest.approx(q1, abs=tolerance)
+        assert row["q3"] == pytest.approx(q3, abs=tolerance)
+        # the fence itself carries 2.5 + 1.5 quartile errors
+        inside = values[values <= q3 + 1.5 * (q3 - q1)]
+        assert row["whishi"] == pytest.approx(inside.max(), abs=3 * tolerance)
+        assert row["max"] == pytest.approx(values.max())
+
+
+def test_compute_backend_is_abstract():
+    with pytest.raises(TypeError):
+        ComputeBackend()
+
+
+@pytest.mark.parametrize("by", [["outcome"], []])
+def test_duckdb_matches_pandas(frame, tmp_path, by):
+    pytest.importorskip("duckdb")
+    # a quote in the directory name must not break the generated SQL
+    path = tmp_path / "it's cache"
+    path.mkdir()
+    frame.to_parquet(path / "part-00000.parquet", index=False)
+    duck = get_backend(str(path), "duckdb", fill_values={"discount_pct": 0.0})
+    pandas = PandasBackend(frame, fill_values={"discount_pct": 0.0})
+    assert duck.num_rows() == pandas.num_rows()
+    assert sum(len(b) for b in duck._frames(["outcome"])) == len(frame)
+
+    pd.testing.assert_frame_equal(
+        duck.counts(by + ["ordered_before"]),
+        pandas.counts(by + ["ordered_before"]),
+        check_dtype=False,
+    )
+    pd.testing.assert_frame_equal(
+        duck.histogram("normalised_price", 20, by=by),
+        pandas.histogram("normalised_price", 20, by=by),
+        check_dtype=False,
+    )
+    for column in ("normalised_price", "discount_pct"):
+        expected = pandas.box_stats(column, by)
+        stats = duck.box_stats(column, by)
+        tolerance = 3 * (frame[column].max() - frame[column].min()) / 4096
+        assert list(stats.columns) == list(expected.columns)
+        np.testing.assert_array_equal(stats["count"], expected["count"])
+        np.testing.assert_allclose(
+            stats.drop(columns="count"), expected.drop(columns="count"), atol=tolerance
+        )
+
+
+def test_fill_values_and_csv_source(frame, tmp_path):
+    path = tmp_path / "feature_frame.csv"
+    frame.to_csv(path, index=False)
+    backend = get_backend(str(path), "arrow", fill_values={"normalised_price": 2.0})
+    hist = backend.histogram("normalised_price", 2, range=(0.0, 2.0))
+    assert hist["count"].sum() == len(frame)
+    assert hist["count"].iloc[-1] == frame["normalised_price"].isna().sum()
+
+
+def test_analyses_run_on_any_backend(frame, parquet_dir, monkeypatch, caplog):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    monkeypatch.setattr(plt, "show", lambda: plt.close("all"))
+    for data in (frame, PandasBackend(frame), ArrowBackend(parquet_dir)):
+        with caplog.at_level(logging.WARNING):
+            eda2.visualize_outcome_distribution(data)
+            eda2.analyze_additional_features(data)
+            eda2.analyze_price_discount_outcome(data)
+            eda2.analyze_global_popularity_vs_outcome(data)
+            eda2.analyze_ordered_before_vs_outcome(data)
+    assert not caplog.records
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+import pandas as pd
+import pytest
+from src.module_2 import eda1, eda2
+
+DATA_DIR = os.path.join(os.path.dirname(eda1.__file__))
+
+
+def test_import_has_no_side_effects(tmp_path):
+    code = (
+        "import sys; import src.module_2.eda1, src.module_2.eda2; "
+        "assert 'boto3' not in sys.modules; "
+        "assert 'seaborn' not in sys.modules"
+    )
+    root = os.path.dirname(os.path.dirname(DATA_DIR))
+    env = {**os.environ, "PYTHONPATH": root}
+    env.pop("AWS_ACCESS_KEY_ID", None)
+    # cwd vacío: sin keys.env ni ficheros parquet
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, check=True)
+
+
+def test_datasets_are_loaded_lazily_and_once():
+    orders = eda1.get_dataset("orders", DATA_DIR)
+    assert eda1.get_dataset("orders", DATA_DIR) is orders
+    with pytest.raises(KeyError):
+        eda1.get_dataset("unknown", DATA_DIR)
+
+
+def test_abandonment_rates_by_user_type():
+    abandoned_cart = pd.DataFrame({"user_id": ["a", "a", "b", "c"]})
+    regulars = pd.DataFrame({"user_id": ["a"]})
+    users = pd.DataFrame({"user_id": ["a", "b", "c", "d"]})
+
+    rates = eda1.abandonment_rates_by_user_type(abandoned_cart, regulars, users)
+    assert rates.set_index("regular_user")["abandonment_rate"].to_dict() == {
+        "Non-Regular": 0.5,
+        "Regular": 0.5,
+    }
+
+
+def test_fill_missing_with_mean():
+    df = pd.DataFrame({"x": [1.0, None, 3.0], "y": ["a", None, "b"]})
+    filled = eda2.fill_missing_with_mean(df)
+    assert filled["x"].tolist() == [1.0, 2.0, 3.0]
+    assert filled["y"].isna().sum() == 1
+    assert eda2.fill_missing_with_mean(df, {"x": 0.0})["x"].tolist() == [1, 0, 3]
@@ -0,0 +1,158 @@
+import os
+import pickle
+import shutil
+import importlib
+import pandas as pd
+import pytest
+from src.module_2 import eda1
+from src.module_2.eda_runner import (
+    Task,
+    eda_tasks,
+    feature_summaries,
+    run_tasks,
+    select,
+    topological_order,
+)
+
+DATA_DIR = os.path.dirname(eda1.__file__)
+CALLS = []
+
+
+def n_carts(abandoned_cart):
+    CALLS.append("n_carts")
+    return len(abandoned_cart)
+
+
+def n_users(users):
+    CALLS.append("n_users")
+    return len(users)
+
+
+def carts_per_user(n_carts, n_users):
+    CALLS.append("carts_per_user")
+    return n_carts / n_users
+
+
+def fail(users):
+    raise ValueError("boom")
+
+
+def graph(users_version=None):
+    return [
+        Task("n_carts", n_carts, {"abandoned_cart": ["user_id"]}),
+        Task("n_users", n_users, {"users": ["user_id"]}, version=users_version),
+        Task("carts_per_user", carts_per_user, deps=["n_carts", "n_users"]),
+    ]
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for name in ("abandoned_cart", "users"):
+        shutil.copy(os.path.join(DATA_DIR, f"{name}.parquet"), tmp_path)
+    CALLS.clear()
+    return str(tmp_path)
+
+
+def test_rerun_only_recomputes_changed_tasks(data_dir, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    results = run_tasks(graph(), data_dir, cache_dir, max_workers=0)
+    carts = pd.read_parquet(os.path.join(data_dir, "abandoned_cart.parquet"))
+    users = pd.read_parquet(os.path.join(data_dir, "users.parquet"))
+    assert results["carts_per_user"] == len(carts) / len(users)
+    assert sorted(CALLS) == ["carts_per_user", "n_carts", "n_users"]
+
+    CALLS.clear()
+    assert run_tasks(graph(), data_dir, cache_dir, max_workers=0) == results
+    assert CALLS == []
+
+    run_tasks(graph(users_version="2"), data_dir, cache_dir, max_workers=0)
+    assert sorted(CALLS) == ["carts_per_user", "n_users"]
+
+    CALLS.clear()
+    path = os.path.join(data_dir, "abandoned_cart.parquet")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10**9))
+    run_tasks(graph(users_version="2"), data_dir, cache_dir, max_workers=0)
+    assert sorted(CALLS) == ["carts_per_user", "n_carts"]
+    assert len(os.listdir(cache_dir)) == 3
+
+
+HELPERS = """
+def rows(users):
+    return len(users) * {factor}
+
+
+def count(users):
+    return rows(users)
+"""
+
+
+def test_helper_edit_invalidates_task(data_dir, tmp_path, monkeypatch):
+    # the task only names count; editing rows next to it must still recompute
+    path = tmp_path / "eda_helpers.py"
+    path.write_text(HELPERS.format(factor=1))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    helpers = importlib.import_module("eda_helpers")
+    cache_dir = str(tmp_path / "cache")
+    tasks = [Task("count", helpers.count, {"users": ["user_id"]})]
+    first = run_tasks(tasks, data_dir, cache_dir, max_workers=0)["count"]
+    version = tasks[0].code_version()
+
+    path.write_text(HELPERS.format(factor=10))
+    helpers = importlib.reload(helpers)
+    edited = [Task("count", helpers.count, {"users": ["user_id"]})]
+    assert edited[0].code_version() != version
+    assert run_tasks(edited, data_dir, cache_dir, max_workers=0)["count"] == 10 * first
+
+
+def test_failed_tasks_skip_dependents_and_are_not_cached(data_dir, tmp_path):
+    tasks = graph()
+    tasks[1] = Task("n_users", fail, {"users": ["user_id"]})
+    cache_dir = str(tmp_path / "cache")
+    results = run_tasks(tasks, data_dir, cache_dir, max_workers=0)
+    assert set(results) == {"n_carts"}
+    assert CALLS == ["n_carts"]
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_graph_validation():
+    tasks = graph()
+    order = [task.name for task in topological_order(tasks[::-1])]
+    assert order.index("carts_per_user") == 2
+    assert [t.name for t in select(tasks, ["n_users"])] == ["n_users"]
+    with pytest.raises(ValueError, match="Unknown dependencies"):
+        topological_order([Task("a", n_users, deps=["missing"])])
+    with pytest.raises(ValueError, match="cycle"):
+        topological_order(
+            [Task("a", n_users, deps=["b"]), Task("b", n_users, deps=["a"])]
+        )
+
+
+def test_eda_tasks_in_process_pool(tmp_path):
+    tasks = select(eda_tasks(), ["abandonment_by_date", "profile_report"])
+    results = run_tasks(tasks, DATA_DIR, str(tmp_path), max_workers=2, render=False)
+
+    carts = pd.read_parquet(os.path.join(DATA_DIR, "abandoned_cart.parquet"))
+    pd.testing.assert_series_equal(
+        results["abandonment_by_date"], eda1.abandonment_by_date(carts)
+    )
+    report = results["profile_report"]
+    assert set(report.index.get_level_values("dataset")) == set(
+        eda1.DATASET_NAMES.values()
+    )
+    assert len(os.listdir(tmp_path)) == len(tasks)
+
+
+def test_feature_summaries_survive_pickling():
+    frame = pd.DataFrame({"outcome": [0, 1, 1], "global_popularity": [0.1, 0.2, 0.3]})
+    summaries = feature_summaries(
+        frame, [("counts", (["outcome"],)), ("box_stats", ("global_popularity",))]
+    )
+    restored = pickle.loads(pickle.dumps(summaries))
+    assert restored.backend is None
+    pd.testing.assert_frame_equal(
+        restored.counts(["outcome"]), summaries.counts(["outcome"])
+    )
+    pd.testing.assert_frame_equal(
+        restored.box_stats("global_popularity"),
+        summaries.box_stats("global_popularity"),
+    )
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.module_2 import eda2
+from src.module_2.feature_frame import (
+    ensure_cache,
+    ingest_csv,
+    load_feature_frame,
+    read_meta,
+)
+
+
+@pytest.fixture
+def feature_csv(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 1_000
+    df = pd.DataFrame(
+        {
+            "variant_id": rng.integers(1, 20, n),
+            "order_id": rng.integers(100, 200, n),
+            "user_id": rng.integers(1_000, 1_050, n),
+            "vendor": rng.choice(["biona", "ecover", "method"], n),
+            "created_at": "2020-10-05 16:46:19",
+            "order_date": "2020-10-05 00:00:00",
+            "user_order_seq": rng.integers(2, 10, n),
+            "outcome": rng.integers(0, 2, n).astype(float),
+            "normalised_price": rng.random(n),
+            "global_popularity": rng.random(n),
+        }
+    )
+    df.loc[::7, "normalised_price"] = np.nan
+    path = tmp_path / "feature_frame.csv"
+    df.to_csv(path, index=False)
+    return path, df
+
+
+def test_ingest_csv_writes_compact_partitioned_cache(feature_csv, tmp_path):
+    path, raw = feature_csv
+    cache = tmp_path / "cache"
+    meta = ingest_csv(str(path), str(cache), chunksize=300)
+
+    assert len(list(cache.glob("part-*.parquet"))) == 4
+    assert meta["rows"] == len(raw)
+    assert meta["means"]["normalised_price"] == pytest.approx(
+        raw["normalised_price"].mean()
+    )
+
+    df = load_feature_frame(str(cache))
+    assert len(df) == len(raw)
+    assert isinstance(df["vendor"].dtype, pd.CategoricalDtype)
+    for column in ("variant_id", "order_id", "user_id"):
+        assert df[column].dtype == np.int64
+        np.testing.assert_array_equal(df[column], raw[column])
+    assert df["normalised_price"].dtype == np.float32
+    assert pd.api.types.is_datetime64_any_dtype(df["created_at"])
+
+    filled = load_feature_frame(str(cache), ["normalised_price"], fill_missing=True)
+    assert filled["normalised_price"].isna().sum() == 0
+
+
+def test_cache_is_reused_until_csv_changes(feature_csv, tmp_path):
+    path, raw = feature_csv
+    cache = str(tmp_path / "cache")
+    first = ensure_cache(str(path), cache)
+    assert ensure_cache(str(path), cache) == first
+
+    raw.iloc[:10].to_csv(path, index=False)
+    assert ensure_cache(str(path), cache)["rows"] == 10
+    assert read_meta(cache)["rows"] == 10
+
+
+def test_load_dataset_uses_cache(feature_csv, tmp_path):
+    path, raw = feature_csv
+    df = eda2.load_dataset(str(path), str(tmp_path / "cache"), ["outcome"])
+    assert list(df.columns) == ["outcome"]
+    assert df["outcome"].sum() == raw["outcome"].sum()
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.module_2 import feature_matrix
+from src.module_2.feature_frame import ingest_csv
+from src.module_2.feature_matrix import (
+    FeatureMatrix,
+    build_feature_matrix,
+    get_feature_matrix,
+    orders_with_min_products,
+    split_by_date,
+)
+
+FEATURES = ["normalised_price", "global_popularity", "ordered_before"]
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(3)
+    n_orders, per_order = 200, 30
+    order_id = np.repeat(np.arange(n_orders), per_order)
+    day = pd.Timestamp("2021-01-01") + pd.to_timedelta(order_id // 4, unit="D")
+    df = pd.DataFrame(
+        {
+            "order_id": order_id,
+            "order_date": day,
+            "outcome": (rng.random(len(order_id)) < 0.2).astype(np.float32),
+            "normalised_price": rng.random(len(order_id)),
+            "global_popularity": rng.random(len(order_id)),
+            "ordered_before": rng.integers(0, 2, len(order_id)).astype(float),
+        }
+    )
+    df.loc[::13, "normalised_price"] = np.nan
+    return df.sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+def test_min_products_filter(frame):
+    mask = orders_with_min_products(frame, 5)
+    bought = frame.groupby("order_id")["outcome"].transform("sum")
+    np.testing.assert_array_equal(mask, bought >= 5)
+
+
+def test_splits_are_temporal_and_grouped_by_order(frame, tmp_path):
+    matrix = build_feature_matrix(frame, FEATURES, 5, path=str(tmp_path / "m"))
+    kept = frame[orders_with_min_products(frame, 5)]
+    assert matrix.X.shape == (len(kept), len(FEATURES))
+    assert matrix.X.dtype == np.float32 and not np.isnan(matrix.X).any()
+
+    # recover each row's order by matching on the (unique) popularity value
+    rows = pd.Series(kept.index, index=kept["global_popularity"].astype(np.float32))
+    dates = {}
+    for name in feature_matrix.SPLITS:
+        X, y = matrix.split(name)
+        source = kept.loc[rows[X[:, 1]].to_numpy()]
+        np.testing.assert_array_equal(y, source["outcome"])
+        dates[name] = source["order_date"]
+        orders = set(source["order_id"])
+        for other in dates:
+            if other != name:
+                assert not orders & set(
+                    kept.loc[kept["order_date"].isin(dates[other]), "order_id"]
+                )
+    assert dates["train"].max() < dates["validation"].min()
+    assert dates["validation"].max() < dates["test"].min()
+
+    X_train, _ = matrix.split("train")
+    train_rows = kept.loc[rows[X_train[:, 1]].to_numpy()]
+    assert matrix.meta["train_means"]["normalised_price"] == pytest.approx(
+        train_rows["normalised_price"].mean(), rel=1e-5
+    )
+
+
+def test_split_by_date_weights_orders_not_rows():
+    # ten days with one order each; the first order alone has 1000 rows
+    order_id = np.concatenate([np.zeros(999, dtype=int), np.arange(10)])
+    day = pd.Timestamp("2021-01-01") + pd.to_timedelta(order_id, unit="D")
+    split = split_by_date(pd.DataFrame({"order_id": order_id, "order_date": day}))
+    np.testing.assert_array_equal(
+        pd.Series(split).groupby(order_id).first(), [0] * 7 + [1] * 2 + [2]
+    )
+
+
+def test_undated_rows_are_dropped(frame):
+    undated = frame["order_id"] == frame["order_id"].iloc[0]
+    frame.loc[undated, "order_date"] = pd.NaT
+    with pytest.raises(ValueError):
+        split_by_date(frame[["order_id", "order_date"]])
+
+    matrix = build_feature_matrix(frame, FEATURES, 0)
+    assert len(matrix.X) == (~undated).sum()
+    assert matrix.meta["splits"]["test"][1] == len(matrix.X)
+    dated = build_feature_matrix(frame[~undated], FEATURES, 0)
+    np.testing.assert_array_equal(matrix.X, dated.X)
+
+
+def test_matrix_is_reused_from_disk(frame, tmp_path, monkeypatch):
+    csv = frame.assign(created_at=frame["order_date"])
+    csv.to_csv(tmp_path / "ff.csv", index=False)
+    ingest_csv(str(tmp_path / "ff.csv"), str(tmp_path / "cache"))
+    path = str(tmp_path / "matrix")
+    first = get_feature_matrix(str(tmp_path / "cache"), path, FEATURES)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("rebuilt")
+
+    monkeypatch.setattr(feature_matrix, "build_feature_matrix", fail)
+    again = get_feature_matrix(str(tmp_path / "cache"), path, FEATURES)
+    assert isinstance(again.X, np.memmap)
+    np.testing.assert_array_equal(again.X, first.X)
+    with pytest.raises(AssertionError):
+        get_feature_matrix(str(tmp_path / "cache"), path, FEATURES, min_products=3)
+    assert FeatureMatrix.load(path).features == FEATURES
@@ -0,0 +1,74 @@
+import os
+import shutil
+import pandas as pd
+import pytest
+from src.module_2 import eda1
+from src.module_2.incremental import AggregateState, load_state, refresh
+
+DATA_DIR = os.path.dirname(eda1.__file__)
+
+
+@pytest.fixture
+def partitioned(tmp_path):
+    # Datasets written as directories of parquet parts, like appended drops
+    orders = pd.read_parquet(os.path.join(DATA_DIR, "orders.parquet"))
+    carts = pd.read_parquet(os.path.join(DATA_DIR, "abandoned_cart.parquet"))
+    cutoff = pd.Timestamp("2021-06-01")
+    for name, df in (("orders", orders), ("abandoned_cart", carts)):
+        os.makedirs(tmp_path / f"{name}.parquet")
+        df[df["created_at"] < cutoff].to_parquet(
+            tmp_path / f"{name}.parquet" / "part-0.parquet"
+        )
+    return tmp_path, orders, carts, cutoff
+
+
+def add_partition(data_dir, name, df):
+    df.to_parquet(data_dir / f"{name}.parquet" / "part-1.parquet")
+
+
+def test_incremental_refresh_matches_full_recompute(partitioned):
+    data_dir, orders, carts, cutoff = partitioned
+    first = refresh(str(data_dir))
+    assert first["orders"].rows == (orders["created_at"] < cutoff).sum()
+
+    add_partition(data_dir, "orders", orders[orders["created_at"] >= cutoff])
+    add_partition(data_dir, "abandoned_cart", carts[carts["created_at"] >= cutoff])
+    states = refresh(str(data_dir))
+    assert load_state(str(data_dir / "eda1_state.json"))["orders"].rows == len(orders)
+
+    full = AggregateState.from_frame(orders)
+    pd.testing.assert_frame_equal(states["orders"].describe(), full.describe())
+    pd.testing.assert_series_equal(
+        states["orders"].item_histogram(), full.item_histogram()
+    )
+    pd.testing.assert_series_equal(
+        states["abandoned_cart"].by_date(),
+        eda1.abandonment_by_date(carts).rename_axis("date"),
+        check_names=False,
+    )
+    assert states["orders"].watermark == orders["created_at"].max().isoformat()
+
+    # nothing new: the state is unchanged
+    again = refresh(str(data_dir))
+    assert again["orders"].to_dict() == states["orders"].to_dict()
+
+
+def test_describe_matches_pandas():
+    orders = eda1.get_dataset("orders", DATA_DIR)
+    halves = [orders.iloc[: len(orders) // 3], orders.iloc[len(orders) // 3 :]]
+    state = AggregateState.from_frame(halves[0]).merge(
+        AggregateState.from_frame(halves[1])
+    )
+    expected = orders.describe()["user_order_seq"]
+    described = state.describe()["user_order_seq"]
+    for stat in ("count", "mean", "std", "min", "max"):
+        assert described[stat] == pytest.approx(expected[stat])
+
+
+def test_refresh_without_state_copies_nothing_else(tmp_path):
+    for name in ("orders", "abandoned_cart"):
+        shutil.copy(os.path.join(DATA_DIR, f"{name}.parquet"), tmp_path)
+    states = refresh(str(tmp_path))
+    assert states["abandoned_cart"].rows == len(
+        eda1.get_dataset("abandoned_cart", DATA_DIR)
+    )
@@ -0,0 +1,84 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.module_2 import eda1
+from src.module_2.baskets import BasketIndex
+from src.module_2.items import ItemDimension
+
+DATA_DIR = os.path.dirname(eda1.__file__)
+
+
+@pytest.fixture
+def dimension():
+    inventory = pd.DataFrame(
+        {
+            "variant_id": [30, 10, 20],
+            "price": [3.0, 1.0, 2.0],
+            "compare_at_price": [4.0, 1.5, 2.0],
+            "vendor": ["v2", "v1", "v1"],
+            "product_type": ["soap", "tea", "tea"],
+        }
+    )
+    return ItemDimension(inventory)
+
+
+@pytest.fixture
+def index():
+    baskets = pd.DataFrame({"id": [1, 2, 3], "item_ids": [[10, 20, 99], [30, 30], []]})
+    return BasketIndex.from_frame(baskets)
+
+
+def test_codes_and_missing(dimension, index):
+    np.testing.assert_array_equal(dimension.codes([20, 99, 10]), [1, -1, 0])
+    missing = dimension.missing_items(index)
+    assert missing.to_dict() == {99: 1}
+
+
+def test_basket_value(dimension, index):
+    value = dimension.basket_value(index)
+    assert value["value"].tolist() == [3.0, 6.0, 0.0]
+    assert value["full_price_value"].tolist() == [3.5, 8.0, 0.0]
+    assert value["priced_items"].tolist() == [2, 2, 0]
+    assert value["items"].tolist() == [3, 2, 0]
+
+
+def test_shares(dimension, index):
+    mix, orders, types = dimension.category_mix(index)
+    assert list(types) == ["soap", "tea"]
+    np.testing.assert_allclose(mix.toarray(), [[0, 1], [1, 0], [0, 0]])
+    share, _, vendors = dimension.vendor_share(index)
+    assert list(vendors) == ["v1", "v2"]
+    np.testing.assert_allclose(share.toarray(), [[1, 0], [0, 1], [0, 0]])
+
+
+def test_shares_with_missing_labels(index):
+    inventory = pd.DataFrame(
+        {
+            "variant_id": [10, 20, 30],
+            "price": [1.0, 2.0, 3.0],
+            "compare_at_price": [1.0, 2.0, 3.0],
+            "vendor": pd.Categorical(["v1", None, "v1"]),
+            "product_type": ["tea", "tea", None],
+        }
+    )
+    dimension = ItemDimension(inventory)
+    share, _, vendors = dimension.vendor_share(index)
+    assert list(vendors) == ["unknown", "v1"]
+    np.testing.assert_allclose(share.toarray(), [[0.5, 0.5], [0, 1], [0, 0]])
+    mix, _, types = dimension.category_mix(index)
+    assert list(types) == ["tea", "unknown"]
+    np.testing.assert_allclose(mix.toarray(), [[1, 0], [0, 1], [0, 0]])
+
+
+def test_basket_value_matches_merge():
+    orders = eda1.get_dataset("orders", DATA_DIR)
+    inventory = eda1.get_dataset("inventory", DATA_DIR)
+    index = BasketIndex.from_frame(orders)
+    value = ItemDimension(inventory).basket_value(index)
+
+    exploded = orders[["id", "ordered_items"]].explode("ordered_items")
+    exploded["variant_id"] = exploded["ordered_items"].astype("int64")
+    merged = exploded.merge(inventory, on="variant_id", how="left")
+    expected = merged.groupby("id")["price"].sum()
+    np.testing.assert_allclose(value["value"], expected.loc[value.index])
@@ -0,0 +1,49 @@
+import os
+import pandas as pd
+import pytest
+from src.module_2 import eda1
+from src.module_2.loader import DatasetLoader, date_filter
+
+DATA_DIR = os.path.dirname(eda1.__file__)
+
+
+@pytest.fixture
+def loader():
+    return DatasetLoader(DATA_DIR)
+
+
+def test_projection_and_date_filter_are_pushed_down(loader):
+    full = pd.read_parquet(os.path.join(DATA_DIR, "orders.parquet"))
+    df = loader.load(
+        "orders",
+        ["user_id", "created_at"],
+        date_filter("created_at", "2021-01-01", "2021-02-01"),
+    )
+
+    assert list(df.columns) == ["user_id", "created_at"]
+    assert df["created_at"].min() >= pd.Timestamp("2021-01-01")
+    assert df["created_at"].max() < pd.Timestamp("2021-02-01")
+    in_range = full["created_at"].between("2021-01-01", "2021-02-01", inclusive="left")
+    assert len(df) == in_range.sum()
+    assert isinstance(df["user_id"].dtype, pd.CategoricalDtype)
+
+
+def test_loads_are_cached_and_lazy(loader):
+    assert loader.load("users", ["user_id"]) is loader.load("users", ["user_id"])
+    assert loader.users.shape[1] == len(loader.columns("users"))
+    with pytest.raises(KeyError):
+        loader.load("unknown")
+
+
+def test_pyarrow_backend():
+    loader = DatasetLoader(DATA_DIR, dtype_backend="pyarrow", categorical_ids=False)
+    df = loader.load("inventory", ["variant_id", "price"])
+    assert all(isinstance(dtype, pd.ArrowDtype) for dtype in df.dtypes)
+
+
+def test_abandonment_inputs_match_full_load():
+    abandoned_cart, regulars, users = eda1.load_abandonment_inputs(DATA_DIR)
+    full = eda1.load_data(DATA_DIR)
+    projected = eda1.abandonment_rates_by_user_type(abandoned_cart, regulars, users)
+    expected = eda1.abandonment_rates_by_user_type(full[2], full[1], full[4])
+    pd.testing.assert_frame_equal(projected, expected)
@@ -0,0 +1,73 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.module_2 import eda1
+from src.module_2.baskets import BasketIndex
+from src.module_2.market_basket import (
+    association_rules,
+    basket_matrix,
+    co_occurrence_matrix,
+    frequent_pairs,
+    user_item_matrix,
+)
+
+DATA_DIR = os.path.dirname(eda1.__file__)
+
+
+@pytest.fixture
+def index():
+    baskets = pd.DataFrame(
+        {
+            "id": [1, 2, 3, 4],
+            "user_id": ["u1", "u1", "u2", "u3"],
+            "item_ids": [[1, 2], [1, 2, 3], [1, 3, 3], [4]],
+        }
+    )
+    return BasketIndex.from_frame(baskets), baskets
+
+
+def test_rules(index):
+    index, _ = index
+    rules = association_rules(index, min_support=0.5).set_index(
+        ["antecedent", "consequent"]
+    )
+    assert set(rules.index) == {(1, 2), (2, 1), (1, 3), (3, 1)}
+    assert rules.loc[(2, 1), "confidence"] == 1.0
+    assert rules.loc[(1, 2), "confidence"] == pytest.approx(2 / 3)
+    assert rules.loc[(1, 2), "support"] == 0.5
+    assert rules.loc[(1, 2), "lift"] == pytest.approx(0.5 / (0.75 * 0.5))
+
+
+def test_user_item_matrix(index):
+    index, baskets = index
+    matrix, users, items = user_item_matrix(index, baskets["user_id"])
+    assert list(users) == ["u1", "u2", "u3"]
+    assert matrix[0].toarray().ravel().tolist() == [2, 2, 1, 0]
+    assert matrix[1].toarray().ravel().tolist() == [1, 0, 2, 0]
+
+
+def test_user_item_matrix_skips_missing_users(index):
+    index, baskets = index
+    user_ids = baskets["user_id"].where(baskets["id"] != 1)
+    matrix, users, items = user_item_matrix(index, user_ids)
+    assert list(users) == ["u1", "u2", "u3"]
+    assert matrix.toarray().tolist() == [[1, 1, 1, 0], [1, 0, 2, 0], [0, 0, 0, 1]]
+
+
+def test_blocked_co_occurrence_matches_brute_force():
+    orders = eda1.get_dataset("orders", DATA_DIR)
+    index = BasketIndex.from_frame(orders)
+    baskets, items = basket_matrix(index)
+    counts = co_occurrence_matrix(baskets, block_size=1_000)
+    dense_baskets = baskets[:, :50].toarray()
+    np.testing.assert_array_equal(
+        counts[:50, :50].toarray(), dense_baskets.T @ dense_baskets
+    )
+
+    pairs = frequent_pairs(index, min_support=0.02)
+    top = pairs.sort_values("count").iloc[-1]
+    sets = [set(x) for x in orders["ordered_items"]]
+    assert top["count"] == sum(
+        {top["item_a"], top["item_b"]} <= basket for basket in sets
+    )
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+from src.module_2.compute import PandasBackend
+from src.module_2.plot_summaries import PlotSummaries, binned_kde
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(2)
+    n = 20_000
+    return pd.DataFrame(
+        {
+            "outcome": rng.integers(0, 2, n).astype(np.float32),
+            "normalised_price": rng.normal(0.3, 0.1, n),
+        }
+    )
+
+
+def test_binned_kde_matches_exact_kde(frame):
+    values = frame["normalised_price"].to_numpy()
+    counts, edges = np.histogram(values, 1000)
+    centers = (edges[:-1] + edges[1:]) / 2
+    exact = stats.gaussian_kde(values, bw_method="scott")
+    density = binned_kde(counts, edges, exact.factor * values.std(ddof=1))
+    np.testing.assert_allclose(density, exact(centers), atol=0.02 * density.max())
+    assert (density * (edges[1] - edges[0])).sum() == pytest.approx(1, abs=0.01)
+
+
+def test_summaries_are_computed_once(frame, monkeypatch):
+    backend = PandasBackend(frame)
+    calls = []
+    original = backend.histogram
+
+    def counting_histogram(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(backend, "histogram", counting_histogram)
+    summaries = PlotSummaries(backend)
+    hist = summaries.histogram("normalised_price", 50)
+    summaries.kde("normalised_price")
+    summaries.histogram("normalised_price", 50)
+    assert len(calls) == 1  # re-binned from the fine grid shared with the KDE
+    expected, _ = np.histogram(frame["normalised_price"], 50)
+    np.testing.assert_array_equal(hist["count"], expected)
+
+
+def test_seeded_sample_is_reproducible(frame):
+    first = PlotSummaries(frame, sample_size=5_000, seed=7).box_stats(
+        "normalised_price"
+    )
+    second = PlotSummaries(frame, sample_size=5_000, seed=7).box_stats(
+        "normalised_price"
+    )
+    pd.testing.assert_frame_equal(first, second)
+    assert 4_000 < first["count"].sum() < 6_000
+    exact = frame.groupby("outcome")["normalised_price"].median()
+    np.testing.assert_allclose(first["med"], exact, atol=0.01)
@@ -0,0 +1,46 @@
+import json
+import numpy as np
+import pandas as pd
+from src.module_2.profiling import (
+    approx_distinct,
+    hash_column,
+    profile_datasets,
+    report_frame,
+    report_json,
+)
+
+
+def test_list_columns_are_hashed_by_content_and_order():
+    series = pd.Series(
+        [np.array([1, 2]), np.array([1, 2]), np.array([2, 1]), np.array([]), None],
+        dtype=object,
+    )
+    hashes = hash_column(series)
+    assert hashes[0] == hashes[1]
+    assert hashes[0] != hashes[2]
+    assert len(set(hashes[2:])) == 3
+
+
+def test_profile_handles_duplicates_with_list_columns():
+    orders = pd.DataFrame(
+        {
+            "user_id": ["a", "a", "b", None],
+            "item_ids": [[1, 2], [1, 2], [3], [1]],
+            "total": [10.0, 10.0, np.nan, 4.0],
+        }
+    )
+    report = profile_datasets({"orders": orders, "empty": orders.iloc[:0]})
+
+    assert report["orders"]["duplicate_rows"] == 1
+    assert report["empty"]["duplicate_rows"] == 0
+    frame = report_frame(report)
+    assert frame.loc[("orders", "user_id"), "null_count"] == 1
+    assert frame.loc[("orders", "item_ids"), "distinct"] == 3
+    assert frame.loc[("orders", "total"), "max"] == 10.0
+    assert frame.loc[("orders", "total"), "mean"] == 8.0
+    assert json.loads(report_json(report))["orders"]["rows"] == 4
+
+
+def test_approx_distinct_is_close():
+    hashes = pd.util.hash_array(np.arange(200_000) % 50_000)
+    assert abs(approx_distinct(hashes) - 50_000) / 50_000 < 0.03
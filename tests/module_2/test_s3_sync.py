@@ -0,0 +1,53 @@
+import json
+import os
+import pytest
+from src.module_2 import s3_sync
+
+boto3 = pytest.importorskip("boto3")
+mock_aws = pytest.importorskip("moto").mock_aws
+
+BUCKET = "zrive-ds-data"
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        client.put_object(Bucket=BUCKET, Key="data/a.parquet", Body=b"a" * 100)
+        client.put_object(Bucket=BUCKET, Key="data/b.parquet", Body=b"b" * 50)
+        yield client
+
+
+def test_sync_only_transfers_what_changed(s3_client, tmp_path):
+    objects = {"a.parquet": "data/a.parquet", "b.parquet": "data/b.parquet"}
+
+    def sync():
+        return s3_sync.sync_objects(objects, str(tmp_path), BUCKET, client=s3_client)
+
+    assert set(sync().values()) == {s3_sync.DOWNLOADED}
+    assert set(sync().values()) == {s3_sync.UP_TO_DATE}
+    manifest = json.loads((tmp_path / s3_sync.MANIFEST_FILE).read_text())
+    assert manifest["a.parquet"]["size"] == 100
+
+    # Fichero truncado en local y objeto actualizado en S3
+    (tmp_path / "a.parquet").write_bytes(b"a" * 10)
+    s3_client.put_object(Bucket=BUCKET, Key="data/b.parquet", Body=b"B" * 60)
+    assert sync() == {"a.parquet": s3_sync.DOWNLOADED, "b.parquet": s3_sync.DOWNLOADED}
+    assert (tmp_path / "a.parquet").read_bytes() == b"a" * 100
+    assert (tmp_path / "b.parquet").read_bytes() == b"B" * 60
+    assert not [p for p in os.listdir(tmp_path) if p.endswith((".part", ".tmp"))]
+
+
+def test_sync_reports_missing_objects(s3_client, tmp_path):
+    statuses = s3_sync.sync_objects(
+        {"missing.parquet": "data/missing.parquet"},
+        str(tmp_path),
+        BUCKET,
+        client=s3_client,
+    )
+    assert statuses == {"missing.parquet": s3_sync.FAILED}
+    assert not (tmp_path / "missing.parquet").exists()
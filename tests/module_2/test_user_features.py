@@ -0,0 +1,87 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from src.module_2 import eda1
+from src.module_2.user_features import UserFeatureStore, compute_user_features
+
+DATA_DIR = os.path.dirname(eda1.__file__)
+
+
+def test_compute_user_features():
+    orders = pd.DataFrame(
+        {
+            "user_id": ["a", "a", "a", "b"],
+            "created_at": pd.to_datetime(
+                ["2022-01-01", "2022-01-11", "2022-01-21", "2022-01-05"]
+            ),
+            "ordered_items": [[1, 2], [1], [1, 2, 3], [4, 4]],
+        }
+    )
+    first_two = orders["created_at"][:2]
+    regulars = pd.DataFrame({"user_id": ["a", "c"], "created_at": first_two})
+    carts = pd.DataFrame({"user_id": ["b", "b"], "created_at": first_two})
+    features = compute_user_features(
+        orders, regulars, carts, ["a", "b", "c"], as_of="2022-01-31"
+    )
+    assert features.loc["a", "n_orders"] == 3
+    assert features.loc["a", "recency_days"] == 10
+    assert features.loc["a", "cadence_days"] == 10
+    assert features.loc["a", "mean_basket_size"] == 2
+    assert np.isnan(features.loc["b", "cadence_days"])
+    assert features.loc["b", "n_abandoned_carts"] == 2
+    assert features.loc["c", "n_orders"] == 0
+    assert features.loc["c", "n_regulars"] == 1
+
+
+def split_copy(tmp_path, cutoff):
+    # Snapshot of the datasets as they were before cutoff
+    for name in ("orders", "regulars", "abandoned_cart", "users"):
+        df = pd.read_parquet(os.path.join(DATA_DIR, f"{name}.parquet"))
+        if "created_at" in df and name != "users":
+            df = df[df["created_at"] < cutoff]
+        df.to_parquet(tmp_path / f"{name}.parquet")
+
+
+def test_refresh_matches_full_build(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    split_copy(data_dir, pd.Timestamp("2022-02-01"))
+    store = UserFeatureStore(str(tmp_path / "features.parquet"))
+    store.build(str(data_dir))
+
+    for name in ("orders", "regulars", "abandoned_cart"):
+        shutil.copy(os.path.join(DATA_DIR, f"{name}.parquet"), data_dir)
+    refreshed = store.refresh(str(data_dir)).sort_index()
+    full = UserFeatureStore(str(tmp_path / "full.parquet")).build(str(data_dir))
+    pd.testing.assert_frame_equal(refreshed, full.sort_index(), check_exact=False)
+
+    some = list(full.index[:3]) + ["missing-user"]
+    looked_up = store.lookup(some)
+    assert list(looked_up.index) == some
+    expected = full.loc[some[:3], "n_orders"].tolist()
+    assert looked_up["n_orders"].iloc[:3].tolist() == expected
+    assert looked_up.loc["missing-user"].isna().all()
+    assert store.refresh(str(data_dir)).equals(store.load())
+
+
+def test_refresh_adds_new_users(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    split_copy(data_dir, pd.Timestamp("2021-01-01"))
+    users = pd.read_parquet(data_dir / "users.parquet")
+    orders = pd.read_parquet(data_dir / "orders.parquet")
+    # a user with no activity yet who signs up after the build
+    newcomer = users.loc[~users["user_id"].isin(orders["user_id"]), "user_id"].iloc[0]
+    users[users["user_id"] != newcomer].to_parquet(data_dir / "users.parquet")
+    store = UserFeatureStore(str(tmp_path / "features.parquet"))
+    store.build(str(data_dir))
+    built = store.metadata()
+    assert store.lookup([newcomer]).isna().all(axis=None)
+
+    users.to_parquet(data_dir / "users.parquet")
+    refreshed = store.refresh(str(data_dir))
+    assert newcomer in refreshed.index
+    looked_up = store.lookup([newcomer])
+    assert looked_up.loc[newcomer, "n_orders"] == 0
+    assert store.metadata() == built
@@ -0,0 +1,139 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.module_1.meteo_cache import MeteoCache
+from src.module_1.module_1_meteo_api import API_URL, split_date_range
+from src.module_2 import eda1
+from src.module_2.abandonment import UNKNOWN
+from src.module_2.weather import (
+    NUTS1_CENTROIDS,
+    attach_weather,
+    fetch_region_weather,
+    region_days,
+    weather_features,
+)
+
+DATA_DIR = os.path.dirname(eda1.__file__)
+
+
+def respond(request, context):
+    # latitude as temperature, day of month as precipitation, month as wind
+    days = pd.date_range(request.qs["start_date"][0], request.qs["end_date"][0])
+    latitude = float(request.qs["latitude"][0])
+    return {
+        "daily": {
+            "time": days.strftime("%Y-%m-%d").tolist(),
+            "temperature_2m_mean": [latitude] * len(days),
+            "precipitation_sum": days.day.astype(float).tolist(),
+            "wind_speed_10m_max": days.month.astype(float).tolist(),
+        }
+    }
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with MeteoCache(str(tmp_path / "meteo.sqlite")) as cache:
+        yield cache
+
+
+def test_weather_features_hits_each_region_span_once(requests_mock, cache):
+    mock = requests_mock.get(API_URL, json=respond)
+    orders, carts = weather_features(DATA_DIR, cache=cache)
+
+    # one request per year of each region's own first-to-last day span
+    users = pd.read_parquet(os.path.join(DATA_DIR, "users.parquet"))
+    keys = region_days([orders, carts], users)
+    spans = keys.groupby("user_nuts1")["weather_date"].agg(["min", "max"])
+    calls = sum(
+        len(split_date_range(f"{start:%Y-%m-%d}", f"{end:%Y-%m-%d}"))
+        for start, end in spans.itertuples(index=False)
+    )
+    assert mock.call_count == calls
+    assert {r.qs["timezone"][0] for r in mock.request_history} == {"europe/london"}
+
+    for df in (orders, carts):
+        known = df["user_nuts1"] != UNKNOWN
+        latitude = df.loc[known, "user_nuts1"].map(
+            {r: c["latitude"] for r, c in NUTS1_CENTROIDS.items()}
+        )
+        np.testing.assert_allclose(
+            df.loc[known, "temperature_2m_mean"], latitude, rtol=1e-6
+        )
+        np.testing.assert_array_equal(
+            df.loc[known, "precipitation_sum"], df.loc[known, "created_at"].dt.day
+        )
+        assert df.loc[~known, "temperature_2m_mean"].isna().all()
+
+    # every (region, day) key is cached now: a rerun does not call the API
+    weather_features(DATA_DIR, cache=cache)
+    assert mock.call_count == calls
+
+
+def test_weather_features_survive_failed_fetches(requests_mock, cache, caplog):
+    # every region fails: rows keep their region and get NaN weather
+    requests_mock.get(API_URL, json={})
+    orders, carts = weather_features(DATA_DIR, cache=cache)
+    for df in (orders, carts):
+        assert df["temperature_2m_mean"].isna().all()
+        assert (df["user_nuts1"] != UNKNOWN).any()
+    assert "No weather for" in caplog.text
+
+
+def test_attach_weather_without_centroids_or_timestamps():
+    users = pd.DataFrame({"user_id": ["a", "b"], "user_nuts1": ["UKI", "UKM"]})
+    rows = pd.DataFrame(
+        {
+            "user_id": ["a", "b", "a"],
+            "created_at": pd.to_datetime(["2021-01-01", None, "2021-01-02"]),
+        }
+    )
+    keys = region_days([rows], users)
+    assert len(keys) == 2  # the row without a timestamp has no key
+
+    weather = fetch_region_weather(keys, centroids={})
+    joined = attach_weather(rows, users, weather)
+    assert list(joined["user_nuts1"]) == ["UKI", "UKM", "UKI"]
+    assert joined["temperature_2m_mean"].isna().all()
+
+
+def test_attach_weather_is_an_as_of_join():
+    users = pd.DataFrame(
+        {"user_id": ["a", "b", "c"], "user_nuts1": ["UKI", "UKM", None]}
+    )
+    rows = pd.DataFrame(
+        {
+            "user_id": ["a", "a", "b", "c", "z", "b", "a"],
+            "created_at": pd.to_datetime(
+                [
+                    "2021-01-03 10:00",
+                    "2021-01-01 09:00",
+                    "2021-01-09 23:00",
+                    "2021-01-01 00:00",
+                    "2021-01-01 00:00",
+                    "2021-01-02 08:00",
+                    None,
+                ]
+            ),
+        },
+        index=[10, 11, 12, 13, 14, 15, 16],
+    )
+    weather = pd.DataFrame(
+        {
+            "user_nuts1": ["UKI", "UKI", "UKM"],
+            "weather_date": pd.to_datetime(["2021-01-01", "2021-01-02", "2021-01-02"]),
+            "temperature_2m_mean": [1.0, 2.0, 3.0],
+        }
+    )
+    keys = region_days([rows], users)
+    assert len(keys) == 4  # a: two days, b: two days; c and z have no region
+
+    joined = attach_weather(rows, users, weather)
+    assert list(joined.index) == list(rows.index)
+    # Jan 3 falls back to Jan 2; Jan 9 is past the staleness limit
+    np.testing.assert_array_equal(
+        joined["temperature_2m_mean"], [2.0, 1.0, np.nan, np.nan, np.nan, 3.0, np.nan]
+    )
+    assert list(joined["user_nuts1"]) == (
+        ["UKI", "UKI", "UKM"] + [UNKNOWN] * 2 + ["UKM", "UKI"]
+    )
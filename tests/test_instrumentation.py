@@ -0,0 +1,76 @@
+import json
+import pandas as pd
+import pytest
+from src import instrumentation
+from src.instrumentation import instrument, span
+
+
+@pytest.fixture
+def sink(tmp_path):
+    path = tmp_path / "telemetry.jsonl"
+    instrumentation.enable(str(path))
+    yield path
+    instrumentation.disable()
+
+
+def _events(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_instrument_emits_one_event_per_call(sink):
+    @instrument(name="double")
+    def double(df):
+        return pd.concat([df, df])
+
+    result = double(pd.DataFrame({"a": [1, 2, 3]}))
+
+    (event,) = _events(sink)
+    assert event["event"] == "double"
+    assert event["ok"] is True
+    assert event["rows"] == len(result) == 6
+    assert event["bytes"] == int(result.memory_usage().sum())
+    assert event["wall_s"] >= 0
+    assert event["process_peak_rss_bytes"] > 0
+
+
+def test_instrument_records_failures_and_reraises(sink):
+    @instrument()
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        fail()
+
+    (event,) = _events(sink)
+    assert event["event"].endswith("fail")
+    assert event["ok"] is False
+    assert event["error"] == "ValueError: boom"
+
+
+def test_measure_overrides_and_span_fields(sink):
+    @instrument(measure=lambda result, n: {"bytes": n * 8})
+    def make(n):
+        return list(range(n))
+
+    make(4)
+    with span("step", stage="load") as current:
+        current.set(rows=10)
+
+    make_event, step_event = _events(sink)
+    assert make_event["bytes"] == 32 and "rows" not in make_event
+    assert step_event["stage"] == "load" and step_event["rows"] == 10
+
+
+def test_disabled_telemetry_emits_nothing(tmp_path):
+    path = tmp_path / "telemetry.jsonl"
+    instrumentation.disable()
+
+    @instrument()
+    def identity(x):
+        return x
+
+    assert identity(3) == 3
+    with span("noop"):
+        pass
+    assert not instrumentation.enabled()
+    assert not path.exists()